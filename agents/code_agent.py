@@ -3,11 +3,17 @@ import json
 
 import re
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
+from utils.gemini_clients import get_gemini_client, get_gemini_model, stream_events
 
 load_dotenv()
 
+# Kod çalıştırma aracı açık tek seferlik istek konfigürasyonu - tüm agent'lar paylaşır
+CODE_EXECUTION_MODEL = "gemini-2.0-flash-exp"
+_CODE_EXECUTION_CONFIG = types.GenerateContentConfig(
+    tools=[types.Tool(code_execution=types.ToolCodeExecution)]
+)
+
 class CodeAIAgent:
     def __init__(self, interest, language='python', api_key=None):
         self.interest = interest
@@ -18,21 +24,11 @@ class CodeAIAgent:
         if not self.api_key:
             raise ValueError("API key is required. Please provide your Gemini API key.")
         
-        # Initialize the new client
-        self.client = genai.Client(api_key=self.api_key)
-        
-        # Create chat session with code execution capabilities
-        self.chat = self.client.chats.create(
-            model="gemini-2.0-flash-exp",
-            config=types.GenerateContentConfig(
-                tools=[types.Tool(code_execution=types.ToolCodeExecution)]
-            ),
-        )
+        # Client ve model handle'ları API key bazında paylaşılır (bkz. utils/gemini_clients.py)
+        self.client = get_gemini_client(self.api_key)
         
-        # Fallback model for non-code execution tasks (using old API for compatibility)
-        import google.generativeai as old_genai
-        old_genai.configure(api_key=self.api_key)
-        self.fallback_model = old_genai.GenerativeModel('gemini-2.0-flash-lite')
+        # Fallback model for non-code execution tasks
+        self.fallback_model = get_gemini_model(self.api_key, 'gemini-2.0-flash-lite')
         
         # Dil konfigürasyonları
         self.language_configs = {
@@ -104,11 +100,21 @@ class CodeAIAgent:
         except Exception as e:
             return f"Kodlama sorusu üretilemedi: {str(e)}"
 
+    def _execute_with_code_tool(self, prompt):
+        """
+        Kod çalıştırma aracı açık tek seferlik istek - chat oturumu açmadan
+        """
+        return self.client.models.generate_content(
+            model=CODE_EXECUTION_MODEL,
+            contents=prompt,
+            config=_CODE_EXECUTION_CONFIG
+        )
+
     def run_code(self, user_code):
         """
         Kullanıcının kodunu gerçek zamanlı olarak çalıştırır ve sonuçları döndürür
         """
-        if not self.chat:
+        if not self.client:
             return {
                 "execution_output": "API bağlantısı kurulamadı. Lütfen API anahtarınızı kontrol edin.",
                 "has_errors": True,
@@ -130,16 +136,8 @@ class CodeAIAgent:
         """
         
         try:
-            # Yeni chat session oluştur (her kod çalıştırma için temiz başlangıç)
-            execution_chat = self.client.chats.create(
-                model="gemini-2.0-flash-exp",
-                config=types.GenerateContentConfig(
-                    tools=[types.Tool(code_execution=types.ToolCodeExecution)]
-                ),
-            )
-            
-            # Kodu çalıştır
-            response = execution_chat.send_message(execution_prompt)
+            # Kodu çalıştır (her çağrı tek seferlik, temiz bağlam)
+            response = self._execute_with_code_tool(execution_prompt)
             
             execution_output = ""
             has_errors = False
@@ -192,7 +190,7 @@ class CodeAIAgent:
         """
         Kullanıcının kodunu çalıştırarak değerlendirir - PUANLAMA İÇİN
         """
-        if not self.chat:
+        if not self.client:
             return {
                 "evaluation": "API bağlantısı kurulamadı. Lütfen API anahtarınızı kontrol edin.",
                 "execution_output": "",
@@ -231,16 +229,8 @@ class CodeAIAgent:
         """
         
         try:
-            # Yeni chat session oluştur (her değerlendirme için temiz başlangıç)
-            evaluation_chat = self.client.chats.create(
-                model="gemini-2.0-flash-exp",
-                config=types.GenerateContentConfig(
-                    tools=[types.Tool(code_execution=types.ToolCodeExecution)]
-                ),
-            )
-            
-            # Kodu çalıştır ve değerlendir
-            response = evaluation_chat.send_message(evaluation_prompt)
+            # Kodu çalıştır ve değerlendir (her çağrı tek seferlik, temiz bağlam)
+            response = self._execute_with_code_tool(evaluation_prompt)
             
             execution_output = ""
             evaluation_text = ""
@@ -316,10 +306,7 @@ class CodeAIAgent:
                 "feedback": f"Değerlendirme hatası: {str(e)}"
             }
 
-    def generate_code_solution(self, question):
-        """
-        Verilen soru için örnek çözüm üretir
-        """
+    def _code_solution_prompt(self, question):
         config = self.language_configs.get(self.language, self.language_configs['python'])
         
         prompt = f"""
@@ -342,70 +329,77 @@ class CodeAIAgent:
         
         NOT: Markdown formatı (**) kullanma. Sadece düz metin olarak yaz.
         """
+        return prompt
+
+    def _parse_code_solution(self, response_text):
+        """
+        Model yanıtını açıklama / kod / test bölümlerine ayırır
+        """
+        result = {
+            "explanation": "",
+            "code": "",
+            "test_results": "",
+            "complexity_analysis": ""
+        }
+        
+        # Text'i parse et
+        lines = response_text.split('\n')
+        current_section = "explanation"
+        code_block = False
+        
+        for line in lines:
+            line = line.strip()
+            
+            # Section başlıklarını tespit et
+            if "Açıklama:" in line:
+                current_section = "explanation"
+                continue
+            elif "Kod:" in line:
+                current_section = "code"
+                continue
+            elif "Test:" in line:
+                current_section = "test_results"
+                continue
+            
+            # Kod bloğu başlangıcı
+            if line.startswith("```") and current_section == "code":
+                code_block = not code_block
+                continue
+            
+            # İçeriği ilgili bölüme ekle
+            if current_section == "explanation" and line:
+                result["explanation"] += line + "\n"
+            elif current_section == "code" and code_block and line:
+                result["code"] += line + "\n"
+            elif current_section == "code" and not code_block and line and not line.startswith("```"):
+                result["code"] += line + "\n"
+            elif current_section == "test_results" and line:
+                result["test_results"] += line + "\n"
+        
+        # Eğer parsing başarısız olduysa, tüm metni explanation'a ekle
+        if not result["explanation"] and not result["code"]:
+            result["explanation"] = response_text
+            
+            # Kod bloğunu manuel olarak bul
+            code_matches = re.findall(r'```(?:python|javascript|java)?\n(.*?)```', response_text, re.DOTALL)
+            if code_matches:
+                result["code"] = code_matches[0].strip()
+        
+        # Boş alanları temizle
+        result["explanation"] = result["explanation"].strip()
+        result["code"] = result["code"].strip()
+        result["test_results"] = result["test_results"].strip()
         
+        return result
+
+    def generate_code_solution(self, question):
+        """
+        Verilen soru için örnek çözüm üretir
+        """
         try:
             # Fallback model kullan (code execution gerekmiyor)
-            response = self.fallback_model.generate_content(prompt)
-            
-            # Yanıtı parse et
-            response_text = response.text
-            
-            result = {
-                "explanation": "",
-                "code": "",
-                "test_results": "",
-                "complexity_analysis": ""
-            }
-            
-            # Text'i parse et
-            lines = response_text.split('\n')
-            current_section = "explanation"
-            code_block = False
-            
-            for line in lines:
-                line = line.strip()
-                
-                # Section başlıklarını tespit et
-                if "Açıklama:" in line:
-                    current_section = "explanation"
-                    continue
-                elif "Kod:" in line:
-                    current_section = "code"
-                    continue
-                elif "Test:" in line:
-                    current_section = "test_results"
-                    continue
-                
-                # Kod bloğu başlangıcı
-                if line.startswith("```") and current_section == "code":
-                    code_block = not code_block
-                    continue
-                
-                # İçeriği ilgili bölüme ekle
-                if current_section == "explanation" and line:
-                    result["explanation"] += line + "\n"
-                elif current_section == "code" and code_block and line:
-                    result["code"] += line + "\n"
-                elif current_section == "code" and not code_block and line and not line.startswith("```"):
-                    result["code"] += line + "\n"
-                elif current_section == "test_results" and line:
-                    result["test_results"] += line + "\n"
-            
-            # Eğer parsing başarısız olduysa, tüm metni explanation'a ekle
-            if not result["explanation"] and not result["code"]:
-                result["explanation"] = response_text
-                
-                # Kod bloğunu manuel olarak bul
-                code_matches = re.findall(r'```(?:python|javascript|java)?\n(.*?)```', response_text, re.DOTALL)
-                if code_matches:
-                    result["code"] = code_matches[0].strip()
-            
-            # Boş alanları temizle
-            result["explanation"] = result["explanation"].strip()
-            result["code"] = result["code"].strip()
-            result["test_results"] = result["test_results"].strip()
-            
-            return result
+            response = self.fallback_model.generate_content(self._code_solution_prompt(question))
+            return self._parse_code_solution(response.text)
             
         except Exception as e:
             print(f"Code solution generation error: {e}")
@@ -422,6 +416,16 @@ class CodeAIAgent:
         """
         return self.generate_code_solution(question)
 
+    def stream_solution(self, question):
+        """
+        generate_solution'ın akış (streaming) versiyonu - ('chunk', metin) olayları,
+        en sonda ('done', ayrıştırılmış çözüm) üretir
+        """
+        return stream_events(
+            self.fallback_model.generate_content_stream(self._code_solution_prompt(question)),
+            self._parse_code_solution
+        )
+
     def debug_code(self, code_with_error):
         """
         Hatalı kodu debug eder ve düzeltir
@@ -512,7 +516,7 @@ class CodeAIAgent:
             NOT: Markdown formatı (**) kullanma. Sadece düz metin olarak yaz.
             """
             
-            response = self.chat.generate_content(prompt)
+            response = self.fallback_model.generate_content(prompt)
             response_text = response.text.strip()
             
             # Markdown formatını temizle
@@ -825,10 +829,7 @@ class CodeAIAgent:
         except Exception as e:
             return f"Analiz hatası: {str(e)}"
 
-    def evaluate_code(self, user_code, question):
-        """
-        Kullanıcının kodunu geleneksel yöntemle değerlendirir (eski uyumlulık için)
-        """
+    def _evaluate_code_prompt(self, user_code, question):
         config = self.language_configs.get(self.language, self.language_configs['python'])
         
         prompt = f"""
@@ -856,30 +857,47 @@ class CodeAIAgent:
         
         NOT: Markdown formatı (#, ##, **) kullanma. Sadece düz metin olarak yaz.
         """
-        
+        return prompt
+
+    def _clean_evaluation_text(self, response_text):
+        """
+        Değerlendirme metnindeki markdown işaretlerini temizler
+        """
+        response_text = response_text.strip()
+        # # ve ## işaretlerini kaldır
+        response_text = re.sub(r'^#+\s*', '', response_text, flags=re.MULTILINE)
+        # ** işaretlerini kaldır
+        response_text = re.sub(r'\*\*(.*?)\*\*', r'\1', response_text)
+        # Fazla boşlukları temizle
+        response_text = re.sub(r'\n\s*\n\s*\n', '\n\n', response_text)
+        return response_text
+
+    def evaluate_code(self, user_code, question):
+        """
+        Kullanıcının kodunu geleneksel yöntemle değerlendirir (eski uyumlulık için)
+        """
         try:
-            response = self.fallback_model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Markdown formatını temizle
-            import re
-            # # ve ## işaretlerini kaldır
-            response_text = re.sub(r'^#+\s*', '', response_text, flags=re.MULTILINE)
-            # ** işaretlerini kaldır
-            response_text = re.sub(r'\*\*(.*?)\*\*', r'\1', response_text)
-            # Fazla boşlukları temizle
-            response_text = re.sub(r'\n\s*\n\s*\n', '\n\n', response_text)
-            
-            return response_text
+            response = self.fallback_model.generate_content(self._evaluate_code_prompt(user_code, question))
+            return self._clean_evaluation_text(response.text)
             
         except Exception as e:
             return f"Detaylı değerlendirme hatası: {str(e)}" 
 
+    def stream_evaluate_code(self, user_code, question):
+        """
+        evaluate_code'un akış (streaming) versiyonu - ('chunk', metin) olayları,
+        en sonda ('done', temizlenmiş değerlendirme) üretir
+        """
+        return stream_events(
+            self.fallback_model.generate_content_stream(self._evaluate_code_prompt(user_code, question)),
+            self._clean_evaluation_text
+        )
+
     def execute_complex_code(self, prompt, language='python'):
         """
         Karmaşık kod çalıştırma örneği - yeni API'nin tüm özelliklerini kullanır
         """
-        if not self.chat:
+        if not self.client:
             return {
                 "success": False,
                 "output": "API bağlantısı kurulamadı. Lütfen API anahtarınızı kontrol edin.",
@@ -888,16 +906,8 @@ class CodeAIAgent:
             }
         
         try:
-            # Yeni chat session oluştur
-            execution_chat = self.client.chats.create(
-                model="gemini-2.0-flash-exp",
-                config=types.GenerateContentConfig(
-                    tools=[types.Tool(code_execution=types.ToolCodeExecution)]
-                ),
-            )
-            
-            # Kodu çalıştır
-            response = execution_chat.send_message(prompt)
+            # Kodu çalıştır (her çağrı tek seferlik, temiz bağlam)
+            response = self._execute_with_code_tool(prompt)
             
             result = {
                 "success": True,
@@ -1,11 +1,10 @@
-import google.generativeai as genai
-from google import genai as google_genai_new
 from google.genai import types
 import wave
 import tempfile
 import os
 import base64
 from dotenv import load_dotenv
+from utils.gemini_clients import get_gemini_client, get_gemini_model, stream_events
 
 load_dotenv()
 
@@ -14,23 +13,14 @@ class InterviewAIAgent:
         self.interest = interest
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
         
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-        
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        # Configure the new client with API key
+        # Client ve model handle'ları API key bazında paylaşılır (bkz. utils/gemini_clients.py)
         try:
-            self.client = google_genai_new.Client(api_key=self.api_key)
+            self.client = get_gemini_client(self.api_key)
+            self.model = get_gemini_model(self.api_key, 'gemini-2.5-flash-lite')
         except Exception as e:
             print(f"Google GenAI client initialization error: {e}")
-            # Fallback: Set environment variable
-            if self.api_key:
-                os.environ['GOOGLE_API_KEY'] = self.api_key
-            try:
-                self.client = google_genai_new.Client()
-            except Exception as e2:
-                print(f"Fallback client initialization error: {e2}")
-                self.client = None
+            self.client = None
+            self.model = None
 
     def generate_dynamic_question(self, previous_questions=None, user_answers=None, conversation_context=None):
         """
@@ -74,60 +64,55 @@ class InterviewAIAgent:
         """
         Kullanıcının önceki cevaplarına göre dinamik sesli soru üretir
         """
+        question_text = self.generate_dynamic_question(previous_questions, user_answers, conversation_context)
+        # TTS, soru metni hazır olur olmaz başlar
+        return self.synthesize_question_audio(question_text, voice_name)
+
+    def synthesize_question_audio(self, question_text, voice_name='Kore'):
+        """
+        Soru metnini sese çevirir; ses üretilemezse sadece metni döndürür
+        """
+        # Sesli özellik aktifse ses üret
+        if not self.client:
+            return {
+                'audio_file': None,
+                'question_text': question_text,
+                'audio_data': None,
+                'error': 'Sesli özellik kullanılamıyor'
+            }
+        
         try:
-            question_text = self.generate_dynamic_question(previous_questions, user_answers, conversation_context)
-            
-            # Sesli özellik aktifse ses üret
-            if self.client:
-                try:
-                    response = self.client.models.generate_content(
-                        model="gemini-2.5-flash-preview-tts",
-                        contents=question_text,
-                        config=types.GenerateContentConfig(
-                            response_modalities=["AUDIO"],
-                            speech_config=types.SpeechConfig(
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name=voice_name,
-                                    )
-                                )
-                            ),
+            response = self.client.models.generate_content(
+                model="gemini-2.5-flash-preview-tts",
+                contents=question_text,
+                config=types.GenerateContentConfig(
+                    response_modalities=["AUDIO"],
+                    speech_config=types.SpeechConfig(
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name=voice_name,
+                            )
                         )
-                    )
-                    
-                    audio_data = response.candidates[0].content.parts[0].inline_data.data
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-                    self._save_wave_file(temp_file.name, audio_data)
-                    
-                    return {
-                        'audio_file': temp_file.name,
-                        'question_text': question_text,
-                        'audio_data': audio_data
-                    }
-                except Exception as audio_error:
-                    print(f"Audio generation error: {audio_error}")
-                    return {
-                        'audio_file': None,
-                        'question_text': question_text,
-                        'audio_data': None,
-                        'error': f'Ses üretilemedi: {str(audio_error)}'
-                    }
-            else:
-                return {
-                    'audio_file': None,
-                    'question_text': question_text,
-                    'audio_data': None,
-                    'error': 'Sesli özellik kullanılamıyor'
-                }
+                    ),
+                )
+            )
+            
+            audio_data = response.candidates[0].content.parts[0].inline_data.data
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+            self._save_wave_file(temp_file.name, audio_data)
             
-        except Exception as e:
-            # Hata durumunda sadece metin döndür
-            question_text = self.generate_dynamic_question(previous_questions, user_answers, conversation_context)
+            return {
+                'audio_file': temp_file.name,
+                'question_text': question_text,
+                'audio_data': audio_data
+            }
+        except Exception as audio_error:
+            print(f"Audio generation error: {audio_error}")
             return {
                 'audio_file': None,
                 'question_text': question_text,
                 'audio_data': None,
-                'error': str(e)
+                'error': f'Ses üretilemedi: {str(audio_error)}'
             }
 
     def generate_cv_based_question(self, cv_analysis):
@@ -338,12 +323,8 @@ class InterviewAIAgent:
                 'error': f'Sesli geri bildirim üretilemedi: {str(e)}'
             }
 
-    def evaluate_answer(self, question, user_answer):
-        """
-        Kullanıcı cevabını değerlendirir
-        """
-        try:
-            prompt = f"""
+    def _evaluate_answer_prompt(self, question, user_answer):
+        return f"""
             Mülakat sorusu: {question}
             Kullanıcı cevabı: {user_answer}
             
@@ -354,19 +335,26 @@ class InterviewAIAgent:
             
             Kısa ve destekleyici bir değerlendirme yap.
             """
-            
-            response = self.model.generate_content(prompt)
+
+    def evaluate_answer(self, question, user_answer):
+        """
+        Kullanıcı cevabını değerlendirir
+        """
+        try:
+            response = self.model.generate_content(self._evaluate_answer_prompt(question, user_answer))
             return response.text.strip()
             
         except Exception as e:
             return f"Cevap değerlendirilemedi: {str(e)}"
 
-    def evaluate_cv_answer(self, question, user_answer, cv_context):
+    def stream_evaluate_answer(self, question, user_answer):
         """
-        CV bağlamında kullanıcı cevabını değerlendirir
+        evaluate_answer'ın akış (streaming) versiyonu - ('chunk', metin) olayları, en sonda ('done', tam metin) üretir
         """
-        try:
-            prompt = f"""
+        return stream_events(self.model.generate_content_stream(self._evaluate_answer_prompt(question, user_answer)))
+
+    def _evaluate_cv_answer_prompt(self, question, user_answer, cv_context):
+        return f"""
             CV Analizi: {cv_context}
             Mülakat sorusu: {question}
             Kullanıcı cevabı: {user_answer}
@@ -379,13 +367,26 @@ class InterviewAIAgent:
             
             Kısa ve yapıcı bir değerlendirme yap.
             """
-            
-            response = self.model.generate_content(prompt)
+
+    def evaluate_cv_answer(self, question, user_answer, cv_context):
+        """
+        CV bağlamında kullanıcı cevabını değerlendirir
+        """
+        try:
+            response = self.model.generate_content(self._evaluate_cv_answer_prompt(question, user_answer, cv_context))
             return response.text.strip()
             
         except Exception as e:
             return f"CV bağlamında değerlendirme yapılamadı: {str(e)}"
 
+    def stream_evaluate_cv_answer(self, question, user_answer, cv_context):
+        """
+        evaluate_cv_answer'ın akış (streaming) versiyonu - ('chunk', metin) olayları, en sonda ('done', tam metin) üretir
+        """
+        return stream_events(
+            self.model.generate_content_stream(self._evaluate_cv_answer_prompt(question, user_answer, cv_context))
+        )
+
     def evaluate_speech_answer(self, question, audio_file_path, additional_text="", cv_context=None, voice_name="Enceladus"):
         """
         Ses dosyasını transcript edip değerlendirir ve sesli geri bildirim üretir
@@ -467,57 +468,71 @@ class InterviewAIAgent:
         except Exception as e:
             return f"Mülakat değerlendirmesi yapılamadı: {str(e)}"
 
-    def generate_final_evaluation(self, questions, answers, conversation_summary=None):
+    def _final_evaluation_prompt(self, questions, answers, conversation_summary=None):
+        prompt = f"""
+        {self.interest} alanında yapılan mülakatın genel değerlendirmesini yap:
+        
+        Sorular ve cevaplar:
+        """
+        for i, (q, a) in enumerate(zip(questions, answers)):
+            prompt += f"\nSoru {i+1}: {q}\nCevap: {a}\n"
+        
+        if conversation_summary:
+            prompt += f"\nMülakat özeti: {conversation_summary}"
+        
+        prompt += f"""
+        
+        Bu mülakatın kapsamlı değerlendirmesini yap. Temiz ve düzenli bir format kullan:
+        
+        Güçlü Yönler:
+        - Kullanıcının en iyi performans gösterdiği alanlar
+        - Olumlu özellikler ve beceriler
+        
+        Geliştirilmesi Gereken Alanlar:
+        - Eksiklikler ve zayıf noktalar
+        - İyileştirme önerileri
+        
+        Genel İzlenim:
+        - Mülakatın genel tonu ve atmosferi
+        - Kullanıcının motivasyonu ve ilgisi
+        
+        Öneriler:
+        - Kariyer gelişimi için öneriler
+        - Öğrenme kaynakları ve yönlendirmeler
+        
+        Puanlama (1-10):
+        - Genel performans: X/10
+        - İletişim becerileri: X/10
+        - Teknik bilgi: X/10
+        - Problem çözme: X/10
+        
+        Yapıcı, destekleyici ve detaylı bir değerlendirme yap. Gereksiz işaretler (*) kullanma, temiz markdown formatında yaz.
+        """
+        return prompt
+
+    def generate_final_evaluation(self, questions, answers, conversation_summary=None, raise_errors=False):
         """
-        Mülakat sonunda kapsamlı değerlendirme üretir
+        Mülakat sonunda kapsamlı değerlendirme üretir.
+        raise_errors=True ise hata metni döndürmek yerine hatayı yükseltir (iş kuyruğu tekrar dener)
         """
         try:
-            prompt = f"""
-            {self.interest} alanında yapılan mülakatın genel değerlendirmesini yap:
-            
-            Sorular ve cevaplar:
-            """
-            for i, (q, a) in enumerate(zip(questions, answers)):
-                prompt += f"\nSoru {i+1}: {q}\nCevap: {a}\n"
-            
-            if conversation_summary:
-                prompt += f"\nMülakat özeti: {conversation_summary}"
-            
-            prompt += f"""
-            
-            Bu mülakatın kapsamlı değerlendirmesini yap. Temiz ve düzenli bir format kullan:
-            
-            Güçlü Yönler:
-            - Kullanıcının en iyi performans gösterdiği alanlar
-            - Olumlu özellikler ve beceriler
-            
-            Geliştirilmesi Gereken Alanlar:
-            - Eksiklikler ve zayıf noktalar
-            - İyileştirme önerileri
-            
-            Genel İzlenim:
-            - Mülakatın genel tonu ve atmosferi
-            - Kullanıcının motivasyonu ve ilgisi
-            
-            Öneriler:
-            - Kariyer gelişimi için öneriler
-            - Öğrenme kaynakları ve yönlendirmeler
-            
-            Puanlama (1-10):
-            - Genel performans: X/10
-            - İletişim becerileri: X/10
-            - Teknik bilgi: X/10
-            - Problem çözme: X/10
-            
-            Yapıcı, destekleyici ve detaylı bir değerlendirme yap. Gereksiz işaretler (*) kullanma, temiz markdown formatında yaz.
-            """
-            
+            prompt = self._final_evaluation_prompt(questions, answers, conversation_summary)
             response = self.model.generate_content(prompt)
             return response.text.strip()
             
         except Exception as e:
+            if raise_errors:
+                raise
             return f"Genel değerlendirme yapılamadı: {str(e)}"
 
+    def stream_final_evaluation(self, questions, answers, conversation_summary=None):
+        """
+        generate_final_evaluation'ın akış (streaming) versiyonu - ('chunk', metin) olayları, en sonda ('done', tam metin) üretir
+        """
+        return stream_events(self.model.generate_content_stream(
+            self._final_evaluation_prompt(questions, answers, conversation_summary)
+        ))
+
     def _transcribe_audio(self, audio_file_path):
         """
         Ses dosyasını metne dönüştürür (Gemini ile)
@@ -588,9 +603,10 @@ class InterviewAIAgent:
             wf.setframerate(rate)
             wf.writeframes(pcm_data)
 
-    def analyze_cv(self, cv_data, mime_type):
+    def analyze_cv(self, cv_data, mime_type, raise_errors=False):
         """
-        CV dosyasını analiz eder
+        CV dosyasını analiz eder.
+        raise_errors=True ise hata metni döndürmek yerine hatayı yükseltir (iş kuyruğu tekrar dener)
         """
         try:
             # CV metnini çıkar
@@ -643,6 +659,8 @@ class InterviewAIAgent:
             return response.text.strip()
             
         except Exception as e:
+            if raise_errors:
+                raise
             return f"CV analizi yapılamadı: {str(e)}"
 
 def extract_text_from_file(file_data, mime_type):
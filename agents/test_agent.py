@@ -1,29 +1,27 @@
-import google.generativeai as genai
 import json
 import re
 import requests
 from urllib.parse import quote_plus
 import time
 import random
-import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 from .topic_analysis_agent import TopicAnalysisAgent
+from utils.question_pool import get_question_pool, question_hash
+from utils.pool_replenisher import get_pool_replenisher
+from utils.gemini_clients import get_gemini_model
 
 class TestAIAgent:
-    def __init__(self, interest, api_key=None):
+    def __init__(self, interest, api_key=None, pool_store=None):
         self.interest = interest
         self.api_key = api_key
-        if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        # Soru havuzu ve kullanıcı geçmişi için cache
-        self.question_pool = {}
-        self.user_history = {}
+        self.model = get_gemini_model(api_key, 'gemini-2.5-flash-lite')
+        # Soru havuzu ve kullanıcı geçmişi süreçler arası paylaşılan store'da tutulur
+        self.pool_store = pool_store or get_question_pool()
         self.session_questions = {}
         
     def _generate_question_hash(self, question_text):
         """Soru metninden benzersiz hash oluştur"""
-        return hashlib.md5(question_text.encode()).hexdigest()
+        return question_hash(question_text)
     
     def _get_user_session_key(self, user_id, session_id):
         """Kullanıcı ve seans için benzersiz anahtar oluştur"""
@@ -31,73 +29,61 @@ class TestAIAgent:
     
     def _is_question_used_recently(self, user_id, question_hash, days_limit=30):
         """Soru son günlerde kullanıcı tarafından kullanıldı mı kontrol et"""
-        if user_id not in self.user_history:
-            return False
-            
-        current_time = datetime.now()
-        for record in self.user_history[user_id]:
-            if record['question_hash'] == question_hash:
-                time_diff = current_time - record['timestamp']
-                if time_diff.days < days_limit:
-                    return True
-        return False
+        return question_hash in self.pool_store.get_recent_hashes(user_id, days_limit)
     
     def _add_question_to_history(self, user_id, question_hash, session_id):
         """Soru kullanımını kullanıcı geçmişine ekle"""
-        if user_id not in self.user_history:
-            self.user_history[user_id] = []
-            
-        self.user_history[user_id].append({
-            'question_hash': question_hash,
-            'timestamp': datetime.now(),
-            'session_id': session_id
-        })
-        
-        # Eski kayıtları temizle (90 günden eski)
-        cutoff_date = datetime.now() - timedelta(days=90)
-        self.user_history[user_id] = [
-            record for record in self.user_history[user_id] 
-            if record['timestamp'] > cutoff_date
-        ]
+        self.pool_store.record_usage(user_id, [question_hash], session_id)
     
     def _get_diverse_questions_from_pool(self, num_questions, difficulty='mixed', user_id=None, session_id=None):
         """Havuzdan çeşitli sorular seç - kullanıcı geçmişini dikkate al"""
-        if not self.question_pool.get(self.interest):
-            return []
-            
-        available_questions = []
+        # Zorluk seviyesine göre soruları filtrele (mixed: tüm havuz)
+        available_questions = self.pool_store.get_questions(self.interest, difficulty)
         
-        # Zorluk seviyesine göre soruları filtrele
-        if difficulty == 'mixed':
-            available_questions = self.question_pool[self.interest]
-        else:
+        # Kullanıcı geçmişini kontrol et - tek sorguda son görülen hash'ler
+        if user_id and available_questions:
+            used_hashes = self.pool_store.get_recent_hashes(user_id)
             available_questions = [
-                q for q in self.question_pool[self.interest] 
-                if q.get('difficulty', 'intermediate') == difficulty
+                q for q in available_questions
+                if self._generate_question_hash(q['question']) not in used_hashes
             ]
         
-        # Kullanıcı geçmişini kontrol et
-        if user_id:
-            filtered_questions = []
-            for q in available_questions:
-                question_hash = self._generate_question_hash(q['question'])
-                if not self._is_question_used_recently(user_id, question_hash):
-                    filtered_questions.append(q)
-            available_questions = filtered_questions
-        
-        # Eğer yeterli soru yoksa, yeni sorular üret
+        # Eğer yeterli soru yoksa, önce arka plan worker'ına havuzu doldurmasını söyle
         if len(available_questions) < num_questions:
-            new_questions = self._generate_new_questions_for_pool(num_questions - len(available_questions), difficulty)
-            available_questions.extend(new_questions)
+            replenisher = get_pool_replenisher()
+            if replenisher and self.api_key:
+                replenisher.request_replenish(self.interest, difficulty, self.api_key)
+            
+            bucket_questions = self.pool_store.get_questions(self.interest, difficulty)
+            if replenisher and len(bucket_questions) >= num_questions:
+                # Havuz dolu ama kullanıcı yeni soruları görmüş: worker yeni sorular üretirken
+                # Gemini'yi beklemek yerine eksikleri daha önce görülen sorulardan tamamla
+                available_hashes = {self._generate_question_hash(q['question']) for q in available_questions}
+                seen_questions = [
+                    q for q in bucket_questions
+                    if self._generate_question_hash(q['question']) not in available_hashes
+                ]
+                needed = num_questions - len(available_questions)
+                available_questions.extend(random.sample(seen_questions, min(needed, len(seen_questions))))
+            else:
+                # Soğuk havuz: yeni soruları istek üzerinde üret
+                new_questions = self._generate_new_questions_for_pool(num_questions - len(available_questions), difficulty)
+                available_questions.extend(new_questions)
         
         # Çeşitlilik için farklı kategorilerden sorular seç
         selected_questions = self._select_diverse_questions(available_questions, num_questions)
         
+        # Havuzdan gelen soruların id'leri farklı üretim partilerinden gelir, test içinde yeniden numarala
+        for i, q in enumerate(selected_questions):
+            q['id'] = i + 1
+        
         # Seçilen soruları kullanıcı geçmişine ekle
         if user_id:
-            for q in selected_questions:
-                question_hash = self._generate_question_hash(q['question'])
-                self._add_question_to_history(user_id, question_hash, session_id)
+            self.pool_store.record_usage(
+                user_id,
+                [self._generate_question_hash(q['question']) for q in selected_questions],
+                session_id
+            )
         
         return selected_questions
     
@@ -135,26 +121,20 @@ class TestAIAgent:
     
     def _generate_new_questions_for_pool(self, num_questions, difficulty):
         """Havuz için yeni sorular üret"""
-        new_questions = self._generate_questions_internal(num_questions, difficulty)
+        new_questions = self._generate_questions_internal(num_questions, difficulty) or []
         
-        # Havuzu güncelle
-        if self.interest not in self.question_pool:
-            self.question_pool[self.interest] = []
-        
-        # Yeni soruları havuza ekle (duplicate kontrolü ile)
-        for q in new_questions:
-            question_hash = self._generate_question_hash(q['question'])
-            if not any(self._generate_question_hash(existing_q['question']) == question_hash 
-                      for existing_q in self.question_pool[self.interest]):
-                self.question_pool[self.interest].append(q)
+        # Yeni soruları havuza ekle (duplicate kontrolü store'da)
+        self.pool_store.add_questions(self.interest, new_questions)
         
         return new_questions
     
-    def _generate_questions_internal(self, num_questions, difficulty):
-        """İç soru üretim fonksiyonu"""
+    def _generate_questions_internal(self, num_questions, difficulty, category=None):
+        """İç soru üretim fonksiyonu - category verilirse tüm sorular o kategoride üretilir"""
+        category_prompt = f"Tüm sorular \"{category}\" kategorisinde olmalı." if category else ""
         prompt = f"""
         {self.interest} alanında geliştiriciler için {num_questions} adet çoktan seçmeli sınav sorusu üret. 
         Zorluk seviyesi: {difficulty} (beginner, intermediate, advanced, mixed)
+        {category_prompt}
         
         ÖNEMLİ: Her seferinde tamamen farklı ve özgün sorular üret. Önceki soruları tekrarlama.
         
@@ -210,7 +190,9 @@ class TestAIAgent:
                         q['id'] = i + 1
                     if 'difficulty' not in q:
                         q['difficulty'] = difficulty
-                    if 'category' not in q:
+                    if category:
+                        q['category'] = category
+                    elif 'category' not in q:
                         q['category'] = self.interest
                     if 'explanation' not in q:
                         q['explanation'] = ''
@@ -333,31 +315,29 @@ class TestAIAgent:
     def get_question_statistics(self, user_id=None):
         """Soru havuzu ve kullanıcı istatistikleri"""
         stats = {
-            'total_questions_in_pool': len(self.question_pool.get(self.interest, [])),
+            'total_questions_in_pool': 0,
             'interest_area': self.interest,
             'pool_categories': {},
             'pool_difficulties': {},
             'user_history': {}
         }
         
-        # Havuz istatistikleri
-        if self.interest in self.question_pool:
-            for q in self.question_pool[self.interest]:
-                category = q.get('category', 'Bilinmeyen')
-                difficulty = q.get('difficulty', 'intermediate')
-                
-                stats['pool_categories'][category] = stats['pool_categories'].get(category, 0) + 1
-                stats['pool_difficulties'][difficulty] = stats['pool_difficulties'].get(difficulty, 0) + 1
+        # Havuz istatistikleri - bucket sayımlarından
+        for (_, difficulty, category), count in self.pool_store.get_bucket_counts(self.interest).items():
+            stats['total_questions_in_pool'] += count
+            stats['pool_categories'][category] = stats['pool_categories'].get(category, 0) + count
+            stats['pool_difficulties'][difficulty] = stats['pool_difficulties'].get(difficulty, 0) + count
         
         # Kullanıcı geçmişi istatistikleri
-        if user_id and user_id in self.user_history:
+        history = self.pool_store.get_user_history(user_id) if user_id else []
+        if history:
             user_stats = {
-                'total_questions_answered': len(self.user_history[user_id]),
+                'total_questions_answered': len(history),
                 'questions_by_session': {},
                 'recent_activity': []
             }
             
-            for record in self.user_history[user_id]:
+            for record in history:
                 session_id = record['session_id']
                 user_stats['questions_by_session'][session_id] = user_stats['questions_by_session'].get(session_id, 0) + 1
                 
@@ -374,24 +354,24 @@ class TestAIAgent:
     
     def refresh_question_pool(self, force_refresh=False):
         """Soru havuzunu yenile - eski soruları temizle ve yenilerini ekle"""
-        if not force_refresh and self.interest in self.question_pool:
+        if not force_refresh:
             # Havuzda yeterli soru varsa yenileme
-            if len(self.question_pool[self.interest]) >= 50:
+            if self.pool_store.count(self.interest) >= 50:
                 return False
         
-        # Havuzu temizle
-        if self.interest in self.question_pool:
-            del self.question_pool[self.interest]
-        
         # Yeni sorular üret (farklı zorluk seviyelerinde)
         difficulties = ['beginner', 'intermediate', 'advanced']
         questions_per_difficulty = 20
         
+        new_questions = []
         for difficulty in difficulties:
-            new_questions = self._generate_questions_internal(questions_per_difficulty, difficulty)
-            if self.interest not in self.question_pool:
-                self.question_pool[self.interest] = []
-            self.question_pool[self.interest].extend(new_questions)
+            new_questions.extend(self._generate_questions_internal(questions_per_difficulty, difficulty) or [])
+        
+        # Havuzu ancak yeni sorular hazır olduğunda değiştir
+        if not new_questions:
+            raise RuntimeError('Yeni soru üretilemedi, mevcut havuz korundu.')
+        self.pool_store.clear(self.interest)
+        self.pool_store.add_questions(self.interest, new_questions)
         
         return True
 
@@ -496,28 +476,28 @@ class TestAIAgent:
         weak_areas = self._identify_weak_areas(results)
         strong_areas = self._identify_strong_areas(results)
         
-        # Yanlış sorular için topic analizi ve kaynak önerileri
+        # Yanlış sorular ve zayıf alanlar için topic analizi ve kaynak önerileri
+        # İki liste tek seferde paralel analiz edilir
         wrong_questions = [result for result in results if not result['is_correct']]
+        weak_topics = [area['category'] for area in weak_areas]
+        weak_area_questions = [
+            {
+                'question': f'Weak area: {topic}', 
+                'question_id': i, 
+                'difficulty': 'intermediate',
+                'explanation': f'Bu konuda gelişim gerekli: {topic}',
+                'user_answer': 'Unknown',
+                'correct_answer': 'Unknown'
+            }
+            for i, topic in enumerate(weak_topics)
+        ]
         topic_analysis_agent = TopicAnalysisAgent(self.interest, getattr(self, 'api_key', None))
-        wrong_question_resources = topic_analysis_agent.analyze_wrong_questions(wrong_questions)
+        wrong_question_resources, weak_area_resources = topic_analysis_agent.analyze_question_sets(
+            [wrong_questions, weak_area_questions]
+        )
         
         # Genel kaynak önerileri (zayıf alanlar için)
-        weak_topics = [area['category'] for area in weak_areas]
-        suggested_resources = []
-        if weak_topics:
-            # Use topic analysis agent for weak areas too
-            weak_area_resources = topic_analysis_agent.analyze_wrong_questions([
-                {
-                    'question': f'Weak area: {topic}', 
-                    'question_id': i, 
-                    'difficulty': 'intermediate',
-                    'explanation': f'Bu konuda gelişim gerekli: {topic}',
-                    'user_answer': 'Unknown',
-                    'correct_answer': 'Unknown'
-                }
-                for i, topic in enumerate(weak_topics)
-            ])
-            suggested_resources = weak_area_resources.get('all_recommended_resources', [])
+        suggested_resources = weak_area_resources.get('all_recommended_resources', []) if weak_topics else []
         
         return {
             'results': results,
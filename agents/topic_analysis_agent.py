@@ -1,24 +1,57 @@
-import google.generativeai as genai
 from google.genai import types
 import json
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.analysis_cache import RESOURCES, TOPIC, get_analysis_cache, resource_key
+from utils.question_pool import question_hash
+from utils.gemini_clients import get_gemini_client, get_gemini_model
+
+
+# Shared pool for topic/resource lookups - bounded across all requests in the process
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('TOPIC_ANALYSIS_WORKERS', 8)),
+    thread_name_prefix='topic-analysis'
+)
+# Per API key in-flight call limit (free-tier keys have strict concurrency/RPM quotas)
+_KEY_CONCURRENCY = int(os.getenv('TOPIC_ANALYSIS_CONCURRENCY_PER_KEY', 4))
+_key_semaphores = {}
+_key_semaphores_lock = threading.Lock()
+
+
+# Google Search grounding config - immutable, shared by all agents
+_GROUNDING_CONFIG = types.GenerateContentConfig(
+    tools=[types.Tool(google_search=types.GoogleSearch())]
+)
+
+
+def _key_semaphore(api_key):
+    with _key_semaphores_lock:
+        semaphore = _key_semaphores.get(api_key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(_KEY_CONCURRENCY)
+            _key_semaphores[api_key] = semaphore
+        return semaphore
 
 
 class TopicAnalysisAgent:
-    def __init__(self, interest, api_key=None):
+    def __init__(self, interest, api_key=None, concurrent=True, call_timeout=None, cache=None):
         self.interest = interest
-        if api_key:
-            genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        self.cache = cache or get_analysis_cache()
+        self.api_key = api_key
+        self.concurrent = concurrent
+        self.call_timeout = call_timeout or float(os.getenv('TOPIC_ANALYSIS_TIMEOUT', 20))
+        self.topic_batch_size = int(os.getenv('TOPIC_ANALYSIS_BATCH_SIZE', 20))
+        self.model = get_gemini_model(api_key, 'gemini-2.5-flash-lite')
         
         # Configure the client for grounding tool
         try:
-            self.client = genai.Client(api_key=api_key) if api_key else genai.Client()
-            self.grounding_tool = types.Tool(
-                google_search=types.GoogleSearch()
-            )
-            self.config = types.GenerateContentConfig(
-                tools=[self.grounding_tool]
+            self.client = get_gemini_client(api_key)
+            self.config = _GROUNDING_CONFIG.model_copy(
+                update={'http_options': types.HttpOptions(**self._request_options())}
             )
             self.use_grounding = True
         except Exception as e:
@@ -29,6 +62,98 @@ class TopicAnalysisAgent:
         """
         Analyze wrong questions to identify topics and provide resource recommendations
         """
+        return self.analyze_question_sets([wrong_questions])[0]
+    
+    def analyze_question_sets(self, question_sets):
+        """
+        Analyze several question lists in one fan-out and return one result per list, in order
+        """
+        all_questions = [q for questions in question_sets for q in questions]
+        topic_infos, topic_resources = self._analyze_items(all_questions)
+        
+        results = []
+        offset = 0
+        for questions in question_sets:
+            end = offset + len(questions)
+            results.append(self._build_analysis(
+                questions, topic_infos[offset:end], topic_resources[offset:end]
+            ))
+            offset = end
+        return results
+    
+    def _analyze_items(self, questions):
+        """
+        Run topic analysis, then resource lookup, for every question.
+        
+        Both stages consult the analysis cache first, so a question (or topic)
+        is only sent to Gemini once across all users. Topics are classified in
+        batched prompts; in concurrent mode resource lookups fan out over the
+        shared pool. Results keep input order; every call, even a lone one,
+        runs under `call_timeout` and one that fails or times out falls back
+        to the keyword/template based result.
+        """
+        if not questions:
+            return [], []
+        
+        topic_infos = self._analyze_topics(questions)
+        topic_resources = self._resolve_resources(topic_infos, questions)
+        return topic_infos, topic_resources
+    
+    def _fan_out(self, calls, fallbacks):
+        """
+        Submit calls to the shared pool and collect results in submission order.
+        
+        Each call gets the full `call_timeout` measured from the moment it
+        actually starts, not from submission, so calls queued behind the
+        per-key semaphore or the shared executor are not cut short. Waiting to
+        start is bounded by `ceil(n / per-key concurrency) * call_timeout`; a
+        call that has not started by then is abandoned and never sent.
+        
+        A call that times out after starting cannot be interrupted from here -
+        `future.cancel()` has no effect on a running thread. The Gemini request
+        itself carries an HTTP timeout of `call_timeout` (see
+        `_request_options`), which is what eventually frees the executor slot
+        and semaphore permit of a hung call.
+        """
+        semaphore = _key_semaphore(self.api_key)
+        started = [threading.Event() for _ in calls]
+        started_at = [None] * len(calls)
+        abandoned = [False] * len(calls)
+        
+        def limited(index, fn, args):
+            with semaphore:
+                if abandoned[index]:
+                    return None
+                started_at[index] = time.monotonic()
+                started[index].set()
+                return fn(*args)
+        
+        futures = [_executor.submit(limited, i, fn, args) for i, (fn, args) in enumerate(calls)]
+        waves = -(-len(calls) // max(1, _KEY_CONCURRENCY))
+        start_deadline = time.monotonic() + waves * self.call_timeout
+        
+        results = []
+        for index, (future, fallback) in enumerate(zip(futures, fallbacks)):
+            try:
+                if not started[index].wait(timeout=max(0, start_deadline - time.monotonic())):
+                    abandoned[index] = True
+                    raise TimeoutError('call did not start before the fan-out deadline')
+                remaining = started_at[index] + self.call_timeout - time.monotonic()
+                results.append(future.result(timeout=max(0, remaining)))
+            except Exception as e:
+                future.cancel()
+                print(f"Topic analysis call failed or timed out: {e!r}")
+                results.append(fallback())
+        return results
+    
+    def _request_options(self):
+        """HTTP timeout (ms) for a single Gemini request, so a hung call gives back its worker"""
+        return {'timeout': int(self.call_timeout * 1000)}
+    
+    def _build_analysis(self, wrong_questions, topic_infos, topic_resources_list):
+        """
+        Assemble the analysis response for one list of questions
+        """
         if not wrong_questions:
             return {
                 'message': 'Tebrikler! Tüm soruları doğru yanıtladınız.',
@@ -39,13 +164,7 @@ class TopicAnalysisAgent:
         topic_analysis = []
         all_resources = []
         
-        for wrong_q in wrong_questions:
-            # Analyze the question to identify the topic
-            topic_info = self._analyze_question_topic(wrong_q)
-            
-            # Get resources for this specific topic
-            topic_resources = self._get_topic_resources(topic_info['topic'], wrong_q)
-            
+        for wrong_q, topic_info, topic_resources in zip(wrong_questions, topic_infos, topic_resources_list):
             topic_analysis.append({
                 'question_id': wrong_q.get('question_id', 0),
                 'question_preview': wrong_q.get('question', '')[:100] + "..." if len(wrong_q.get('question', '')) > 100 else wrong_q.get('question', ''),
@@ -74,57 +193,160 @@ class TopicAnalysisAgent:
             'all_recommended_resources': self._deduplicate_resources(all_resources)
         }
     
-    def _analyze_question_topic(self, question_data):
+    def _normalize_topic_info(self, topic_info):
         """
-        Analyze a question to identify the specific topic using AI
+        Fill in missing topic fields with defaults
         """
+        topic_info.setdefault('topic', 'Genel Konular')
+        topic_info.setdefault('confidence', 0.7)
+        topic_info.setdefault('description', f'{self.interest} alanında genel konular')
+        topic_info.setdefault('keywords', [])
+        topic_info.setdefault('subtopics', [])
+        topic_info.setdefault('learning_path', 'Temel öğrenme yolu')
+        return topic_info
+    
+    def _analyze_question_topics_batch(self, questions):
+        """
+        Classify several questions with a single structured-JSON prompt.
+        
+        Returns a list aligned with `questions`; entries that are missing or
+        invalid in the model output are None so the caller can fall back
+        per item.
+        """
+        question_lines = "\n".join(
+            f"[{i}] Soru: {q.get('question', '')}\n    Açıklama: {q.get('explanation', '')}\n    Zorluk: {q.get('difficulty', 'intermediate')}"
+            for i, q in enumerate(questions)
+        )
         prompt = f"""
-        Aşağıdaki soruyu analiz ederek {self.interest} alanında hangi konuya ait olduğunu belirle:
-        
-        Soru: {question_data.get('question', '')}
-        Açıklama: {question_data.get('explanation', '')}
-        Zorluk: {question_data.get('difficulty', 'intermediate')}
-        
-        Lütfen şu bilgileri JSON formatında döndür:
-        {{
-            "topic": "konu_adı",
-            "confidence": 0.85,
-            "description": "Konunun kısa açıklaması",
-            "keywords": ["anahtar", "kelimeler"],
-            "subtopics": ["alt_konular"],
-            "learning_path": "öğrenme_yolu"
-        }}
+        Aşağıdaki {len(questions)} soruyu analiz ederek her birinin {self.interest} alanında hangi konuya ait olduğunu belirle:
+        
+        {question_lines}
+        
+        Her soru için bir nesne içeren JSON dizisi döndür; "index" alanı sorunun köşeli parantez içindeki numarası olmalı:
+        [
+            {{
+                "index": 0,
+                "topic": "konu_adı",
+                "confidence": 0.85,
+                "description": "Konunun kısa açıklaması",
+                "keywords": ["anahtar", "kelimeler"],
+                "subtopics": ["alt_konular"],
+                "learning_path": "öğrenme_yolu"
+            }}
+        ]
         
         Sadece JSON formatında yanıt ver, başka açıklama ekleme.
         """
         
+        results = [None] * len(questions)
         try:
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(
+                prompt,
+                generation_config={
+                    'response_mime_type': 'application/json',
+                    'http_options': self._request_options()
+                }
+            )
             response_text = response.text.strip()
             
-            # Extract JSON from response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_text = response_text[start_idx:end_idx]
-                topic_info = json.loads(json_text)
-                
-                # Ensure required fields
-                topic_info.setdefault('topic', 'Genel Konular')
-                topic_info.setdefault('confidence', 0.7)
-                topic_info.setdefault('description', f'{self.interest} alanında genel konular')
-                topic_info.setdefault('keywords', [])
-                topic_info.setdefault('subtopics', [])
-                topic_info.setdefault('learning_path', 'Temel öğrenme yolu')
-                
-                return topic_info
-            else:
-                return self._fallback_topic_analysis(question_data)
-                
+            start_idx = response_text.find('[')
+            end_idx = response_text.rfind(']') + 1
+            if start_idx == -1 or end_idx == 0:
+                return results
+            items = json.loads(response_text[start_idx:end_idx])
         except Exception as e:
-            print(f"Topic analysis error: {e}")
-            return self._fallback_topic_analysis(question_data)
+            print(f"Batch topic analysis error: {e}")
+            return results
+        
+        if not isinstance(items, list):
+            return results
+        
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            index = item.get('index')
+            topic = item.get('topic')
+            if not isinstance(index, int) or not 0 <= index < len(questions) or results[index] is not None:
+                continue
+            if not isinstance(topic, str) or not topic.strip():
+                continue
+            try:
+                item['confidence'] = min(1.0, max(0.0, float(item.get('confidence', 0.7))))
+            except (TypeError, ValueError):
+                continue
+            item.pop('index')
+            item['topic'] = topic.strip()
+            results[index] = self._normalize_topic_info(item)
+        
+        return results
+    
+    def _run_calls(self, calls, fallbacks):
+        """
+        Every Gemini call goes through `_fan_out`, even a single one, so the
+        `call_timeout` deadline and the fallback always apply. Without
+        `concurrent` the calls are submitted one at a time, each with its own deadline.
+        """
+        if self.concurrent:
+            return self._fan_out(calls, fallbacks)
+        return [self._fan_out([call], [fallback])[0] for call, fallback in zip(calls, fallbacks)]
+    
+    def _analyze_topics(self, questions):
+        """
+        Classify all questions, serving cached topics by question hash and
+        sending only the misses to Gemini in batched prompts. Items the model
+        did not return valid output for fall back to keyword analysis and are
+        not cached.
+        """
+        hashes = [question_hash(q['question']) if q.get('question') else None for q in questions]
+        cached = self._cache_get(TOPIC, [h for h in hashes if h])
+        topic_infos = [dict(cached[h]) if h in cached else None for h in hashes]
+        
+        missing = [i for i, info in enumerate(topic_infos) if info is None]
+        if not missing:
+            return topic_infos
+        
+        missing_questions = [questions[i] for i in missing]
+        batch_size = max(1, self.topic_batch_size)
+        batches = [missing_questions[i:i + batch_size] for i in range(0, len(missing_questions), batch_size)]
+        
+        batch_results = self._run_calls(
+            [(self._analyze_question_topics_batch, (batch,)) for batch in batches],
+            [lambda batch=batch: [None] * len(batch) for batch in batches]
+        )
+        
+        analysed = [info for batch_result in batch_results for info in batch_result]
+        fresh = {}
+        failed = 0
+        for i, info in zip(missing, analysed):
+            if info is None:
+                failed += 1
+                topic_infos[i] = self._fallback_topic_analysis(questions[i])
+                continue
+            topic_infos[i] = info
+            if hashes[i]:
+                fresh[hashes[i]] = info
+        
+        if failed:
+            print(f"Batch topic analysis: {failed}/{len(missing)} items fell back to keyword analysis")
+        self._cache_set(TOPIC, fresh)
+        return topic_infos
+    
+    def _cache_get(self, kind, keys):
+        if not keys:
+            return {}
+        try:
+            return self.cache.get_many(kind, self.interest, keys)
+        except Exception as e:
+            print(f"Analysis cache unavailable: {e}")
+            return {}
+    
+    def _cache_set(self, kind, values):
+        if not values:
+            return
+        try:
+            self.cache.set_many(kind, self.interest, values)
+        except Exception as e:
+            print(f"Analysis cache unavailable: {e}")
     
     def _fallback_topic_analysis(self, question_data):
         """
@@ -178,22 +400,42 @@ class TopicAnalysisAgent:
             'learning_path': 'Temel öğrenme yolu'
         }
     
-    def _get_topic_resources(self, topic, question_data):
+    def _resolve_resources(self, topic_infos, questions):
         """
-        Get learning resources for a specific topic using grounding tool
+        Get learning resources for each question's topic.
+        
+        Grounded results are cached per (interest, topic) and looked up once
+        per distinct topic; topics without a grounded result get the template
+        based fallback for that question.
         """
-        if self.use_grounding:
-            return self._get_grounded_resources(topic, question_data)
-        else:
-            return self._get_fallback_resources(topic, question_data)
+        if not self.use_grounding:
+            return [self._get_fallback_resources(info['topic'], q) for info, q in zip(topic_infos, questions)]
+        
+        keys = [resource_key(info['topic']) for info in topic_infos]
+        found = self._cache_get(RESOURCES, keys)
+        
+        missing = {}
+        for key, info in zip(keys, topic_infos):
+            if key not in found and key not in missing:
+                missing[key] = info['topic']
+        
+        calls = [(self._get_grounded_resources, (topic,)) for topic in missing.values()]
+        results = self._run_calls(calls, [lambda: None] * len(calls))
+        
+        fresh = {key: resources for key, resources in zip(missing, results) if resources}
+        self._cache_set(RESOURCES, fresh)
+        found.update(fresh)
+        
+        return [
+            list(found[key]) if key in found else self._get_fallback_resources(info['topic'], q)
+            for key, info, q in zip(keys, topic_infos, questions)
+        ]
     
-    def _get_grounded_resources(self, topic, question_data):
+    def _get_grounded_resources(self, topic):
         """
-        Get resources using Google's grounding tool
+        Get resources using Google's grounding tool; None if no usable result
         """
         try:
-            search_query = f"{self.interest} {topic} tutorial learning resources"
-            
             # Use grounding tool to search for resources
             response = self.client.models.generate_content(
                 model="gemini-2.5-flash",
@@ -216,14 +458,13 @@ class TopicAnalysisAgent:
                 resources = json.loads(json_text)
                 if isinstance(resources, list):
                     return resources[:5]  # Limit to 5 resources
-                else:
-                    return self._get_fallback_resources(topic, question_data)
+                return None
             except json.JSONDecodeError:
-                return self._get_fallback_resources(topic, question_data)
+                return None
                 
         except Exception as e:
             print(f"Grounding tool error: {e}")
-            return self._get_fallback_resources(topic, question_data)
+            return None
     
     def _get_fallback_resources(self, topic, question_data):
         """
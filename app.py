@@ -1,11 +1,11 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context, g
 from flask_cors import CORS
-from flask_session import Session
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+import base64
 import time
 import json
 import shutil
@@ -18,8 +18,26 @@ from agents.interview_agent import InterviewAIAgent
 from agents.code_agent import CodeAIAgent
 
 from utils.code_formatter import code_indenter
+from utils.question_pool import QuestionPoolStore, configure_question_pool
+from utils.pool_replenisher import PoolReplenisher, configure_pool_replenisher
+from utils.analysis_cache import AnalysisCacheStore, configure_analysis_cache
+from utils.job_queue import JobQueue, PermanentJobError
+from utils.interview_prefetch import QuestionPrefetcher
+from utils.view_counter import ViewCounter
+from utils.migrations import MigrationRunner, add_missing_columns, create_indexes
+from utils.forum_search import ForumSearch
+from utils.forum_stats import ForumStatsRollups
+from utils.leaderboard import Leaderboard
+from utils.counters import increment_counters
+from utils.activity_histogram import ActivityHistogram, HISTOGRAM_WINDOWS
+from utils.identity_cache import IdentityCache
+from utils.session_store import configure_session_backend
+from utils.structured_logging import configure_logging, init_request_ids
+from utils.pool_health import PoolHealthMonitor
+from utils.retention import RetentionEngine, RetentionPolicy
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import event as sa_event, text
+from sqlalchemy.exc import IntegrityError
 import json
 from functools import wraps
 import logging
@@ -32,7 +50,7 @@ def admin_required(f):
             return jsonify({'error': 'Giriş yapılmamış'}), 401
         
         # Kullanıcının admin olup olmadığını kontrol et
-        user = User.query.filter_by(username=session['username']).first()
+        user = current_user()
         if not user or not user.is_admin:
             return jsonify({'error': 'Admin yetkisi gerekli'}), 403
         
@@ -64,15 +82,19 @@ except:
     except:
         pass
 
-# Debug logging ekle
-logging.basicConfig(level=logging.DEBUG)
+# Logging: LOG_LEVEL altındaki kayıtlar formatlanmadan elenir, gizli alanlar maskelenir
+configure_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    fmt=os.getenv('LOG_FORMAT', 'json' if os.getenv('FLASK_ENV') == 'production' else 'text')
+)
 logger = logging.getLogger(__name__)
+init_request_ids(app)
 
 # Environment variables'ları logla
-logger.info(f"FLASK_ENV: {os.getenv('FLASK_ENV')}")
-logger.info(f"DATABASE_URL: {os.getenv('DATABASE_URL')}")
-logger.info(f"SECRET_KEY: {'SET' if os.getenv('SECRET_KEY') else 'NOT SET'}")
-logger.info("GEMINI_API_KEY: Using user-provided API keys")
+logger.info("FLASK_ENV: %s", os.getenv('FLASK_ENV'))
+logger.info("DATABASE_URL: %s", os.getenv('DATABASE_URL'))
+logger.info("Secret key configured: %s", 'yes' if os.getenv('SECRET_KEY') else 'no (using default)')
+logger.info("Gemini API keys are provided per user session")
 
 # CORS ayarları
 CORS(app, supports_credentials=True, origins=[
@@ -159,8 +181,8 @@ if DATABASE_URL:
                     host_with_port = f"{host_part}:5432"
                     DATABASE_URL = f"{parts[0]}@{host_with_port}/{db_name}"
         except Exception as e:
-            logger.error(f"Error parsing DATABASE_URL: {e}")
-            logger.error(f"DATABASE_URL value: {DATABASE_URL[:50]}...")  # Log first 50 chars only
+            logger.error("Error parsing DATABASE_URL: %s", e)
+            logger.error("DATABASE_URL value: %s...", DATABASE_URL[:50])  # Log first 50 chars only
     
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     # PostgreSQL için connection pooling optimizasyonları
@@ -192,9 +214,6 @@ app.config['SESSION_REFRESH_EACH_REQUEST'] = True  # Her istekte session'ı yeni
 # Tek bir db instance oluştur
 db = SQLAlchemy(app)
 
-# Session'ı initialize et
-Session(app)
-
 # Import models
 from models.user import UserMixin
 from models.history import TestSessionMixin, AutoInterviewSessionMixin, UserHistoryMixin
@@ -216,8 +235,43 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+identity_cache = IdentityCache(
+    db, User,
+    ttl=int(os.getenv('IDENTITY_CACHE_TTL', '30')),
+    max_entries=int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', '1000'))
+)
+identity_cache.watch()
+
+# Sunucu taraflı HTTP session'ları (SESSION_BACKEND=database)
+class WebSession(db.Model):
+    __table_args__ = (
+        db.Index('ix_web_session_expires', 'expires_at'),
+    )
+    session_id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)  # JSON (Flask session formatı)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+# Veritabanı bağlantı havuzu sağlık takibi (/health, /db-test, login)
+pool_health = PoolHealthMonitor(
+    app, db,
+    probe_interval=int(os.getenv('DB_HEALTH_PROBE_SECONDS', '15')),
+    failure_threshold=int(os.getenv('DB_HEALTH_FAILURE_THRESHOLD', '3'))
+)
+
+# Session backend'i: filesystem (varsayılan), database (sunucular arası paylaşılan) veya cookie (imzalı çerez)
+SESSION_BACKEND = configure_session_backend(
+    app, db, WebSession,
+    backend=os.getenv('SESSION_BACKEND', 'filesystem'),
+    cleanup_interval=int(os.getenv('SESSION_CLEANUP_SECONDS', '300')),
+    cleanup_batch=int(os.getenv('SESSION_CLEANUP_BATCH', '1000'))
+)
+
 # Define TestSession model with main db instance
 class TestSession(db.Model, TestSessionMixin):
+    __table_args__ = (
+        db.Index('ix_test_session_user_status_start', 'username', 'status', 'start_time'),
+        db.Index('ix_test_session_status_start', 'status', 'start_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), unique=True, nullable=False)
     username = db.Column(db.String(80), nullable=False)
@@ -231,6 +285,10 @@ class TestSession(db.Model, TestSessionMixin):
 
 # Define AutoInterviewSession model with main db instance
 class AutoInterviewSession(db.Model, AutoInterviewSessionMixin):
+    __table_args__ = (
+        db.Index('ix_auto_interview_user_status', 'username', 'status'),
+        db.Index('ix_auto_interview_status_end', 'status', 'end_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(100), unique=True, nullable=False)
     username = db.Column(db.String(80), nullable=False)
@@ -246,6 +304,10 @@ class AutoInterviewSession(db.Model, AutoInterviewSessionMixin):
 
 # Define UserHistory model with main db instance
 class UserHistory(db.Model, UserHistoryMixin):
+    __table_args__ = (
+        db.Index('ix_user_history_user_created', 'username', 'created_at'),
+        db.Index('ix_user_history_created', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     activity_type = db.Column(db.String(32), nullable=False)  # test, code, case, interview
@@ -254,6 +316,12 @@ class UserHistory(db.Model, UserHistoryMixin):
 
 # Forum sistemi için yeni modeller
 class ForumPost(db.Model):
+    __table_args__ = (
+        db.Index('ix_forum_post_feed', 'interest', 'is_removed', 'created_at'),
+        db.Index('ix_forum_post_admin_feed', 'is_admin_post', 'is_removed', 'created_at'),
+        db.Index('ix_forum_post_removed_created', 'is_removed', 'created_at'),
+        db.Index('ix_forum_post_author', 'author_username', 'interest'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -276,6 +344,11 @@ class ForumPost(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ForumComment(db.Model):
+    __table_args__ = (
+        db.Index('ix_forum_comment_post_created', 'post_id', 'created_at'),
+        db.Index('ix_forum_comment_parent', 'parent_comment_id'),
+        db.Index('ix_forum_comment_author', 'author_username'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('forum_post.id'), nullable=False)
     author_username = db.Column(db.String(80), nullable=False)
@@ -288,6 +361,12 @@ class ForumComment(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ForumLike(db.Model):
+    __table_args__ = (
+        db.Index('ix_forum_like_user_post', 'username', 'post_id'),
+        db.Index('ix_forum_like_user_comment', 'username', 'comment_id'),
+        db.Index('ix_forum_like_post', 'post_id'),
+        db.Index('ix_forum_like_comment', 'comment_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('forum_post.id'), nullable=True)
@@ -296,6 +375,10 @@ class ForumLike(db.Model):
 
 # Yeni gelişmiş modeller
 class ForumNotification(db.Model):
+    __table_args__ = (
+        db.Index('ix_forum_notification_user_created', 'username', 'created_at'),
+        db.Index('ix_forum_notification_post', 'related_post_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     notification_type = db.Column(db.String(50), nullable=False)  # like, comment, mention, solution_accepted, admin_message
@@ -322,6 +405,9 @@ class ForumReport(db.Model):
     resolved_at = db.Column(db.DateTime, nullable=True)
 
 class UserBadge(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_badge_user', 'username'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     badge_type = db.Column(db.String(50), nullable=False)  # expert, helper, creator, moderator
@@ -333,10 +419,28 @@ class ForumTag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=True)
-    usage_count = db.Column(db.Integer, default=0)
+    usage_count = db.Column(db.Integer, default=0)  # Kaldırılmamış gönderi sayısı
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Gönderi ↔ etiket ilişkisi (ForumPost.tags JSON'u sadece gösterim içindir)
+class ForumPostTag(db.Model):
+    __table_args__ = (
+        db.Index('ix_forum_post_tag_tag_post', 'tag_id', 'post_id'),
+    )
+    post_id = db.Column(db.Integer, db.ForeignKey('forum_post.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('forum_tag.id'), primary_key=True)
+
+# İlgi alanı başına önceden hesaplanmış forum istatistikleri (/forum/stats, /forum/analytics)
+class ForumStatsRollup(db.Model):
+    interest = db.Column(db.String(80), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON string
+    computed_at = db.Column(db.DateTime, nullable=False)
+
 class UserActivity(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_activity_user_created', 'username', 'created_at'),
+        db.Index('ix_user_activity_post', 'related_post_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     activity_type = db.Column(db.String(50), nullable=False)  # post_created, comment_added, post_liked, etc.
@@ -345,7 +449,46 @@ class UserActivity(db.Model):
     related_comment_id = db.Column(db.Integer, db.ForeignKey('forum_comment.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Liderlik tablosu için kullanıcı başına puan / çözüm sayaçları
+class UserScore(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_score_rank', 'solution_count', 'total_points', 'username'),
+        db.Index('ix_user_score_interest_rank', 'interest', 'solution_count', 'total_points', 'username'),
+    )
+    username = db.Column(db.String(80), primary_key=True)
+    interest = db.Column(db.String(80), nullable=True)
+    total_points = db.Column(db.Integer, nullable=False, default=0)  # Tüm aktivite puanları
+    solution_count = db.Column(db.Integer, nullable=False, default=0)  # Kaldırılmamış gönderilerde kabul edilen çözümler
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Profil için kullanıcı + aktivite türü başına aktivite sayısı / puan toplamları
+class UserActivityTotal(db.Model):
+    username = db.Column(db.String(80), primary_key=True)
+    activity_type = db.Column(db.String(50), primary_key=True)
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+leaderboard = Leaderboard(db, UserScore, User)
+activity_histogram = ActivityHistogram(db, UserActivity, os.getenv('ACTIVITY_TIMEZONE', 'Europe/Istanbul'))
+
+def adjust_activity_totals(conn, username, activity_type, count, points):
+    increment_counters(
+        conn, UserActivityTotal.__table__,
+        key={'username': username, 'activity_type': activity_type},
+        deltas={'activity_count': count, 'points': points}
+    )
+
+@sa_event.listens_for(UserActivity, 'after_insert')
+def add_activity_points(mapper, connection, activity):
+    """Aktivite puanı, aktiviteyi ekleyen transaction içinde liderlik sayacına ve profil toplamlarına eklenir"""
+    points = activity.points_earned or 0
+    leaderboard.increment(connection, activity.username, points=points)
+    adjust_activity_totals(connection, activity.username, activity.activity_type, 1, points)
+
 class TestPerformance(db.Model):
+    __table_args__ = (
+        db.Index('ix_test_performance_user_created', 'username', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False)
     interest = db.Column(db.String(80), nullable=False)
@@ -359,6 +502,107 @@ class TestPerformance(db.Model):
     strong_areas = db.Column(db.Text, nullable=True)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Test soru havuzu - interest/difficulty/category bucket'ları, tüm worker'lar arasında paylaşılır
+class QuestionPoolEntry(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('interest', 'question_hash', name='uq_question_pool_interest_hash'),
+        db.Index('ix_question_pool_bucket', 'interest', 'difficulty', 'category'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    interest = db.Column(db.String(80), nullable=False)
+    difficulty = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    question_hash = db.Column(db.String(32), nullable=False)
+    question_data = db.Column(db.Text, nullable=False)  # JSON string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Kullanıcının gördüğü havuz soruları (tekrar önleme için)
+class QuestionUsage(db.Model):
+    __table_args__ = (
+        db.Index('ix_question_usage_user_time', 'username', 'used_at'),
+        db.Index('ix_question_usage_used', 'used_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), nullable=False)
+    question_hash = db.Column(db.String(32), nullable=False)
+    session_id = db.Column(db.String(200), nullable=True)
+    used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+question_pool_store = QuestionPoolStore(
+    db, QuestionPoolEntry, QuestionUsage,
+    cache_ttl=int(os.getenv('QUESTION_POOL_CACHE_TTL', 300))
+)
+configure_question_pool(question_pool_store)
+
+# Havuzu low-water mark üstünde tutan arka plan worker'ı
+pool_replenisher = PoolReplenisher(
+    app, question_pool_store, TestAIAgent,
+    low_water_mark=int(os.getenv('QUESTION_POOL_LOW_WATER_MARK', 20)),
+    batch_size=int(os.getenv('QUESTION_POOL_BATCH_SIZE', 10)),
+    requests_per_minute=int(os.getenv('QUESTION_POOL_RPM_PER_KEY', 6)),
+    scan_interval=int(os.getenv('QUESTION_POOL_SCAN_INTERVAL', 600)),
+    server_api_key=os.getenv('QUESTION_POOL_API_KEY'),
+    max_category_jobs=int(os.getenv('QUESTION_POOL_MAX_CATEGORY_JOBS', 3))
+)
+configure_pool_replenisher(pool_replenisher)
+
+# Konu analizi cache'i - soru hash'i → konu, (interest, konu) → kaynaklar
+class AnalysisCacheEntry(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'interest', 'cache_key', name='uq_analysis_cache_key'),
+        db.Index('ix_analysis_cache_last_used', 'last_used_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # topic, resources
+    interest = db.Column(db.String(80), nullable=False)
+    cache_key = db.Column(db.String(200), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+analysis_cache = AnalysisCacheStore(
+    db, AnalysisCacheEntry,
+    ttl=int(os.getenv('ANALYSIS_CACHE_TTL', 7 * 24 * 3600)),
+    max_entries=int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 50000)),
+    memory_entries=int(os.getenv('ANALYSIS_CACHE_MEMORY_ENTRIES', 2000))
+)
+configure_analysis_cache(analysis_cache)
+
+# Uzun süren AI işleri (CV analizi, havuz yenileme, final değerlendirme) için iş kuyruğu
+class BackgroundJob(db.Model):
+    __table_args__ = (
+        db.Index('ix_background_job_status_run_at', 'status', 'run_at'),
+    )
+    id = db.Column(db.String(32), primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    username = db.Column(db.String(80), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    payload = db.Column(db.Text, nullable=False)  # JSON string
+    api_key = db.Column(db.String(200), nullable=True)  # SECRET_KEY ile şifreli, iş bitince silinir
+    result = db.Column(db.Text, nullable=True)  # JSON string
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    locked_by = db.Column(db.String(200), nullable=True)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+job_queue = JobQueue(
+    app, db, BackgroundJob,
+    workers=int(os.getenv('JOB_WORKERS', 2)),
+    max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', 3)),
+    backoff_base=int(os.getenv('JOB_BACKOFF_SECONDS', 10))
+)
+
+# Forum görüntülenmeleri bellekte toplanır, periyodik olarak toplu yazılır
+view_counter = ViewCounter(
+    app, db, ForumPost,
+    flush_interval=int(os.getenv('FORUM_VIEW_FLUSH_SECONDS', 10)),
+    max_pending=int(os.getenv('FORUM_VIEW_MAX_PENDING', 1000))
+)
+
 # Geçici bellek içi veri saklama
 users = {}  # username: {password_hash, interest}
 
@@ -422,6 +666,30 @@ def get_file_mimetype(filename):
         return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
     return 'application/octet-stream'
 
+# Tablo başına saklama süreleri (cleanup worker ve /admin/cleanup)
+FINISHED_SESSION_STATUSES = ('completed', 'expired')
+
+retention = RetentionEngine(db, [
+    RetentionPolicy(
+        'auto_interview_sessions', AutoInterviewSession, 'end_time',
+        timedelta(hours=int(os.getenv('RETENTION_AUTO_INTERVIEW_HOURS', '24'))),
+        where=lambda table: table.c.status.in_(FINISHED_SESSION_STATUSES)
+    ),
+    RetentionPolicy(
+        'test_sessions', TestSession, 'start_time',
+        timedelta(hours=int(os.getenv('RETENTION_TEST_SESSION_HOURS', '24'))),
+        where=lambda table: table.c.status.in_(FINISHED_SESSION_STATUSES)
+    ),
+    RetentionPolicy(
+        'user_history', UserHistory, 'created_at',
+        timedelta(days=int(os.getenv('RETENTION_USER_HISTORY_DAYS', '7')))
+    ),
+    RetentionPolicy(
+        'question_usage', QuestionUsage, 'used_at',
+        timedelta(days=int(os.getenv('RETENTION_QUESTION_USAGE_DAYS', '90')))
+    ),
+], batch_size=int(os.getenv('RETENTION_BATCH_SIZE', '1000')))
+
 # Auto-interview cleanup fonksiyonu
 def start_auto_interview_cleanup():
     """Auto-interview session'larını ve eski audio dosyalarını temizler"""
@@ -434,19 +702,6 @@ def start_auto_interview_cleanup():
         while True:
             try:
                 with app.app_context():
-                    # Eski auto-interview session'larını temizle (24 saatten eski)
-                    old_sessions = AutoInterviewSession.query.filter(
-                        AutoInterviewSession.status.in_(['completed', 'expired']),
-                        AutoInterviewSession.end_time < (datetime.utcnow() - timedelta(hours=24))
-                    ).all()
-                    
-                    for old_session in old_sessions:
-                        try:
-                            db.session.delete(old_session)
-                            print(f"🧹 Cleaned up old auto-interview session: {old_session.session_id}")
-                        except Exception as e:
-                            print(f"⚠️ Failed to delete old session {old_session.session_id}: {e}")
-                    
                     # Eski audio dosyalarını temizle (1 saatten eski)
                     audio_dir = os.path.join(app.static_folder, 'audio')
                     if os.path.exists(audio_dir):
@@ -462,34 +717,21 @@ def start_auto_interview_cleanup():
                                 except Exception as e:
                                     print(f"⚠️ Failed to delete old audio file {filename}: {e}")
                     
-                    # Test session'larını da temizle (24 saatten eski)
-                    old_test_sessions = TestSession.query.filter(
-                        TestSession.status.in_(['completed', 'expired']),
-                        TestSession.start_time < (datetime.utcnow() - timedelta(hours=24))
-                    ).all()
-                    
-                    for old_session in old_test_sessions:
-                        try:
-                            db.session.delete(old_session)
-                            print(f"🧹 Cleaned up old test session: {old_session.session_id}")
-                        except Exception as e:
-                            print(f"⚠️ Failed to delete old test session {old_session.session_id}: {e}")
-                    
-                    # UserHistory'yi de temizle (7 günden eski)
-                    old_history = UserHistory.query.filter(
-                        UserHistory.created_at < (datetime.utcnow() - timedelta(days=7))
-                    ).all()
+                    # Saklama süresi dolan kayıtlar (auto-interview / test session'ları,
+                    # kullanıcı geçmişi, soru kullanımları) parça parça silinir
+                    report = retention.run()
+                    print("✅ Cleanup completed: " + ", ".join(
+                        f"{name} {stats['rows']} rows / {stats['bytes'] // 1024} KB in {stats['seconds']}s"
+                        for name, stats in report.items()
+                    ))
                     
-                    for old_record in old_history:
-                        try:
-                            db.session.delete(old_record)
-                            print(f"🧹 Cleaned up old user history record: {old_record.id}")
-                        except Exception as e:
-                            print(f"⚠️ Failed to delete old history record {old_record.id}: {e}")
+                    # 7 günden eski tamamlanmış işleri temizle
+                    job_queue.purge(timedelta(days=7))
                     
-                    # Değişiklikleri commit et
-                    db.session.commit()
-                    print(f"✅ Cleanup completed: {len(old_sessions)} sessions, {len(old_test_sessions)} test sessions, {len(old_history)} history records")
+                    # Süresi dolan / LRU sınırını aşan konu analizi cache kayıtları
+                    pruned = analysis_cache.prune()
+                    if pruned:
+                        print(f"🧹 Pruned {pruned} analysis cache entries")
                     
             except Exception as e:
                 print(f"❌ Cleanup error: {e}")
@@ -502,6 +744,124 @@ def start_auto_interview_cleanup():
     cleanup_thread.start()
     print("🧹 Auto-interview cleanup thread started")
 
+# ==================== ŞEMA MIGRATION'LARI ====================
+# db.create_all() yalnızca eksik tabloları oluşturur; mevcut tablolara sütun /
+# index eklemek için migration'lar burada sırayla tanımlanır.
+schema_migrations = MigrationRunner(db)
+
+# Route sorgularına göre seçilmiş index'ler (modellerde __table_args__ ile tanımlı)
+QUERY_INDEXES = (
+    'ix_test_session_user_status_start', 'ix_test_session_status_start',
+    'ix_auto_interview_user_status', 'ix_auto_interview_status_end',
+    'ix_user_history_user_created', 'ix_user_history_created',
+    'ix_forum_post_feed', 'ix_forum_post_admin_feed', 'ix_forum_post_removed_created', 'ix_forum_post_author',
+    'ix_forum_comment_post_created', 'ix_forum_comment_parent', 'ix_forum_comment_author',
+    'ix_forum_like_user_post', 'ix_forum_like_user_comment', 'ix_forum_like_post', 'ix_forum_like_comment',
+    'ix_forum_notification_user_created', 'ix_forum_notification_post',
+    'ix_user_badge_user',
+    'ix_user_activity_user_created', 'ix_user_activity_post',
+    'ix_test_performance_user_created',
+)
+
+@schema_migrations.migration('0001', 'Admin sütunları (user, forum_post, forum_notification)')
+def migrate_admin_columns(conn):
+    add_missing_columns(conn, 'user', {
+        'is_admin': 'BOOLEAN DEFAULT FALSE',
+        'created_at': 'TIMESTAMP'
+    })
+    add_missing_columns(conn, 'forum_post', {
+        'is_admin_post': 'BOOLEAN DEFAULT FALSE',
+        'is_removed': 'BOOLEAN DEFAULT FALSE',
+        'removed_by': 'VARCHAR(80)',
+        'removed_at': 'TIMESTAMP'
+    })
+    add_missing_columns(conn, 'forum_notification', {
+        'is_admin_message': 'BOOLEAN DEFAULT FALSE',
+        'admin_username': 'VARCHAR(80)'
+    })
+
+@schema_migrations.migration('0002', 'user.password_hash VARCHAR(255)')
+def migrate_password_hash_length(conn):
+    # SQLite VARCHAR uzunluğunu uygulamaz
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('ALTER TABLE "user" ALTER COLUMN password_hash TYPE VARCHAR(255)'))
+
+@schema_migrations.migration('0003', 'Forum, oturum ve aktivite sorguları için index\'ler')
+def migrate_query_indexes(conn):
+    create_indexes(conn, db.metadata, *QUERY_INDEXES)
+
+# Forum tam metin araması (PostgreSQL tsvector + GIN, SQLite FTS5)
+forum_search = ForumSearch(db, ForumPost, language=os.getenv('FORUM_SEARCH_LANGUAGE', 'turkish'))
+
+@schema_migrations.migration('0004', 'Forum tam metin arama index\'i')
+def migrate_forum_search(conn):
+    forum_search.install(conn)
+
+@schema_migrations.migration('0005', 'Etiketleri forum_post_tag tablosuna taşı, usage_count\'ları hesapla')
+def migrate_post_tags(conn):
+    post, tag, post_tag = ForumPost.__table__, ForumTag.__table__, ForumPostTag.__table__
+    tag_ids = {row.name: row.id for row in conn.execute(db.select(tag.c.id, tag.c.name))}
+    existing = {(row.post_id, row.tag_id) for row in conn.execute(db.select(post_tag))}
+    links = []
+    for row in conn.execute(db.select(post.c.id, post.c.tags).where(post.c.tags.isnot(None))):
+        try:
+            names = normalize_tag_names(json.loads(row.tags))
+        except (TypeError, ValueError):
+            continue
+        for name in names[:MAX_POST_TAGS]:
+            name = name[:50]
+            if name not in tag_ids:
+                tag_ids[name] = conn.execute(
+                    tag.insert().values(name=name, usage_count=0, created_at=datetime.utcnow())
+                ).inserted_primary_key[0]
+            if (row.id, tag_ids[name]) not in existing:
+                existing.add((row.id, tag_ids[name]))
+                links.append({'post_id': row.id, 'tag_id': tag_ids[name]})
+    if links:
+        conn.execute(post_tag.insert(), links)
+    recount_tag_usage(conn)
+
+@schema_migrations.migration('0006', 'Liderlik tablosu sayaçlarını (user_score) mevcut verilerden hesapla')
+def migrate_user_scores(conn):
+    score, user = UserScore.__table__, User.__table__
+    activity, comment, post = UserActivity.__table__, ForumComment.__table__, ForumPost.__table__
+    scores = {}
+    points = db.select(activity.c.username, db.func.sum(activity.c.points_earned))\
+        .group_by(activity.c.username)
+    for username, total in conn.execute(points):
+        scores.setdefault(username, [0, 0])[0] = total or 0
+    solutions = db.select(comment.c.author_username, db.func.count(comment.c.id))\
+        .select_from(comment.join(post, post.c.id == comment.c.post_id))\
+        .where(comment.c.is_solution == True, post.c.is_removed == False)\
+        .group_by(comment.c.author_username)
+    for username, count in conn.execute(solutions):
+        scores.setdefault(username, [0, 0])[1] = count
+    interests = dict(conn.execute(db.select(user.c.username, user.c.interest)).all())
+    conn.execute(score.delete())
+    if scores:
+        now = datetime.utcnow()
+        conn.execute(score.insert(), [
+            {'username': username, 'interest': interests.get(username), 'total_points': total_points,
+             'solution_count': solution_count, 'updated_at': now}
+            for username, (total_points, solution_count) in scores.items()
+        ])
+
+@schema_migrations.migration('0007', 'Profil aktivite toplamlarını (user_activity_total) mevcut verilerden hesapla')
+def migrate_user_activity_totals(conn):
+    total, activity = UserActivityTotal.__table__, UserActivity.__table__
+    conn.execute(total.delete())
+    conn.execute(total.insert().from_select(
+        ['username', 'activity_type', 'activity_count', 'points'],
+        db.select(
+            activity.c.username, activity.c.activity_type,
+            db.func.count(activity.c.id), db.func.coalesce(db.func.sum(activity.c.points_earned), 0)
+        ).group_by(activity.c.username, activity.c.activity_type)
+    ))
+
+@schema_migrations.migration('0008', 'Soru kullanım kayıtları için used_at index\'i (saklama temizliği)')
+def migrate_question_usage_retention_index(conn):
+    create_indexes(conn, db.metadata, 'ix_question_usage_used')
+
 # Uygulama context'i oluşturulduktan sonra test session'larını temizle
 def init_app():
     with app.app_context():
@@ -517,24 +877,13 @@ def init_app():
             db.create_all()
             print("✅ Veritabanı tabloları başarıyla oluşturuldu.")
             
-            # Migration: password_hash sütununu güncelle (SQLite compatible)
+            # Şema migration'ları (eksik sütunlar, index'ler)
             try:
-                if DATABASE_URL and 'sqlite' in DATABASE_URL:
-                    # SQLite için migration yapma - sadece log
-                    print("ℹ️ SQLite database detected - skipping ALTER TABLE migration")
-                else:
-                    # PostgreSQL için migration
-                    with db.engine.connect() as conn:
-                        conn.execute(text("""
-                            ALTER TABLE "user" 
-                            ALTER COLUMN password_hash TYPE VARCHAR(255)
-                        """))
-                        conn.commit()
-                        print("✅ Database migration completed - password_hash column updated")
+                applied = schema_migrations.upgrade()
+                if applied:
+                    print(f"✅ Database migrations applied: {', '.join(applied)}")
             except Exception as migration_error:
-                print(f"⚠️ Migration note: {migration_error}")
-                # Migration hatası kritik değil, devam et
-                pass
+                print(f"⚠️ Migration error: {migration_error}")
                 
         except Exception as e:
             print(f"Veritabanı tabloları zaten mevcut veya oluşturulamadı: {e}")
@@ -576,23 +925,74 @@ def check_api_key_required():
         }), 400
     return None
 
+# Server-sent events yardımcısı
+def sse_response(events, error_prefix='Hata'):
+    """(event, data) çiftleri üreten generator'ı text/event-stream yanıtına çevirir"""
+    def generate():
+        try:
+            # Akış boyunca (model yanıtı beklenirken) bağlantı tutulmasın
+            release_db_connection()
+            for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            db.session.rollback()
+            payload = json.dumps({'error': f'{error_prefix}: {str(e)}'}, ensure_ascii=False)
+            yield f"event: error\ndata: {payload}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Proxy'lerin (nginx vb.) yanıtı tamponlamasını engelle
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Uzun süren AI çağrılarından önce veritabanı bağlantısını havuza geri ver
+def release_db_connection():
+    """
+    İsteğin transaction'ını bitirip bağlantıyı havuza iade eder. Gemini/TTS
+    çağrısı boyunca bağlantı tutulmaz; aksi halde eşzamanlı AI istekleri havuzu
+    tüketir ve forum/profil gibi kısa istekler pool_timeout'a düşer. Nesneler
+    expire edilmez: yüklü alanlar tekrar sorgu atmadan okunur, sonraki
+    değişiklikler yeni (kısa) bir transaction'da commit edilir. Session'da
+    bekleyen değişiklik varsa hiçbir şey yapılmaz.
+    """
+    db_session = db.session()
+    if db_session.new or db_session.dirty or db_session.deleted:
+        # Bekleyen değişiklikler route'un kendi commit'ine kalır (erken commit edilmez)
+        logger.debug("release_db_connection skipped: session has pending changes")
+        return
+    expire_on_commit = db_session.expire_on_commit
+    db_session.expire_on_commit = False
+    try:
+        db_session.commit()
+    finally:
+        db_session.expire_on_commit = expire_on_commit
+
+# Oturumdaki kullanıcı
+def current_user():
+    """Oturumdaki kullanıcı - istek başına bir kez (kimlik cache'inden) yüklenir ve g'de tutulur"""
+    if 'username' not in session:
+        return None
+    if 'current_user' not in g:
+        g.current_user = identity_cache.get(session['username'])
+    return g.current_user
+
 # Güvenlik dekoratörü
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        print(f"DEBUG: Session check - Session: {dict(session)}")
         if 'username' not in session:
-            print(f"DEBUG: No username in session")
+            logger.debug("No username in session")
             return jsonify({'error': 'Giriş yapmalısınız.'}), 401
         
-        # Kullanıcının hala veritabanında var olup olmadığını kontrol et
-        user = User.query.filter_by(username=session['username']).first()
+        # Kullanıcının hala veritabanında var olup olmadığını kontrol et (istek boyunca g'de tutulur)
+        user = current_user()
         if not user:
-            print(f"DEBUG: User not found in database: {session['username']}")
+            logger.debug("User not found in database: %s", session['username'])
             session.clear()
             return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
         
-        print(f"DEBUG: Login check passed for user: {session['username']}")
+        logger.debug("Login check passed for user: %s", session['username'])
         return f(*args, **kwargs)
     return decorated_function
 
@@ -631,12 +1031,8 @@ def login():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
     try:
-        # Database connection'ı kontrol et
-        try:
-            with db.engine.connect() as conn:
-                conn.execute(db.text("SELECT 1"))
-        except Exception as db_error:
-            print(f"Database connection error: {db_error}")
+        # Veritabanı erişilemez durumdaysa (arka plan sağlık kontrolü) sorgu denemeden dön
+        if not pool_health.is_available():
             return jsonify({'error': 'Veritabanı bağlantı hatası. Lütfen daha sonra tekrar deneyin.'}), 503
         
         data = request.json
@@ -656,8 +1052,8 @@ def login():
         # Database query - tüm User model'ini çek (method'lar için gerekli)
         try:
             user = User.query.filter_by(username=username).first()
-        except Exception as query_error:
-            print(f"Database query error: {query_error}")
+        except Exception:
+            logger.exception("Database query error during login for user: %s", username)
             return jsonify({'error': 'Veritabanı sorgu hatası. Lütfen daha sonra tekrar deneyin.'}), 500
         
         if not user:
@@ -665,19 +1061,15 @@ def login():
         
         # Password kontrolü
         try:
-            print(f"DEBUG: Checking password for user: {username}")
-            print(f"DEBUG: Stored hash: {user.password_hash}")
-            print(f"DEBUG: Hash length: {len(user.password_hash) if user.password_hash else 0}")
+            logger.debug("Checking password for user: %s", username)
             
             if not user.check_password(password):
-                print(f"DEBUG: Password check failed for user: {username}")
+                logger.debug("Password check failed for user: %s", username)
                 return jsonify({'error': 'Geçersiz kullanıcı adı veya şifre.'}), 401
             else:
-                print(f"DEBUG: Password check successful for user: {username}")
-        except Exception as password_error:
-            print(f"Password check error: {password_error}")
-            import traceback
-            traceback.print_exc()
+                logger.debug("Password check successful for user: %s", username)
+        except Exception:
+            logger.exception("Password check error for user: %s", username)
             return jsonify({'error': 'Şifre doğrulama hatası. Lütfen daha sonra tekrar deneyin.'}), 500
         
         # Session'ı kalıcı yap
@@ -692,8 +1084,7 @@ def login():
         # Session'ı hemen kaydet
         session.modified = True
         
-        # Debug için session bilgilerini logla
-        print(f"Login successful for user: {username}, session: {dict(session)}")
+        logger.info("Login successful for user: %s", username)
         
         return jsonify({
             'message': 'Giriş başarılı.',
@@ -702,9 +1093,7 @@ def login():
         })
         
     except Exception as e:
-        print(f"Login error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Login error")
         
         # Production'da daha detaylı hata bilgisi
         if os.getenv('FLASK_ENV') == 'production':
@@ -752,8 +1141,8 @@ def session_status():
             'session_modified': session.modified,
             'timestamp': datetime.utcnow().isoformat()
         })
-    except Exception as e:
-        print(f"Session status error: {e}")
+    except Exception:
+        logger.exception("Session status error")
         return jsonify({
             'has_username': False,
             'has_user_id': False,
@@ -765,13 +1154,12 @@ def session_status():
 def health_check():
     """Health check endpoint'i"""
     import os
-    try:
-        # Database connection'ı test et
-        with db.engine.connect() as conn:
-            conn.execute(db.text("SELECT 1"))
+    # Arka planda ölçülen havuz durumu - istek başına SELECT 1 yok
+    health = pool_health.status()
+    if health['healthy']:
         db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
+    else:
+        db_status = f"error: {health['last_error']}"
     
     return jsonify({
         'status': 'healthy',
@@ -779,8 +1167,9 @@ def health_check():
         'pid': os.getpid(),
         'flask_env': os.getenv('FLASK_ENV'),
         'database_status': db_status,
-        'database_pool_size': db.engine.pool.size() if hasattr(db.engine.pool, 'size') else 'N/A',
-        'database_checked_in': db.engine.pool.checkedin() if hasattr(db.engine.pool, 'checkedin') else 'N/A',
+        'database_health': health,
+        'database_pool_size': health['pool']['size'],
+        'database_checked_in': health['pool']['checkedin'],
         'gemini_api_key': bool(get_user_api_key())
     })
 
@@ -788,21 +1177,31 @@ def health_check():
 def database_test():
     """Database connection test endpoint'i"""
     try:
-        # Database connection'ı test et
-        with db.engine.connect() as conn:
-            result = conn.execute(db.text("SELECT 1 as test")).fetchone()
+        # Cache'lenmiş havuz durumu; ?probe=1 ile anlık kontrol yapılır
+        if request.args.get('probe') == '1':
+            pool_health.probe()
+        health = pool_health.status()
         
         # Pool bilgilerini al
         pool_info = {
-            'size': db.engine.pool.size() if hasattr(db.engine.pool, 'size') else 'N/A',
-            'checked_in': db.engine.pool.checkedin() if hasattr(db.engine.pool, 'checkedin') else 'N/A',
-            'checked_out': db.engine.pool.checkedout() if hasattr(db.engine.pool, 'checkedout') else 'N/A',
-            'overflow': db.engine.pool.overflow() if hasattr(db.engine.pool, 'overflow') else 'N/A'
+            'size': health['pool']['size'],
+            'checked_in': health['pool']['checkedin'],
+            'checked_out': health['pool']['checkedout'],
+            'overflow': health['pool']['overflow']
         }
         
+        if not health['healthy']:
+            return jsonify({
+                'status': 'error',
+                'error': health['last_error'],
+                'database_health': health,
+                'timestamp': datetime.utcnow().isoformat()
+            }), 503
+        
         return jsonify({
             'status': 'success',
-            'database_test': result[0] if result else 'failed',
+            'database_test': 1,
+            'database_health': health,
             'pool_info': pool_info,
             'timestamp': datetime.utcnow().isoformat()
         })
@@ -820,8 +1219,9 @@ def set_interest():
     interest = data.get('interest')
     if not interest:
         return jsonify({'error': 'İlgi alanı gerekli.'}), 400
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     user.interest = interest
+    leaderboard.set_interest(db.session.connection(), user.username, interest)
     db.session.commit()
     return jsonify({'message': 'İlgi alanı kaydedildi.'})
 
@@ -829,19 +1229,18 @@ def set_interest():
 @login_required
 def profile():
     try:
-        user = User.query.filter_by(username=session['username']).first()
+        user = current_user()
         if not user:
             # Kullanıcı bulunamadıysa session'ı temizle
-            print(f"WARNING: User not found in database: {session['username']}")
+            logger.warning("User not found in database: %s", session['username'])
             session.clear()
             return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
         
-        # Test istatistikleri - Database query'leri optimize et
-        test_performances = TestPerformance.query.filter_by(username=user.username).with_entities(
-            TestPerformance.success_rate, TestPerformance.interest, TestPerformance.created_at
-        ).all()
-        total_tests = len(test_performances)
-        avg_score = sum(p.success_rate for p in test_performances) / total_tests if total_tests > 0 else 0
+        # Test istatistikleri - sayı ve ortalama veritabanında hesaplanır
+        total_tests, avg_score = db.session.query(
+            db.func.count(TestPerformance.id), db.func.avg(TestPerformance.success_rate)
+        ).filter(TestPerformance.username == user.username).one()
+        avg_score = float(avg_score or 0)
         
         # Son 5 test performansı
         recent_tests = TestPerformance.query.filter_by(username=user.username)\
@@ -860,14 +1259,11 @@ def profile():
         forum_posts = ForumPost.query.filter_by(author_username=user.username).count()
         forum_comments = ForumComment.query.filter_by(author_username=user.username).count()
         
-        # Kodlama odası aktiviteleri - Sadece gerekli alanları çek
-        code_activities = UserActivity.query.filter(
-            UserActivity.username == user.username,
-            UserActivity.activity_type.like('code%')
-        ).with_entities(UserActivity.points_earned, UserActivity.created_at, UserActivity.activity_type).all()
-        
-        total_code_sessions = len(code_activities)
-        total_code_points = sum(activity.points_earned for activity in code_activities)
+        # Aktivite türü başına toplamlar (kullanıcı başına birkaç satır, aktivite geçmişi taranmaz)
+        activity_totals = UserActivityTotal.query.filter_by(username=user.username).all()
+        code_totals = [total for total in activity_totals if total.activity_type.startswith('code')]
+        total_code_sessions = sum(total.activity_count for total in code_totals)
+        total_code_points = sum(total.points for total in code_totals)
         
         # Son 5 kodlama aktivitesi
         recent_code_activities = UserActivity.query.filter(
@@ -884,10 +1280,8 @@ def profile():
                 'points': activity.points_earned
             })
         
-        # Forum puanları - Sadece gerekli alanları çek
-        forum_activities = UserActivity.query.filter_by(username=user.username)\
-            .with_entities(UserActivity.points_earned).all()
-        total_forum_points = sum(activity.points_earned for activity in forum_activities)
+        # Forum puanları - tüm aktivite puanlarının toplamı
+        total_forum_points = sum(total.points for total in activity_totals)
         
         # Beceri seviyesi analizi
         skill_level = "Başlangıç"
@@ -930,52 +1324,27 @@ def profile():
         if has_cv:
             achievements.append({"name": "Hazırlıklı", "icon": "work", "description": "CV analizi tamamlandı"})
         
-        # Günlük aktivite (son 7 gün) - Tek seferde tüm aktiviteleri çek
-        from datetime import datetime, timedelta
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
+        # Günlük aktivite (?days=7/30/90/365) - gün ve türe göre veritabanında gruplanır (Türkiye saati)
+        days = request.args.get('days', 7, type=int)
+        if days not in HISTOGRAM_WINDOWS:
+            days = 7
+        daily_counts = activity_histogram.daily_counts(user.username, days)
+        today = activity_histogram.today()
         
-        # Son 7 günün tüm aktivitelerini tek query'de çek
-        daily_activities = UserActivity.query.filter(
-            UserActivity.username == user.username,
-            UserActivity.created_at >= seven_days_ago
-        ).with_entities(
-            UserActivity.activity_type, 
-            UserActivity.created_at
-        ).all()
+        # Türkçe gün isimleri
+        day_names = ['Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz']
         
         daily_activity = []
-        for i in range(7):
-            date = datetime.utcnow() - timedelta(days=i)
-            date_str = date.strftime('%Y-%m-%d')
-            date_start = date.replace(hour=0, minute=0, second=0)
-            date_end = date.replace(hour=23, minute=59, second=59)
-            
-            # O günkü aktiviteleri filtrele
-            day_activities = [
-                act for act in daily_activities 
-                if date_start <= act.created_at <= date_end
-            ]
-            
-            daily_tests = sum(1 for act in day_activities if act.activity_type == 'test_completed')
-            daily_forum = sum(1 for act in day_activities if act.activity_type in ['forum_post', 'forum_comment'])
-            daily_code = sum(1 for act in day_activities if act.activity_type == 'code_session')
-            
-            # Türkçe gün isimleri
-            day_names = {
-                'Mon': 'Pzt',
-                'Tue': 'Sal',
-                'Wed': 'Çar',
-                'Thu': 'Per',
-                'Fri': 'Cum',
-                'Sat': 'Cmt',
-                'Sun': 'Paz'
-            }
-            
-            day_name = day_names.get(date.strftime('%A')[:3], date.strftime('%A')[:3])
+        for i in range(days):
+            date = today - timedelta(days=i)
+            day_counts = daily_counts.get(date, {})
+            daily_tests = day_counts.get('test_completed', 0)
+            daily_forum = day_counts.get('forum_post', 0) + day_counts.get('forum_comment', 0)
+            daily_code = day_counts.get('code_session', 0)
             
             daily_activity.append({
-                'date': date_str,
-                'day_name': day_name,
+                'date': date.strftime('%Y-%m-%d'),
+                'day_name': day_names[date.weekday()],
                 'tests': daily_tests,
                 'forum_activity': daily_forum,
                 'code_activity': daily_code,
@@ -999,11 +1368,12 @@ def profile():
                 'has_cv': has_cv,
                 'test_trend': test_trend,
                 'achievements': achievements,
-                'daily_activity': daily_activity
+                'daily_activity': daily_activity,
+                'daily_activity_days': days
             }
         })
-    except Exception as e:
-        print(f"ERROR in profile endpoint: {str(e)}")
+    except Exception:
+        logger.exception("Profile endpoint error")
         # Veritabanı hatası durumunda session'ı temizleme, sadece hata döndür
         return jsonify({'error': 'Sunucu hatası. Lütfen daha sonra tekrar deneyin.'}), 500
 
@@ -1012,7 +1382,6 @@ def test_page():
     """Test sayfası için basit endpoint"""
     return jsonify({
         'message': 'Test sayfası erişilebilir',
-        'session_data': dict(session),
         'has_username': 'username' in session,
         'has_user_id': 'user_id' in session
     })
@@ -1022,7 +1391,6 @@ def code_page():
     """Kodlama odası sayfası için basit endpoint"""
     return jsonify({
         'message': 'Kodlama odası erişilebilir',
-        'session_data': dict(session),
         'has_username': 'username' in session,
         'has_user_id': 'user_id' in session
     })
@@ -1032,7 +1400,6 @@ def auto_interview_page():
     """Otomatik mülakat odası sayfası için basit endpoint"""
     return jsonify({
         'message': 'Otomatik mülakat odası erişilebilir',
-        'session_data': dict(session),
         'has_username': 'username' in session,
         'has_user_id': 'user_id' in session
     })
@@ -1042,16 +1409,15 @@ def auto_interview_page():
 @app.route('/test_your_skill', methods=['POST'])
 @login_required
 def test_your_skill():
-    print(f"DEBUG: test_your_skill called by user: {session.get('username')}")
-    print(f"DEBUG: Session data: {dict(session)}")
+    logger.debug("test_your_skill called by user: %s", session.get('username'))
     
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
-        print(f"DEBUG: User not found in database: {session.get('username')}")
+        logger.debug("User not found in database: %s", session.get('username'))
         return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
     
     if not user.interest:
-        print(f"DEBUG: User has no interest: {session.get('username')}")
+        logger.debug("User has no interest: %s", session.get('username'))
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     data = request.json
@@ -1066,6 +1432,7 @@ def test_your_skill():
     
     try:
         agent = TestAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         
         # Benzersiz session ID oluştur
         session_id = f"test_{int(time.time())}_{user.username}_{hash(str(datetime.utcnow()))}"
@@ -1140,6 +1507,12 @@ def test_your_skill():
                 session_id=session_id
             )
         
+        # Havuz envanterini kontrol et - eksik bucket'lar arka planda doldurulur
+        try:
+            pool_replenisher.check_inventory(user.interest, get_user_api_key())
+        except Exception as e:
+            print(f"Question pool inventory check error: {e}")
+        
         # Test sessionu oluştur
         test_session_id = f"test_{int(time.time())}_{user.username}"
         
@@ -1166,7 +1539,7 @@ def test_your_skill():
         db.session.add(test_session)
         db.session.commit()
         
-        print(f"Test session created and saved to DB: {test_session_id}")
+        logger.info("Test session created: %s", test_session_id)
         
         # Sorulardan doğru cevapları çıkar (frontend'e gönderme)
         questions_for_frontend = []
@@ -1204,9 +1577,19 @@ def upload_cv():
             cv_data = file.read()
             mime_type = get_file_mimetype(file.filename)
             
+            # async=true ise analizi iş kuyruğuna bırak, sonucu /jobs/<id> ile sorgula
+            if request.form.get('async') in ('1', 'true'):
+                job_id = job_queue.submit('analyze_cv', {
+                    'username': session['username'],
+                    'cv_data': base64.b64encode(cv_data).decode(),
+                    'mime_type': mime_type
+                }, username=session['username'], api_key=get_user_api_key())
+                return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}), 202
+            
             # CV'yi analiz et
-            user = User.query.filter_by(username=session['username']).first()
+            user = current_user()
             agent = InterviewAIAgent(user.interest, get_user_api_key())
+            release_db_connection()
             cv_analysis = agent.analyze_cv(cv_data, mime_type)
             
             # Analizi veritabanına kaydet
@@ -1226,12 +1609,13 @@ def upload_cv():
 @app.route('/interview_cv_based_question', methods=['POST'])
 @login_required
 def interview_cv_based_question():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.cv_analysis:
         return jsonify({'error': 'Önce CV yüklemelisiniz.'}), 400
     
     try:
         agent = InterviewAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         question = agent.generate_cv_based_question(user.cv_analysis)
         
         return jsonify({
@@ -1246,7 +1630,7 @@ def interview_cv_based_question():
 @app.route('/interview_personalized_questions', methods=['POST'])
 @login_required
 def interview_personalized_questions():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.cv_analysis:
         return jsonify({'error': 'Önce CV yüklemelisiniz.'}), 400
     
@@ -1255,6 +1639,7 @@ def interview_personalized_questions():
     
     try:
         agent = InterviewAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         questions = agent.generate_personalized_questions(user.cv_analysis, difficulty)
         
         return jsonify({
@@ -1269,7 +1654,7 @@ def interview_personalized_questions():
 @app.route('/interview_speech_question', methods=['POST'])
 @login_required
 def interview_speech_question():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1278,6 +1663,7 @@ def interview_speech_question():
     
     try:
         agent = InterviewAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         result = agent.generate_dynamic_speech_question(voice_name=voice_name)
         
         if result.get('audio_file'):
@@ -1309,7 +1695,7 @@ def interview_speech_question():
 @app.route('/interview_cv_speech_question', methods=['POST'])
 @login_required
 def interview_cv_speech_question():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.cv_analysis:
         return jsonify({'error': 'Önce CV yüklemelisiniz.'}), 400
     
@@ -1318,6 +1704,7 @@ def interview_cv_speech_question():
     
     try:
         agent = InterviewAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         result = agent.generate_cv_based_speech_question(user.cv_analysis, voice_name)
         
         if result.get('audio_file'):
@@ -1347,7 +1734,7 @@ def interview_cv_speech_question():
 @app.route('/interview_speech_evaluation', methods=['POST'])
 @login_required
 def interview_speech_evaluation():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1373,6 +1760,7 @@ def interview_speech_evaluation():
             cv_context = user.cv_analysis if user.cv_analysis else None
             
             # Ses dosyasını transcript et ve değerlendir
+            release_db_connection()
             result = agent.evaluate_speech_answer(question, temp_audio_path, additional_text, cv_context, voice_name)
             
             # Geçici dosyayı sil
@@ -1404,7 +1792,7 @@ def interview_speech_evaluation():
                 })
                 
         except Exception as e:
-            print(f"Speech evaluation error: {e}")
+            logger.exception("Speech evaluation error")
             # Geçici dosyayı sil
             if os.path.exists(temp_audio_path):
                 os.unlink(temp_audio_path)
@@ -1424,6 +1812,7 @@ def interview_speech_evaluation():
             agent = InterviewAIAgent(user.interest, get_user_api_key())
             cv_context = user.cv_analysis if user.cv_analysis else None
             
+            release_db_connection()
             result = agent.generate_speech_feedback(question, user_answer, cv_context, voice_name)
             
             if result.get('audio_file'):
@@ -1450,17 +1839,18 @@ def interview_speech_evaluation():
                 })
                 
         except Exception as e:
-            print(f"Text evaluation error: {e}")
+            logger.exception("Text evaluation error")
             return jsonify({'error': f'Sesli değerlendirme hatası: {str(e)}'}), 500
 
 @app.route('/interview_simulation', methods=['POST'])
 @login_required
 def interview_simulation():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     try:
         agent = InterviewAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         question = agent.generate_question()
     except Exception as e:
         return jsonify({'error': f'Gemini API hatası: {str(e)}'}), 500
@@ -1472,16 +1862,15 @@ def interview_simulation():
 @app.route('/code_room', methods=['POST'])
 @login_required
 def code_room():
-    print(f"DEBUG: code_room called by user: {session.get('username')}")
-    print(f"DEBUG: Session data: {dict(session)}")
+    logger.debug("code_room called by user: %s", session.get('username'))
     
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
-        print(f"DEBUG: User not found in database: {session.get('username')}")
+        logger.debug("User not found in database: %s", session.get('username'))
         return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
     
     if not user.interest:
-        print(f"DEBUG: User has no interest: {session.get('username')}")
+        logger.debug("User has no interest: %s", session.get('username'))
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     data = request.json
@@ -1490,6 +1879,7 @@ def code_room():
     
     try:
         agent = CodeAIAgent(user.interest, language, get_user_api_key())
+        release_db_connection()
         coding_question = agent.generate_coding_question(difficulty)
         
         # Kodlama aktivitesi kaydet
@@ -1511,15 +1901,15 @@ def code_room():
 @app.route('/code_room/generate_solution', methods=['POST'])
 @login_required
 def code_room_generate_solution():
-    print(f"DEBUG: code_room_generate_solution called by user: {session.get('username')}")
+    logger.debug("code_room_generate_solution called by user: %s", session.get('username'))
     
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
-        print(f"DEBUG: User not found in database: {session.get('username')}")
+        logger.debug("User not found in database: %s", session.get('username'))
         return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
     
     if not user.interest:
-        print(f"DEBUG: User has no interest: {session.get('username')}")
+        logger.debug("User has no interest: %s", session.get('username'))
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     data = request.json
@@ -1531,6 +1921,7 @@ def code_room_generate_solution():
     
     try:
         agent = CodeAIAgent(user.interest, language, get_user_api_key())
+        release_db_connection()
         solution = agent.generate_solution(question)
         return jsonify({
             'success': True,
@@ -1539,13 +1930,45 @@ def code_room_generate_solution():
     except Exception as e:
         return jsonify({'error': f'Çözüm oluşturma hatası: {str(e)}'}), 500
 
+@app.route('/code_room/generate_solution/stream', methods=['POST'])
+@login_required
+def code_room_generate_solution_stream():
+    """Çözümü SSE ile parça parça gönderir; son olay ayrıştırılmış çözümdür"""
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
+    
+    if not user.interest:
+        return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
+    
+    data = request.json
+    question = data.get('question')
+    language = data.get('language', 'python')
+    
+    if not question:
+        return jsonify({'error': 'Soru gerekli.'}), 400
+    
+    try:
+        agent = CodeAIAgent(user.interest, language, get_user_api_key())
+    except Exception as e:
+        return jsonify({'error': f'Çözüm oluşturma hatası: {str(e)}'}), 500
+    
+    def events():
+        for event, payload in agent.stream_solution(question):
+            if event == 'chunk':
+                yield 'chunk', {'text': payload}
+            else:
+                yield 'done', {'success': True, 'solution': payload}
+    
+    return sse_response(events(), 'Çözüm oluşturma hatası')
+
 
 
 # Test çözümü kaydı
 @app.route('/test_your_skill/evaluate', methods=['POST'])
 @login_required
 def test_your_skill_evaluate():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1564,7 +1987,7 @@ def test_your_skill_evaluate():
     ).first()
     
     if not test_session:
-        print(f"Test session not found in DB: {test_session_id}")
+        logger.info("Test session not found: %s", test_session_id)
         return jsonify({'error': 'Geçersiz test session.'}), 400
     
     # Session süre aşımı kontrolü
@@ -1580,6 +2003,7 @@ def test_your_skill_evaluate():
     
     # Test değerlendirmesi
     agent = TestAIAgent(user.interest, get_user_api_key())
+    release_db_connection()
     evaluation_result = agent.evaluate_answers(user_answers, questions, time_taken)
     
     # Summary'yi al
@@ -1619,7 +2043,7 @@ def test_your_skill_evaluate():
     test_session.status = 'completed'
     db.session.commit()
     
-    print(f"Test session completed: {test_session_id}")
+    logger.info("Test session completed: %s", test_session_id)
     
     return jsonify({
         'evaluation': evaluation_result,
@@ -1637,7 +2061,7 @@ def test_your_skill_evaluate():
 @login_required
 def code_room_evaluate():
     """Kodu değerlendirir ve puan verir"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1652,6 +2076,7 @@ def code_room_evaluate():
     
     try:
         agent = CodeAIAgent(user.interest, language, get_user_api_key())
+        release_db_connection()
         
         if use_execution:
             # Çalıştırarak değerlendir
@@ -1683,13 +2108,62 @@ def code_room_evaluate():
     except Exception as e:
         return jsonify({'error': f'Değerlendirme hatası: {str(e)}'}), 500
 
+@app.route('/code_room/evaluate/stream', methods=['POST'])
+@login_required
+def code_room_evaluate_stream():
+    """Kod değerlendirmesini (çalıştırmadan) SSE ile parça parça gönderir"""
+    user = current_user()
+    if not user.interest:
+        return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
+    
+    data = request.json
+    question = data.get('question', '')
+    user_code = data.get('user_code')
+    language = data.get('language', 'python')
+    
+    if not user_code:
+        return jsonify({'error': 'Kod gerekli.'}), 400
+    
+    try:
+        agent = CodeAIAgent(user.interest, language, get_user_api_key())
+    except Exception as e:
+        return jsonify({'error': f'Değerlendirme hatası: {str(e)}'}), 500
+    
+    username = user.username
+    
+    def events():
+        for event, payload in agent.stream_evaluate_code(user_code, question):
+            if event == 'chunk':
+                yield 'chunk', {'text': payload}
+                continue
+            
+            # Kodlama değerlendirme aktivitesi kaydet
+            db.session.add(UserActivity(
+                username=username,
+                activity_type='code_evaluation',
+                points_earned=15
+            ))
+            db.session.commit()
+            
+            yield 'done', {
+                "evaluation": payload,
+                "execution_output": "",
+                "code_suggestions": "",
+                "has_errors": False,
+                "corrected_code": "",
+                "score": 0,
+                "feedback": payload
+            }
+    
+    return sse_response(events(), 'Değerlendirme hatası')
+
 
 
 @app.route('/code_room/run', methods=['POST'])
 @login_required
 def code_room_run():
     """Sadece kodu çalıştırır, değerlendirmez"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1702,6 +2176,7 @@ def code_room_run():
     
     try:
         agent = CodeAIAgent(user.interest, language, get_user_api_key())
+        release_db_connection()
         result = agent.run_code(user_code)
         return jsonify({
             'success': True,
@@ -1714,7 +2189,7 @@ def code_room_run():
 @login_required
 def code_room_run_simple():
     """Basit kod çalıştırma - sadece çalıştırır, analiz yapmaz"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1740,6 +2215,7 @@ def code_room_run_simple():
         """
         
         # execute_complex_code metodunu kullan ama sadece çalıştırma
+        release_db_connection()
         result = agent.execute_complex_code(simple_prompt, language)
         
         # Sadece çalıştırma sonucunu döndür
@@ -1768,7 +2244,7 @@ def code_room_run_simple():
 @login_required
 def code_room_suggest_resources():
     """Konuya göre kaynak önerileri"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1782,6 +2258,7 @@ def code_room_suggest_resources():
     
     try:
         agent = CodeAIAgent(user.interest, language, get_user_api_key())
+        release_db_connection()
         resources = agent.suggest_resources(topic, num_resources)
         return jsonify({
             'success': True,
@@ -1842,7 +2319,7 @@ def code_room_format_code():
 @app.route('/interview_simulation/evaluate', methods=['POST'])
 @login_required
 def interview_simulation_evaluate():
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -1859,6 +2336,7 @@ def interview_simulation_evaluate():
     
     try:
         agent = InterviewAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         
         # CV analizi varsa, CV bağlamında değerlendirme yap
         if user.cv_analysis:
@@ -1877,6 +2355,47 @@ def interview_simulation_evaluate():
         'has_cv_context': bool(user.cv_analysis)
     })
 
+@app.route('/interview_simulation/evaluate/stream', methods=['POST'])
+@login_required
+def interview_simulation_evaluate_stream():
+    """Cevap değerlendirmesini SSE ile parça parça gönderir"""
+    user = current_user()
+    if not user.interest:
+        return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
+    
+    data = request.json
+    question = data.get('question')
+    user_answer = data.get('user_answer')
+    if not question or not user_answer:
+        return jsonify({'error': 'Soru ve cevap gerekli.'}), 400
+    
+    # API key kontrolü
+    api_key_check = check_api_key_required()
+    if api_key_check:
+        return api_key_check
+    
+    try:
+        agent = InterviewAIAgent(user.interest, get_user_api_key())
+    except Exception as e:
+        return jsonify({'error': f'Gemini API hatası: {str(e)}'}), 500
+    
+    cv_analysis = user.cv_analysis
+    
+    def events():
+        # CV analizi varsa, CV bağlamında değerlendirme yap
+        if cv_analysis:
+            stream = agent.stream_evaluate_cv_answer(question, user_answer, cv_analysis)
+        else:
+            stream = agent.stream_evaluate_answer(question, user_answer)
+        
+        for event, payload in stream:
+            if event == 'chunk':
+                yield 'chunk', {'text': payload}
+            else:
+                yield 'done', {'evaluation': payload, 'has_cv_context': bool(cv_analysis)}
+    
+    return sse_response(events(), 'Gemini API hatası')
+
 @app.route('/change_password', methods=['POST'])
 @login_required
 def change_password():
@@ -1889,7 +2408,7 @@ def change_password():
     if len(new_password) < 6:
         return jsonify({'error': 'Yeni şifre en az 6 karakter olmalıdır.'}), 400
     
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
         return jsonify({'error': 'Kullanıcı bulunamadı.'}), 404
     
@@ -1918,7 +2437,6 @@ def home():
 @app.route('/test-session')
 def test_session():
     return jsonify({
-        'session': dict(session),
         'has_username': 'username' in session,
         'username': session.get('username', None)
     })
@@ -1929,20 +2447,51 @@ def test_session():
 
 # ==================== OTOMATİK MÜLAKAT SİSTEMİ ====================
 
+# Otomatik mülakat: sonraki soru (metin + TTS) kullanıcı cevap verirken arka planda hazırlanır
+AUTO_INTERVIEW_TOTAL_QUESTIONS = 5
+AUTO_INTERVIEW_PREFETCH = os.getenv('AUTO_INTERVIEW_PREFETCH', 'true').lower() == 'true'
+AUTO_INTERVIEW_PREFETCH_WAIT = float(os.getenv('AUTO_INTERVIEW_PREFETCH_WAIT', 30))
+question_prefetcher = QuestionPrefetcher(max_workers=int(os.getenv('AUTO_INTERVIEW_PREFETCH_WORKERS', 4)))
+
+def prefetch_next_auto_interview_question(auto_session, questions, answers, voice_name):
+    """Son sorunun cevabı beklenirken bir sonraki sesli soruyu üretmeye başla"""
+    if not AUTO_INTERVIEW_PREFETCH or len(questions) >= AUTO_INTERVIEW_TOTAL_QUESTIONS:
+        return
+    interest = auto_session.interest
+    api_key = get_user_api_key()
+    # Cevabı henüz bilinmeyen soru tekrar sorulmasın diye bağlama eklenir
+    context = f"{auto_session.conversation_context or ''}\nŞu an cevaplanan soru (bunu tekrar sorma, farklı bir konuya geç): {questions[-1]}"
+    previous_questions, user_answers = list(questions), list(answers)
+    
+    def generate():
+        agent = InterviewAIAgent(interest, api_key)
+        return agent.generate_dynamic_speech_question(previous_questions, user_answers, context, voice_name)
+    
+    question_prefetcher.start(auto_session.session_id, len(questions), generate)
+
+def publish_auto_interview_audio(result):
+    """Üretilen geçici ses dosyasını static klasörüne taşı ve URL'ini döndür"""
+    if not result.get('audio_file'):
+        return None
+    audio_filename = f"auto_interview_{session['username']}_{int(time.time() * 1000)}.wav"
+    audio_path = os.path.join(app.static_folder, 'audio', audio_filename)
+    os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+    shutil.move(result['audio_file'], audio_path)
+    return f'/static/audio/{audio_filename}'
+
 @app.route('/auto_interview/start', methods=['POST'])
 @login_required
 def start_auto_interview():
     """Otomatik mülakat başlatır"""
-    print(f"DEBUG: start_auto_interview called by user: {session.get('username')}")
-    print(f"DEBUG: Session data: {dict(session)}")
+    logger.debug("start_auto_interview called by user: %s", session.get('username'))
     
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
-        print(f"DEBUG: User not found in database: {session.get('username')}")
+        logger.debug("User not found in database: %s", session.get('username'))
         return jsonify({'error': 'Kullanıcı bulunamadı. Lütfen tekrar giriş yapın.'}), 401
     
     if not user.interest:
-        print(f"DEBUG: User has no interest: {session.get('username')}")
+        logger.debug("User has no interest: %s", session.get('username'))
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     try:
@@ -1967,6 +2516,7 @@ def start_auto_interview():
         
         # İlk sesli soruyu üret
         voice_name = data.get('voice_name', 'Kore')
+        release_db_connection()
         result = agent.generate_dynamic_speech_question(
             previous_questions=None, 
             user_answers=None, 
@@ -1975,18 +2525,9 @@ def start_auto_interview():
         )
         
         first_question = result['question_text']
-        audio_url = None
         
-        if result.get('audio_file'):
-            # Ses dosyasını static klasörüne taşı
-            audio_filename = f"auto_interview_{session['username']}_{int(time.time())}.wav"
-            audio_path = os.path.join(app.static_folder, 'audio', audio_filename)
-            os.makedirs(os.path.dirname(audio_path), exist_ok=True)
-            
-            # Dosyayı kopyala
-            import shutil
-            shutil.move(result['audio_file'], audio_path)
-            audio_url = f'/static/audio/{audio_filename}'
+        # Ses dosyasını static klasörüne taşı
+        audio_url = publish_auto_interview_audio(result)
         
         auto_session = AutoInterviewSession(
             session_id=session_id,
@@ -2000,12 +2541,14 @@ def start_auto_interview():
         db.session.add(auto_session)
         db.session.commit()
         
+        prefetch_next_auto_interview_question(auto_session, [first_question], [], voice_name)
+        
         return jsonify({
             'status': 'success',
             'session_id': session_id,
             'question': first_question,
             'question_index': 0,  # İlk soru, henüz cevap yok
-            'total_questions': 5,  # Toplam soru sayısı
+            'total_questions': AUTO_INTERVIEW_TOTAL_QUESTIONS,  # Toplam soru sayısı
             'audio_url': audio_url
         })
         
@@ -2016,7 +2559,7 @@ def start_auto_interview():
 @login_required
 def submit_auto_interview_answer():
     """Otomatik mülakat cevabını gönder ve sonraki soruyu al"""
-    print(f"DEBUG: submit_auto_interview_answer called by user: {session.get('username')}")
+    logger.debug("submit_auto_interview_answer called by user: %s", session.get('username'))
     # Hem JSON hem de form data formatını destekle
     if request.is_json:
         data = request.json
@@ -2056,6 +2599,7 @@ def submit_auto_interview_answer():
             
             # Ses dosyasını transcript et
             agent = InterviewAIAgent(auto_session.interest, get_user_api_key())
+            release_db_connection()
             transcribed_text = agent._transcribe_audio(temp_audio_path)
             
             # Geçici dosyayı sil
@@ -2064,7 +2608,7 @@ def submit_auto_interview_answer():
             # Transcript edilen metni cevap olarak kullan
             answer = transcribed_text
         except Exception as e:
-            print(f"Audio transcription error: {e}")
+            logger.exception("Audio transcription error")
             return jsonify({'error': f'Ses dosyası işlenemedi: {str(e)}'}), 500
     
     if not answer:
@@ -2082,6 +2626,9 @@ def submit_auto_interview_answer():
             if not auto_session:
                 return jsonify({'error': 'Geçersiz mülakat oturumu.'}), 400
         
+        # Model çağrılarından önce bağlantıyı bırak; cevap ve yeni soru sonda birlikte commit edilir
+        release_db_connection()
+        
         # Cevabı kaydet
         questions = json.loads(auto_session.questions) if auto_session.questions else []
         answers = json.loads(auto_session.answers) if auto_session.answers else []
@@ -2090,7 +2637,9 @@ def submit_auto_interview_answer():
         auto_session.answers = json.dumps(answers)
         
         # 5 cevap tamamlandı mı kontrol et (5 soru, 5 cevap)
-        if len(answers) >= 5:
+        if len(answers) >= AUTO_INTERVIEW_TOTAL_QUESTIONS:
+            question_prefetcher.discard(session_id)
+            
             # Final değerlendirme üret
             agent = InterviewAIAgent(auto_session.interest, get_user_api_key())
             final_evaluation = agent.generate_final_evaluation(
@@ -2117,46 +2666,40 @@ def submit_auto_interview_answer():
         # Sonraki soru için index'i güncelle (cevaplanan soru sayısı)
         auto_session.current_question_index = len(answers)
         
-        # Sonraki sesli soruyu üret
-        agent = InterviewAIAgent(auto_session.interest, get_user_api_key())
-        
-        # Dinamik sesli soru üret ve ses dosyası oluştur
-        result = agent.generate_dynamic_speech_question(questions, answers, auto_session.conversation_context, voice_name)
+        # Cevap kaydedilirken arka planda hazırlanan soru varsa onu kullan
+        result = question_prefetcher.take(session_id, len(questions), AUTO_INTERVIEW_PREFETCH_WAIT)
+        if result is None:
+            # Dinamik sesli soru üret ve ses dosyası oluştur
+            agent = InterviewAIAgent(auto_session.interest, get_user_api_key())
+            result = agent.generate_dynamic_speech_question(questions, answers, auto_session.conversation_context, voice_name)
         next_question = result['question_text']
-        audio_url = None
         
-        if result.get('audio_file'):
-            # Ses dosyasını static klasörüne taşı
-            audio_filename = f"auto_interview_{session['username']}_{int(time.time())}.wav"
-            audio_path = os.path.join(app.static_folder, 'audio', audio_filename)
-            os.makedirs(os.path.dirname(audio_path), exist_ok=True)
-            
-            # Dosyayı kopyala
-            import shutil
-            shutil.move(result['audio_file'], audio_path)
-            audio_url = f'/static/audio/{audio_filename}'
+        # Ses dosyasını static klasörüne taşı
+        audio_url = publish_auto_interview_audio(result)
         
         questions.append(next_question)
         auto_session.questions = json.dumps(questions)
         db.session.commit()
         
-        print(f"DEBUG: question_index={auto_session.current_question_index}, answers_count={len(answers)}, questions_count={len(questions)}")
+        prefetch_next_auto_interview_question(auto_session, questions, answers, voice_name)
+        
+        logger.debug("question_index=%s, answers_count=%s, questions_count=%s", auto_session.current_question_index, len(answers), len(questions))
         return jsonify({
             'status': 'continue',
             'question': next_question,
             'question_index': auto_session.current_question_index,  # Şu anki soru index'i
-            'total_questions': 5,
+            'total_questions': AUTO_INTERVIEW_TOTAL_QUESTIONS,
             'audio_url': audio_url
         })
         
     except Exception as e:
-        print(f"Auto interview submit answer error: {e}")
+        logger.exception("Auto interview submit answer error")
         return jsonify({'error': f'Cevap gönderme hatası: {str(e)}'}), 500
 
 @app.route('/auto_interview/complete', methods=['POST'])
 @login_required
 def complete_auto_interview():
-    print(f"DEBUG: complete_auto_interview called by user: {session.get('username')}")
+    logger.debug("complete_auto_interview called by user: %s", session.get('username'))
     """Mülakatı tamamlar ve final değerlendirme üretir"""
     data = request.json
     session_id = data.get('session_id')
@@ -2175,11 +2718,22 @@ def complete_auto_interview():
         if not interview_session:
             return jsonify({'error': 'Aktif mülakat oturumu bulunamadı.'}), 404
         
+        question_prefetcher.discard(session_id)
+        
+        # async=true ise final değerlendirmeyi iş kuyruğuna bırak, sonucu /jobs/<id> ile sorgula
+        if data.get('async'):
+            job_id = job_queue.submit('complete_auto_interview', {
+                'session_id': session_id,
+                'username': session['username']
+            }, username=session['username'], api_key=get_user_api_key())
+            return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}), 202
+        
         # Final değerlendirme üret
         questions = json.loads(interview_session.questions or '[]')
         answers = json.loads(interview_session.answers or '[]')
         
         agent = InterviewAIAgent(interview_session.interest, get_user_api_key())
+        release_db_connection()
         final_evaluation = agent.generate_final_evaluation(
             questions, 
             answers, 
@@ -2204,10 +2758,65 @@ def complete_auto_interview():
     except Exception as e:
         return jsonify({'error': f'Mülakat tamamlama hatası: {str(e)}'}), 500
 
+@app.route('/auto_interview/complete/stream', methods=['POST'])
+@login_required
+def complete_auto_interview_stream():
+    """Final değerlendirmeyi SSE ile parça parça gönderir ve mülakatı tamamlar"""
+    data = request.json
+    session_id = data.get('session_id')
+    
+    if not session_id:
+        return jsonify({'error': 'Session ID gerekli.'}), 400
+    
+    try:
+        interview_session = AutoInterviewSession.query.filter_by(
+            session_id=session_id,
+            username=session['username'],
+            status='active'
+        ).first()
+        
+        if not interview_session:
+            return jsonify({'error': 'Aktif mülakat oturumu bulunamadı.'}), 404
+        
+        question_prefetcher.discard(session_id)
+        
+        questions = json.loads(interview_session.questions or '[]')
+        answers = json.loads(interview_session.answers or '[]')
+        
+        agent = InterviewAIAgent(interview_session.interest, get_user_api_key())
+    except Exception as e:
+        return jsonify({'error': f'Mülakat tamamlama hatası: {str(e)}'}), 500
+    
+    def events():
+        stream = agent.stream_final_evaluation(
+            questions,
+            answers,
+            interview_session.conversation_context
+        )
+        for event, payload in stream:
+            if event == 'chunk':
+                yield 'chunk', {'text': payload}
+                continue
+            
+            # Session'ı tamamla
+            interview_session.status = 'completed'
+            interview_session.end_time = datetime.now()
+            interview_session.final_evaluation = payload
+            db.session.commit()
+            
+            yield 'done', {
+                'final_evaluation': payload,
+                'total_questions': len(questions),
+                'total_answers': len(answers),
+                'session_duration': (interview_session.end_time - interview_session.start_time).total_seconds()
+            }
+    
+    return sse_response(events(), 'Mülakat tamamlama hatası')
+
 @app.route('/auto_interview/status', methods=['GET'])
 @login_required
 def get_auto_interview_status():
-    print(f"DEBUG: get_auto_interview_status called by user: {session.get('username')}")
+    logger.debug("get_auto_interview_status called by user: %s", session.get('username'))
     """Aktif mülakat oturumunun durumunu döndürür"""
     try:
         interview_session = AutoInterviewSession.query.filter_by(
@@ -2238,7 +2847,7 @@ def get_auto_interview_status():
 @login_required
 def clear_auto_interview_sessions():
     """Aktif auto-interview session'larını temizler"""
-    print(f"DEBUG: clear_auto_interview_sessions called by user: {session.get('username')}")
+    logger.debug("clear_auto_interview_sessions called by user: %s", session.get('username'))
     try:
         # Kullanıcının aktif auto-interview session'larını bul
         active_sessions = AutoInterviewSession.query.filter_by(
@@ -2253,9 +2862,9 @@ def clear_auto_interview_sessions():
                 session_record.status = 'expired'
                 session_record.end_time = datetime.utcnow()
                 cleared_count += 1
-                print(f"DEBUG: Marked session {session_record.session_id} as expired")
+                logger.debug("Marked session %s as expired", session_record.session_id)
             except Exception as e:
-                print(f"ERROR: Failed to mark session {session_record.session_id} as expired: {e}")
+                logger.error("Failed to mark session %s as expired: %s", session_record.session_id, e)
         
         # Test session'larını da temizle (eğer varsa)
         test_sessions = TestSession.query.filter_by(
@@ -2267,14 +2876,14 @@ def clear_auto_interview_sessions():
             try:
                 test_session.status = 'expired'
                 cleared_count += 1
-                print(f"DEBUG: Marked test session {test_session.session_id} as expired")
+                logger.debug("Marked test session %s as expired", test_session.session_id)
             except Exception as e:
-                print(f"ERROR: Failed to mark test session {test_session.session_id} as expired: {e}")
+                logger.error("Failed to mark test session %s as expired: %s", test_session.session_id, e)
         
         # Değişiklikleri commit et
         db.session.commit()
         
-        print(f"DEBUG: Successfully cleared {cleared_count} active sessions for user {session['username']}")
+        logger.debug("Successfully cleared %s active sessions for user %s", cleared_count, session['username'])
         
         return jsonify({
             'message': f'{cleared_count} aktif oturum temizlendi',
@@ -2284,25 +2893,304 @@ def clear_auto_interview_sessions():
         
     except Exception as e:
         db.session.rollback()
-        print(f"ERROR: Failed to clear auto-interview sessions: {e}")
+        logger.error("Failed to clear auto-interview sessions: %s", e)
         return jsonify({'error': f'Oturum temizleme hatası: {str(e)}'}), 500
 
 # ==================== FORUM SİSTEMİ ====================
 
+def get_liked_post_ids(username, post_ids):
+    """Kullanıcının verilen gönderilerden beğendiklerinin id'leri - tek sorgu"""
+    if not post_ids:
+        return set()
+    rows = db.session.query(ForumLike.post_id).filter(
+        ForumLike.username == username,
+        ForumLike.post_id.in_(post_ids)
+    ).all()
+    return {row.post_id for row in rows}
+
+def get_admin_usernames(usernames):
+    """Verilen kullanıcılardan admin olanların kullanıcı adları - tek sorgu"""
+    if not usernames:
+        return set()
+    rows = db.session.query(User.username).filter(
+        User.username.in_(set(usernames)),
+        User.is_admin == True
+    ).all()
+    return {row.username for row in rows}
+
+MAX_POST_TAGS = 10
+
+def normalize_tag_names(tags):
+    """Etiket listesini temizle: boşlukları sadeleştir, küçük harf, tekrarları at"""
+    names = []
+    for tag in tags or []:
+        if not isinstance(tag, str):
+            continue
+        name = ' '.join(tag.split()).lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def get_or_create_tags(names):
+    """{etiket adı: ForumTag}; eksik etiketler oluşturulur (eş zamanlı oluşturmaya dayanıklı)"""
+    if not names:
+        return {}
+    tags = {tag.name: tag for tag in ForumTag.query.filter(ForumTag.name.in_(names)).all()}
+    for name in names:
+        if name in tags:
+            continue
+        try:
+            with db.session.begin_nested():
+                tag = ForumTag(name=name, usage_count=0)
+                db.session.add(tag)
+            tags[name] = tag
+        except IntegrityError:
+            # Başka bir istek aynı etiketi az önce oluşturdu
+            tags[name] = ForumTag.query.filter_by(name=name).one()
+    return tags
+
+def attach_post_tags(post, names):
+    """Gönderiye etiketleri bağla ve kullanım sayılarını artır (commit çağırana ait)"""
+    tags = get_or_create_tags(names)
+    for tag in tags.values():
+        db.session.add(ForumPostTag(post_id=post.id, tag_id=tag.id))
+    if tags and not post.is_removed:
+        ForumTag.query.filter(ForumTag.id.in_([tag.id for tag in tags.values()])).update(
+            {ForumTag.usage_count: ForumTag.usage_count + 1}, synchronize_session=False
+        )
+
+def adjust_post_counters(post_id, delta):
+    """
+    Gönderi kaldırılınca (-1) / geri yüklenince (+1) kaldırılmamış gönderileri
+    sayan sayaçları güncelle: etiket kullanımları ve çözüm yazarlarının
+    liderlik tablosu çözüm sayıları
+    """
+    tag_ids = db.session.query(ForumPostTag.tag_id).filter(ForumPostTag.post_id == post_id)
+    ForumTag.query.filter(ForumTag.id.in_(tag_ids.scalar_subquery())).update(
+        {ForumTag.usage_count: ForumTag.usage_count + delta}, synchronize_session=False
+    )
+    solution_authors = db.session.query(
+        ForumComment.author_username, db.func.count(ForumComment.id)
+    ).filter(
+        ForumComment.post_id == post_id,
+        ForumComment.is_solution == True
+    ).group_by(ForumComment.author_username).all()
+    for username, count in solution_authors:
+        leaderboard.increment(db.session.connection(), username, solutions=delta * count)
+
+def posts_with_all_tags(names):
+    """Verilen etiketlerin hepsine sahip gönderi id'leri (index join ile alt sorgu)"""
+    return db.session.query(ForumPostTag.post_id)\
+        .join(ForumTag, ForumTag.id == ForumPostTag.tag_id)\
+        .filter(ForumTag.name.in_(names))\
+        .group_by(ForumPostTag.post_id)\
+        .having(db.func.count(ForumPostTag.tag_id) == len(names))
+
+def recount_tag_usage(conn):
+    """usage_count'ları ilişki tablosundan baştan hesapla (migration/onarım için)"""
+    post_tag, post, tag = ForumPostTag.__table__, ForumPost.__table__, ForumTag.__table__
+    counts = db.select(db.func.count()).select_from(post_tag.join(post, post.c.id == post_tag.c.post_id))\
+        .where(post_tag.c.tag_id == tag.c.id, post.c.is_removed == False)\
+        .scalar_subquery()
+    conn.execute(tag.update().values(usage_count=counts))
+
+FORUM_STATS_WINDOW_DAYS = 30
+
+def compute_forum_rollups(interests=None):
+    """
+    İlgi alanı başına forum istatistikleri; her metrik tek gruplu sorgu.
+    Admin gönderileri her ilgi alanında göründüğü için sayımlar
+    (interest, is_admin_post) gruplarında yapılır ve admin grubu her ilgi
+    alanının sonucuna eklenir.
+    """
+    since = datetime.utcnow() - timedelta(days=FORUM_STATS_WINDOW_DAYS)
+    is_admin = db.func.coalesce(ForumPost.is_admin_post, False)
+    filters = [ForumPost.is_removed == False]
+    if interests is not None:
+        filters.append(db.or_(ForumPost.interest.in_(interests), is_admin == True))
+    
+    def bucket(interest, admin_post):
+        return None if admin_post else interest
+    
+    totals = {}
+    def metrics(key):
+        return totals.setdefault(key, {
+            'total_posts': 0, 'recent_posts': 0, 'total_comments': 0, 'recent_comments': 0,
+            'solved_questions': 0, 'authors': {}, 'popular_posts': []
+        })
+    
+    post_rows = db.session.query(
+        ForumPost.interest, is_admin,
+        db.func.count(ForumPost.id),
+        db.func.sum(db.case((ForumPost.created_at >= since, 1), else_=0)),
+        db.func.sum(db.case((db.and_(ForumPost.post_type == 'question', ForumPost.is_solved == True), 1), else_=0))
+    ).filter(*filters).group_by(ForumPost.interest, is_admin).all()
+    for interest, admin_post, total, recent, solved in post_rows:
+        m = metrics(bucket(interest, admin_post))
+        m['total_posts'] += total
+        m['recent_posts'] += recent or 0
+        m['solved_questions'] += solved or 0
+    
+    comment_rows = db.session.query(
+        ForumPost.interest, is_admin,
+        db.func.count(ForumComment.id),
+        db.func.sum(db.case((ForumComment.created_at >= since, 1), else_=0))
+    ).join(ForumPost, ForumComment.post_id == ForumPost.id)\
+     .filter(*filters).group_by(ForumPost.interest, is_admin).all()
+    for interest, admin_post, total, recent in comment_rows:
+        m = metrics(bucket(interest, admin_post))
+        m['total_comments'] += total
+        m['recent_comments'] += recent or 0
+    
+    author_rows = db.session.query(
+        ForumPost.interest, is_admin, ForumPost.author_username, db.func.count(ForumPost.id)
+    ).filter(*filters, ForumPost.created_at >= since)\
+     .group_by(ForumPost.interest, is_admin, ForumPost.author_username).all()
+    for interest, admin_post, author, count in author_rows:
+        authors = metrics(bucket(interest, admin_post))['authors']
+        authors[author] = authors.get(author, 0) + count
+    
+    # Her grubun en popüler 5 gönderisi (window function ile tek sorgu)
+    ranked = db.session.query(
+        ForumPost.id, ForumPost.title, ForumPost.likes_count, ForumPost.views, ForumPost.comments_count,
+        ForumPost.interest, is_admin.label('admin_post'),
+        db.func.row_number().over(
+            partition_by=(ForumPost.interest, is_admin),
+            order_by=(ForumPost.likes_count.desc(), ForumPost.views.desc())
+        ).label('rank')
+    ).filter(*filters).subquery()
+    for row in db.session.query(ranked).filter(ranked.c.rank <= 5).all():
+        metrics(bucket(row.interest, row.admin_post))['popular_posts'].append({
+            'id': row.id,
+            'title': row.title,
+            'likes_count': row.likes_count,
+            'views': row.views,
+            'comments_count': row.comments_count
+        })
+    
+    if interests is None:
+        interests = {key for key in totals if key is not None}
+        interests.update(row.interest for row in ForumStatsRollup.query.with_entities(ForumStatsRollup.interest))
+    
+    admin = metrics(None)
+    results = {}
+    for interest in interests:
+        own = metrics(interest)
+        authors = dict(own['authors'])
+        for author, count in admin['authors'].items():
+            authors[author] = authors.get(author, 0) + count
+        popular = sorted(own['popular_posts'] + admin['popular_posts'],
+                         key=lambda post: (-(post['likes_count'] or 0), -(post['views'] or 0)))
+        results[interest] = {
+            'total_posts': own['total_posts'] + admin['total_posts'],
+            'recent_posts': own['recent_posts'] + admin['recent_posts'],
+            'total_comments': own['total_comments'] + admin['total_comments'],
+            'recent_comments': own['recent_comments'] + admin['recent_comments'],
+            'solved_questions': own['solved_questions'] + admin['solved_questions'],
+            'active_users': [
+                {'username': author, 'post_count': count}
+                for author, count in sorted(authors.items(), key=lambda item: (-item[1], item[0]))[:5]
+            ],
+            'popular_posts': popular[:5]
+        }
+    return results
+
+forum_stats = ForumStatsRollups(
+    app, db, ForumStatsRollup, compute_forum_rollups,
+    refresh_interval=int(os.getenv('FORUM_STATS_REFRESH_SECONDS', 60)),
+    max_staleness=int(os.getenv('FORUM_STATS_MAX_STALENESS', 300))
+)
+
+def load_comment_tree(post_id, username, page=1, per_page=None):
+    """
+    Gönderinin yorum ağacını yükler (sınırsız derinlik). per_page verilirse
+    ana yorumlar SQL'de sayfalanır ve yalnızca o sayfadaki ana yorumların alt
+    ağaçları recursive CTE ile tek sorguda getirilir. Kullanıcının beğenileri
+    tek sorguda yüklenir; ağaç özyineleme olmadan kurulur.
+    """
+    order = (ForumComment.created_at.asc(), ForumComment.id.asc())
+    top_query = ForumComment.query.filter(
+        ForumComment.post_id == post_id,
+        ForumComment.parent_comment_id.is_(None)
+    ).order_by(*order)
+    
+    if per_page:
+        page = max(page, 1)
+        total = top_query.order_by(None).count()
+        top_level = top_query.limit(per_page).offset((page - 1) * per_page).all()
+    else:
+        top_level = top_query.all()
+        total = len(top_level)
+    
+    replies = []
+    if top_level and per_page:
+        # Sadece bu sayfadaki ana yorumların alt ağaçları
+        subtree = db.select(ForumComment.id)\
+            .where(ForumComment.parent_comment_id.in_([comment.id for comment in top_level]))\
+            .cte('comment_subtree', recursive=True)
+        subtree = subtree.union_all(
+            db.select(ForumComment.id).where(ForumComment.parent_comment_id == subtree.c.id)
+        )
+        replies = ForumComment.query.filter(ForumComment.id.in_(db.select(subtree.c.id)))\
+            .order_by(*order).all()
+    elif top_level:
+        replies = ForumComment.query.filter(
+            ForumComment.post_id == post_id,
+            ForumComment.parent_comment_id.isnot(None)
+        ).order_by(*order).all()
+    
+    liked_ids = set()
+    visible_ids = [comment.id for comment in top_level] + [comment.id for comment in replies]
+    if visible_ids:
+        liked_ids = {
+            row.comment_id for row in db.session.query(ForumLike.comment_id).filter(
+                ForumLike.username == username,
+                ForumLike.comment_id.in_(visible_ids)
+            ).all()
+        }
+    
+    # Önce tüm düğümler, sonra her yanıt (tarih sırasıyla) üst yorumunun listesine eklenir
+    nodes = {}
+    for comment in top_level + replies:
+        nodes[comment.id] = {
+            'id': comment.id,
+            'content': comment.content,
+            'author': comment.author_username,
+            'parent_comment_id': comment.parent_comment_id,
+            'likes_count': comment.likes_count,
+            'user_liked': comment.id in liked_ids,
+            'is_solution': comment.is_solution,
+            'is_accepted': comment.is_accepted,
+            'replies': [],
+            'created_at': comment.created_at.strftime('%Y-%m-%d %H:%M')
+        }
+    for comment in replies:
+        parent = nodes.get(comment.parent_comment_id)
+        if parent is not None:
+            parent['replies'].append(nodes[comment.id])
+    
+    pagination = {
+        'page': page if per_page else 1,
+        'per_page': per_page or total,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page if per_page else 1
+    }
+    return [nodes[comment.id] for comment in top_level], pagination
+
 @app.route('/forum/posts', methods=['GET'])
 @login_required
 def get_forum_posts():
     """İlgi alanına göre forum gönderilerini getirir"""
     try:
-        user = User.query.filter_by(username=session['username']).first()
+        user = current_user()
         if not user:
-            print(f"WARNING: User not found in forum posts: {session['username']}")
+            logger.warning("User not found in forum posts: %s", session['username'])
             return jsonify({'error': 'Kullanıcı bulunamadı.'}), 404
         
         if not user.interest and not user.is_admin:
             return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
-    except Exception as e:
-        print(f"ERROR in forum posts endpoint: {str(e)}")
+    except Exception:
+        logger.exception("Forum posts endpoint error")
         return jsonify({'error': 'Sunucu hatası. Lütfen daha sonra tekrar deneyin.'}), 500
     
     # Query parametreleri
@@ -2310,8 +3198,8 @@ def get_forum_posts():
     per_page = request.args.get('per_page', 10, type=int)
     post_type = request.args.get('type', 'all')
     interest = request.args.get('interest', 'all')  # Admin için interest filter
-    sort_by = request.args.get('sort', 'latest')  # latest, popular, most_commented
-    search = request.args.get('search', '')
+    sort_by = request.args.get('sort', 'latest')  # latest, popular, most_commented, relevance
+    search = request.args.get('search', '').strip()
     
     # Base query - admin tüm gönderileri, normal kullanıcı kendi interest'ındakileri + admin postlarını görebilir
     if user.is_admin:
@@ -2334,18 +3222,25 @@ def get_forum_posts():
     if user.is_admin and interest != 'all':
         query = query.filter_by(interest=interest)
     
-    # Arama filtresi
+    # Arama filtresi - tam metin arama, kullanılamıyorsa ilike
+    search_score = None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            db.or_(
-                ForumPost.title.ilike(search_term),
-                ForumPost.content.ilike(search_term)
+        search_query, search_score = forum_search.apply(query, search)
+        if search_query is not None:
+            query = search_query
+        else:
+            search_term = f"%{search}%"
+            query = query.filter(
+                db.or_(
+                    ForumPost.title.ilike(search_term),
+                    ForumPost.content.ilike(search_term)
+                )
             )
-        )
     
     # Sıralama
-    if sort_by == 'popular':
+    if sort_by == 'relevance' and search_score is not None:
+        query = query.order_by(search_score.desc(), ForumPost.created_at.desc())
+    elif sort_by == 'popular':
         query = query.order_by(ForumPost.likes_count.desc(), ForumPost.views.desc())
     elif sort_by == 'most_commented':
         query = query.order_by(ForumPost.comments_count.desc())
@@ -2359,25 +3254,27 @@ def get_forum_posts():
         error_out=False
     )
     
+    # Beğeniler ve yazar admin bilgileri sayfa başına tek sorguda yüklenir
+    liked_post_ids = get_liked_post_ids(session['username'], [post.id for post in posts.items])
+    admin_authors = get_admin_usernames([post.author_username for post in posts.items])
+    snippets = forum_search.snippets([post.id for post in posts.items], search) if search_score is not None else {}
+    
     # Sonuçları formatla
     posts_data = []
     for post in posts.items:
         # Kullanıcının bu postu beğenip beğenmediğini kontrol et
-        user_liked = ForumLike.query.filter_by(
-            username=session['username'],
-            post_id=post.id
-        ).first() is not None
+        user_liked = post.id in liked_post_ids
         
         # Admin bilgilerini al
-        author_user = User.query.filter_by(username=post.author_username).first()
-        is_admin_post = post.is_admin_post or (author_user and author_user.is_admin)
+        author_is_admin = post.author_username in admin_authors
+        is_admin_post = post.is_admin_post or author_is_admin
         
         posts_data.append({
             'id': post.id,
             'title': post.title,
             'content': post.content[:200] + '...' if len(post.content) > 200 else post.content,
             'author': post.author_username,
-            'author_is_admin': author_user.is_admin if author_user else False,
+            'author_is_admin': author_is_admin,
             'is_admin_post': is_admin_post,
             'is_removed': post.is_removed,
             'interest': post.interest,
@@ -2390,6 +3287,7 @@ def get_forum_posts():
             'solved_by': post.solved_by,
             'solved_at': post.solved_at.strftime('%Y-%m-%d %H:%M') if post.solved_at else None,
             'user_liked': user_liked,
+            'snippet': snippets.get(post.id),
             'created_at': post.created_at.strftime('%Y-%m-%d %H:%M'),
             'updated_at': post.updated_at.strftime('%Y-%m-%d %H:%M')
         })
@@ -2410,7 +3308,7 @@ def get_forum_posts():
 @login_required
 def create_forum_post():
     """Yeni forum gönderisi oluşturur"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
         return jsonify({'error': 'Kullanıcı bulunamadı.'}), 404
     
@@ -2434,6 +3332,13 @@ def create_forum_post():
     if len(content) > 10000:
         return jsonify({'error': 'İçerik 10000 karakterden uzun olamaz.'}), 400
     
+    tags = normalize_tag_names(tags)
+    if len(tags) > MAX_POST_TAGS:
+        return jsonify({'error': f'En fazla {MAX_POST_TAGS} etiket eklenebilir.'}), 400
+    
+    if any(len(tag) > 50 for tag in tags):
+        return jsonify({'error': 'Etiketler 50 karakterden uzun olamaz.'}), 400
+    
     try:
         new_post = ForumPost(
             title=title,
@@ -2446,6 +3351,8 @@ def create_forum_post():
         )
         
         db.session.add(new_post)
+        db.session.flush()
+        attach_post_tags(new_post, tags)
         db.session.commit()
         
         # Forum post aktivitesi kaydet
@@ -2473,9 +3380,8 @@ def get_forum_post(post_id):
     """Tekil forum gönderisini getirir"""
     post = ForumPost.query.get_or_404(post_id)
     
-    # Görüntüleme sayısını artır
-    post.views += 1
-    db.session.commit()
+    # Görüntüleme sayısını artır (satır kilidi almadan, toplu yazılır)
+    pending_views = view_counter.increment(post.id)
     
     # Kullanıcının bu postu beğenip beğenmediğini kontrol et
     user_liked = ForumLike.query.filter_by(
@@ -2483,52 +3389,14 @@ def get_forum_post(post_id):
         post_id=post.id
     ).first() is not None
     
-    # Yorumları getir
-    comments = ForumComment.query.filter_by(
-        post_id=post.id,
-        parent_comment_id=None  # Sadece ana yorumlar
-    ).order_by(ForumComment.created_at.asc()).all()
-    
-    comments_data = []
-    for comment in comments:
-        # Alt yorumları getir
-        replies = ForumComment.query.filter_by(
-            parent_comment_id=comment.id
-        ).order_by(ForumComment.created_at.asc()).all()
-        
-        # Kullanıcının bu yorumu beğenip beğenmediğini kontrol et
-        user_liked_comment = ForumLike.query.filter_by(
-            username=session['username'],
-            comment_id=comment.id
-        ).first() is not None
-        
-        replies_data = []
-        for reply in replies:
-            user_liked_reply = ForumLike.query.filter_by(
-                username=session['username'],
-                comment_id=reply.id
-            ).first() is not None
-            
-            replies_data.append({
-                'id': reply.id,
-                'content': reply.content,
-                'author': reply.author_username,
-                'likes_count': reply.likes_count,
-                'user_liked': user_liked_reply,
-                'created_at': reply.created_at.strftime('%Y-%m-%d %H:%M')
-            })
-        
-        comments_data.append({
-            'id': comment.id,
-            'content': comment.content,
-            'author': comment.author_username,
-            'likes_count': comment.likes_count,
-            'user_liked': user_liked_comment,
-            'is_solution': comment.is_solution,
-            'is_accepted': comment.is_accepted,
-            'replies': replies_data,
-            'created_at': comment.created_at.strftime('%Y-%m-%d %H:%M')
-        })
+    # Yorum ağacı (isteğe bağlı ana yorum sayfalaması ile)
+    comment_page = request.args.get('comment_page', 1, type=int)
+    comments_per_page = request.args.get('comments_per_page', type=int)
+    if comments_per_page is not None:
+        comments_per_page = min(max(comments_per_page, 1), 100)
+    comments_data, comments_pagination = load_comment_tree(
+        post.id, session['username'], comment_page, comments_per_page
+    )
     
     return jsonify({
         'post': {
@@ -2540,7 +3408,7 @@ def get_forum_post(post_id):
             'interest': post.interest,
             'post_type': post.post_type,
             'tags': json.loads(post.tags) if post.tags else [],
-            'views': post.views,
+            'views': post.views + pending_views,
             'likes_count': post.likes_count,
             'comments_count': post.comments_count,
             'is_solved': post.is_solved,
@@ -2550,7 +3418,8 @@ def get_forum_post(post_id):
             'created_at': post.created_at.strftime('%Y-%m-%d %H:%M'),
             'updated_at': post.updated_at.strftime('%Y-%m-%d %H:%M')
         },
-        'comments': comments_data
+        'comments': comments_data,
+        'comments_pagination': comments_pagination
     })
 
 
@@ -2562,7 +3431,7 @@ def delete_forum_post(post_id):
     post = ForumPost.query.get_or_404(post_id)
     
     # Sadece yazar veya admin silebilir
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
         return jsonify({'error': 'Kullanıcı bulunamadı.'}), 404
     
@@ -2571,6 +3440,8 @@ def delete_forum_post(post_id):
     
     try:
         # Soft delete - gönderiyi tamamen silme, sadece gizle
+        if not post.is_removed:
+            adjust_post_counters(post.id, -1)
         post.is_removed = True
         post.removed_by = session['username']
         post.removed_at = datetime.utcnow()
@@ -2591,6 +3462,11 @@ def permanent_delete_forum_post(post_id):
     post = ForumPost.query.get_or_404(post_id)
     
     try:
+        # Etiket ve çözüm sayaçlarını güncelle - yorumlar silinmeden önce (çözüm yazarları
+        # yorumlardan bulunur); kaldırılmış gönderi zaten sayılmıyor
+        if not post.is_removed:
+            adjust_post_counters(post_id, -1)
+        
         # İlişkili yorumları da sil
         ForumComment.query.filter_by(post_id=post_id).delete()
         
@@ -2600,9 +3476,19 @@ def permanent_delete_forum_post(post_id):
         # İlişkili notification'ları sil
         ForumNotification.query.filter_by(related_post_id=post_id).delete()
         
-        # İlişkili aktiviteleri sil
+        # İlişkili aktiviteleri sil (puanları liderlik tablosundan düş)
+        activity_points = db.session.query(
+            UserActivity.username, UserActivity.activity_type,
+            db.func.count(UserActivity.id), db.func.sum(UserActivity.points_earned)
+        ).filter_by(related_post_id=post_id).group_by(UserActivity.username, UserActivity.activity_type).all()
+        for username, activity_type, count, points in activity_points:
+            leaderboard.increment(db.session.connection(), username, points=-(points or 0))
+            adjust_activity_totals(db.session.connection(), username, activity_type, -count, -(points or 0))
         UserActivity.query.filter_by(related_post_id=post_id).delete()
         
+        # Etiket ilişkilerini sil
+        ForumPostTag.query.filter_by(post_id=post_id).delete()
+        
         # Gönderiyi tamamen sil
         db.session.delete(post)
         db.session.commit()
@@ -2670,8 +3556,8 @@ def create_forum_comment(post_id):
                     related_comment_id=new_comment.id
                 )
                 db.session.add(notification)
-            except Exception as e:
-                print(f"Comment notification error: {e}")
+            except Exception:
+                logger.exception("Comment notification error for post %s", post_id)
         
         db.session.commit()
         
@@ -2722,8 +3608,8 @@ def like_forum_post(post_id):
                         related_post_id=post_id
                     )
                     db.session.add(notification)
-                except Exception as e:
-                    print(f"Like notification error: {e}")
+                except Exception:
+                    logger.exception("Like notification error for post %s", post_id)
         
         db.session.commit()
         
@@ -2775,8 +3661,8 @@ def like_forum_comment(comment_id):
                         related_comment_id=comment_id
                     )
                     db.session.add(notification)
-                except Exception as e:
-                    print(f"Comment like notification error: {e}")
+                except Exception:
+                    logger.exception("Comment like notification error for comment %s", comment_id)
         
         db.session.commit()
         
@@ -2794,7 +3680,7 @@ def like_forum_comment(comment_id):
 @login_required
 def get_forum_stats():
     """Forum istatistiklerini getirir"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user:
         return jsonify({'error': 'Kullanıcı bulunamadı.'}), 404
     
@@ -2802,24 +3688,10 @@ def get_forum_stats():
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     try:
-        # Kullanıcının ilgi alanındaki istatistikler + admin postları (kaldırılmamış gönderiler)
-        total_posts = ForumPost.query.filter(
-            db.or_(
-                ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.is_removed == False
-        ).count()
-        
-        total_comments = ForumComment.query.join(ForumPost).filter(
-            db.or_(
-                ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.is_removed == False
-        ).count()
+        # İlgi alanı istatistikleri + admin postları (önceden hesaplanmış, en fazla FORUM_STATS_MAX_STALENESS sn eski)
+        stats, computed_at = forum_stats.get(user.interest)
         
-        # Kullanıcının kendi istatistikleri (kaldırılmamış gönderiler)
+        # Kullanıcının kendi istatistikleri (kaldırılmamış gönderiler) - index'li, canlı
         user_posts = ForumPost.query.filter_by(
             author_username=session['username'],
             interest=user.interest,
@@ -2832,33 +3704,14 @@ def get_forum_stats():
             ForumPost.is_removed == False
         ).count()
         
-        # En popüler gönderiler + admin postları (kaldırılmamış gönderiler)
-        popular_posts = ForumPost.query.filter(
-            db.or_(
-                ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.is_removed == False
-        ).order_by(ForumPost.likes_count.desc(), ForumPost.views.desc())\
-            .limit(5).all()
-        
-        popular_posts_data = []
-        for post in popular_posts:
-            popular_posts_data.append({
-                'id': post.id,
-                'title': post.title,
-                'likes_count': post.likes_count,
-                'views': post.views,
-                'comments_count': post.comments_count
-            })
-        
         return jsonify({
             'interest': user.interest,
-            'total_posts': total_posts,
-            'total_comments': total_comments,
+            'total_posts': stats.get('total_posts', 0),
+            'total_comments': stats.get('total_comments', 0),
             'user_posts': user_posts,
             'user_comments': user_comments,
-            'popular_posts': popular_posts_data
+            'popular_posts': stats.get('popular_posts', []),
+            'stats_updated_at': computed_at.strftime('%Y-%m-%d %H:%M:%S')
         })
         
     except Exception as e:
@@ -2989,7 +3842,8 @@ def get_user_badges(username):
 def get_popular_tags():
     """Popüler etiketleri getirir"""
     try:
-        tags = ForumTag.query.order_by(ForumTag.usage_count.desc()).limit(20).all()
+        tags = ForumTag.query.filter(ForumTag.usage_count > 0)\
+            .order_by(ForumTag.usage_count.desc()).limit(20).all()
         
         tags_data = []
         for tag in tags:
@@ -3026,9 +3880,16 @@ def mark_post_solved(post_id):
             if not comment:
                 return jsonify({'error': 'Yorum bulunamadı.'}), 404
             
+            if comment.post_id != post.id:
+                return jsonify({'error': 'Yorum bu gönderiye ait değil.'}), 400
+            
             # Güvenlik: Gönderi sahibi kendi yorumunu çözüm olarak işaretleyemez
             if post.author_username == session['username'] and comment.author_username == session['username']:
                 return jsonify({'error': 'Kendi yorumunuzu çözüm olarak işaretleyemezsiniz.'}), 400
+            
+            # Yeni kabul edilen çözüm liderlik tablosuna aynı transaction'da yansır
+            if not comment.is_solution and not post.is_removed:
+                leaderboard.increment(db.session.connection(), comment.author_username, solutions=1)
 
             # Post'u çözüldü olarak işaretle (solved_by sunucuda, yorumun yazarından alınır)
             post.is_solved = True
@@ -3056,9 +3917,9 @@ def mark_post_solved(post_id):
                 )
                 db.session.add(notification)
                 db.session.commit()
-                print(f"Notification sent to {solved_by} for solution acceptance")
-            except Exception as e:
-                print(f"Notification error: {e}")
+                logger.info("Solution accepted notification sent to %s for post %s", post.solved_by, post_id)
+            except Exception:
+                logger.exception("Solution accepted notification error for post %s", post_id)
                 db.session.rollback()
         
         return jsonify({'message': 'Gönderi çözüldü olarak işaretlendi.'})
@@ -3118,39 +3979,28 @@ def get_user_activity(username):
 @app.route('/forum/leaderboard', methods=['GET'])
 @login_required
 def get_leaderboard():
-    """Liderlik tablosunu getirir - En iyi çözüm seçilen 3 kullanıcı"""
+    """
+    Liderlik tablosu - en çok çözümü kabul edilen kullanıcılar (eşitlikte puan).
+    limit: ilk N (varsayılan 3), interest: 'all' (varsayılan), 'mine' veya ilgi alanı
+    """
     try:
-        # En iyi çözüm seçilen kullanıcıları hesapla (kaldırılmamış gönderiler)
-        solution_leaders = db.session.query(
-            ForumComment.author_username,
-            db.func.count(ForumComment.id).label('solution_count')
-        ).join(ForumPost).filter(
-            ForumComment.is_solution == True,
-            ForumPost.is_removed == False
-        ).group_by(
-            ForumComment.author_username
-        ).order_by(
-            db.func.count(ForumComment.id).desc()
-        ).limit(3).all()
-        
-        leaderboard_data = []
-        for i, (username, solution_count) in enumerate(solution_leaders, 1):
-            # Kullanıcının toplam aktivite puanlarını da hesapla
-            total_points = db.session.query(
-                db.func.sum(UserActivity.points_earned)
-            ).filter(
-                UserActivity.username == username
-            ).scalar() or 0
-            
-            leaderboard_data.append({
-                'rank': i,
-                'username': username,
-                'solution_count': solution_count,
-                'total_points': total_points,
-                'avatar': username[0].upper() if username else 'U'  # İlk harf avatar olarak
-            })
+        limit = min(max(request.args.get('limit', 3, type=int), 1), 100)
+        interest = request.args.get('interest', 'all')
+        if interest == 'mine':
+            user = current_user()
+            interest = user.interest if user else None
+        elif interest == 'all':
+            interest = None
+        
+        leaderboard_data = leaderboard.top(limit, interest)
+        for entry in leaderboard_data:
+            entry['avatar'] = entry['username'][0].upper() if entry['username'] else 'U'  # İlk harf avatar olarak
         
-        return jsonify({'leaderboard': leaderboard_data})
+        return jsonify({
+            'leaderboard': leaderboard_data,
+            'interest': interest,
+            'me': leaderboard.rank(session['username'], interest)
+        })
         
     except Exception as e:
         return jsonify({'error': f'Liderlik tablosu hatası: {str(e)}'}), 500
@@ -3159,12 +4009,13 @@ def get_leaderboard():
 @login_required
 def advanced_search():
     """Gelişmiş arama"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     # Query parametreleri
-    query = request.args.get('q', '')
+    query = request.args.get('q', '').strip()
+    sort_by = request.args.get('sort', 'relevance' if query else 'latest')  # relevance, latest
     author = request.args.get('author', '')
     tags = request.args.get('tags', '').split(',') if request.args.get('tags') else []
     post_type = request.args.get('type', '')
@@ -3177,15 +4028,20 @@ def advanced_search():
         # Base query (kaldırılmamış gönderiler)
         search_query = ForumPost.query.filter_by(interest=user.interest, is_removed=False)
         
-        # Arama terimi
+        # Arama terimi - tam metin arama, kullanılamıyorsa ilike
+        search_score = None
         if query:
-            search_term = f"%{query}%"
-            search_query = search_query.filter(
-                db.or_(
-                    ForumPost.title.ilike(search_term),
-                    ForumPost.content.ilike(search_term)
+            ranked_query, search_score = forum_search.apply(search_query, query)
+            if ranked_query is not None:
+                search_query = ranked_query
+            else:
+                search_term = f"%{query}%"
+                search_query = search_query.filter(
+                    db.or_(
+                        ForumPost.title.ilike(search_term),
+                        ForumPost.content.ilike(search_term)
+                    )
                 )
-            )
         
         # Yazar filtresi
         if author:
@@ -3216,27 +4072,29 @@ def advanced_search():
             except:
                 pass
         
-        # Etiketler
-        if tags and tags[0]:
-            for tag in tags:
-                if tag.strip():
-                    search_query = search_query.filter(ForumPost.tags.contains(tag.strip()))
+        # Etiketler - hepsine sahip gönderiler (ilişki tablosu üzerinden)
+        tag_names = normalize_tag_names(tags)
+        if tag_names:
+            search_query = search_query.filter(ForumPost.id.in_(posts_with_all_tags(tag_names)))
         
         # Sonuçları sırala
-        search_query = search_query.order_by(ForumPost.created_at.desc())
+        if sort_by == 'relevance' and search_score is not None:
+            search_query = search_query.order_by(search_score.desc(), ForumPost.created_at.desc())
+        else:
+            search_query = search_query.order_by(ForumPost.created_at.desc())
         
         # Sayfalama
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         results = search_query.paginate(page=page, per_page=per_page, error_out=False)
         
+        liked_post_ids = get_liked_post_ids(session['username'], [post.id for post in results.items])
+        snippets = forum_search.snippets([post.id for post in results.items], query) if search_score is not None else {}
+        
         # Sonuçları formatla
         posts_data = []
         for post in results.items:
-            user_liked = ForumLike.query.filter_by(
-                username=session['username'],
-                post_id=post.id
-            ).first() is not None
+            user_liked = post.id in liked_post_ids
             
             posts_data.append({
                 'id': post.id,
@@ -3252,6 +4110,7 @@ def advanced_search():
 
                 'bounty_points': post.bounty_points,
                 'user_liked': user_liked,
+                'snippet': snippets.get(post.id),
                 'created_at': post.created_at.strftime('%Y-%m-%d %H:%M'),
                 'updated_at': post.updated_at.strftime('%Y-%m-%d %H:%M')
             })
@@ -3275,85 +4134,17 @@ def advanced_search():
 @login_required
 def get_forum_analytics():
     """Forum analitiklerini getirir"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     try:
-        # Son 30 günün istatistikleri
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        # Gönderi istatistikleri + admin postları (kaldırılmamış gönderiler)
-        total_posts = ForumPost.query.filter(
-            db.or_(
-                ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.is_removed == False
-        ).count()
-        
-        recent_posts = ForumPost.query.filter(
-            db.or_(
-            ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.created_at >= thirty_days_ago,
-            ForumPost.is_removed == False
-        ).count()
-        
-        # Yorum istatistikleri + admin postları (kaldırılmamış gönderiler)
-        total_comments = ForumComment.query.join(ForumPost).filter(
-            db.or_(
-                ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.is_removed == False
-        ).count()
-        
-        recent_comments = ForumComment.query.join(ForumPost).filter(
-            db.or_(
-            ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumComment.created_at >= thirty_days_ago,
-            ForumPost.is_removed == False
-        ).count()
-        
-        # Çözülen sorular + admin postları (kaldırılmamış gönderiler)
-        solved_questions = ForumPost.query.filter(
-            db.or_(
-            ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.post_type == 'question',
-            ForumPost.is_solved == True,
-            ForumPost.is_removed == False
-        ).count()
-        
-        # En aktif kullanıcılar + admin postları (kaldırılmamış gönderiler)
-        active_users = db.session.query(
-            ForumPost.author_username,
-            db.func.count(ForumPost.id).label('post_count')
-        ).filter(
-            db.or_(
-            ForumPost.interest == user.interest,
-                ForumPost.is_admin_post == True
-            ),
-            ForumPost.created_at >= thirty_days_ago,
-            ForumPost.is_removed == False
-        ).group_by(ForumPost.author_username)\
-         .order_by(db.func.count(ForumPost.id).desc())\
-         .limit(5).all()
-        
-        active_users_data = []
-        for username, count in active_users:
-            active_users_data.append({
-                'username': username,
-                'post_count': count
-            })
+        # Gönderi/yorum/çözülen soru sayıları ve son 30 gün (önceden hesaplanmış)
+        stats, computed_at = forum_stats.get(user.interest)
         
         # Popüler etiketler
-        popular_tags = ForumTag.query.order_by(ForumTag.usage_count.desc()).limit(10).all()
+        popular_tags = ForumTag.query.filter(ForumTag.usage_count > 0)\
+            .order_by(ForumTag.usage_count.desc()).limit(10).all()
         tags_data = []
         for tag in popular_tags:
             tags_data.append({
@@ -3362,13 +4153,14 @@ def get_forum_analytics():
             })
         
         return jsonify({
-            'total_posts': total_posts,
-            'recent_posts': recent_posts,
-            'total_comments': total_comments,
-            'recent_comments': recent_comments,
-            'solved_questions': solved_questions,
-            'active_users': active_users_data,
-            'popular_tags': tags_data
+            'total_posts': stats.get('total_posts', 0),
+            'recent_posts': stats.get('recent_posts', 0),
+            'total_comments': stats.get('total_comments', 0),
+            'recent_comments': stats.get('recent_comments', 0),
+            'solved_questions': stats.get('solved_questions', 0),
+            'active_users': stats.get('active_users', []),
+            'popular_tags': tags_data,
+            'stats_updated_at': computed_at.strftime('%Y-%m-%d %H:%M:%S')
         })
         
     except Exception as e:
@@ -3454,15 +4246,16 @@ def admin_get_all_forum_posts():
             page=page, per_page=per_page, error_out=False
         )
         
+        admin_authors = get_admin_usernames([post.author_username for post in posts.items])
+        
         posts_data = []
         for post in posts.items:
-            author = User.query.filter_by(username=post.author_username).first()
             posts_data.append({
                 'id': post.id,
                 'title': post.title,
                 'content': post.content[:200] + '...' if len(post.content) > 200 else post.content,
                 'author_username': post.author_username,
-                'author_is_admin': author.is_admin if author else False,
+                'author_is_admin': post.author_username in admin_authors,
                 'interest': post.interest,
                 'post_type': post.post_type,
                 'tags': json.loads(post.tags) if post.tags else [],
@@ -3502,6 +4295,8 @@ def admin_remove_forum_post(post_id):
         admin_username = session['username']
         
         # Gönderiyi kaldır
+        if not post.is_removed:
+            adjust_post_counters(post.id, -1)
         post.is_removed = True
         post.removed_by = admin_username
         post.removed_at = datetime.utcnow()
@@ -3539,6 +4334,8 @@ def admin_restore_forum_post(post_id):
         admin_username = session['username']
         
         # Gönderiyi geri yükle
+        if post.is_removed:
+            adjust_post_counters(post.id, 1)
         post.is_removed = False
         post.removed_by = None
         post.removed_at = None
@@ -3654,84 +4451,12 @@ def admin_get_stats():
 @app.route('/admin/cleanup', methods=['POST'])
 @admin_required
 def admin_manual_cleanup():
-    """Admin manuel cleanup yapar"""
+    """Admin manuel cleanup başlatır - silme iş kuyruğunda çalışır, sonucu /jobs/<id> ile sorgula"""
     try:
-        import os
-        import time
-        
-        cleanup_stats = {
-            'sessions_deleted': 0,
-            'audio_files_deleted': 0,
-            'history_records_deleted': 0,
-            'disk_space_freed_mb': 0
-        }
-        
-        # Eski auto-interview session'larını temizle
-        old_sessions = AutoInterviewSession.query.filter(
-            AutoInterviewSession.status.in_(['completed', 'expired']),
-            AutoInterviewSession.end_time < (datetime.utcnow() - timedelta(hours=1))
-        ).all()
-        
-        for old_session in old_sessions:
-            try:
-                db.session.delete(old_session)
-                cleanup_stats['sessions_deleted'] += 1
-            except Exception as e:
-                print(f"⚠️ Failed to delete old session {old_session.session_id}: {e}")
-        
-        # Eski test session'larını temizle
-        old_test_sessions = TestSession.query.filter(
-            TestSession.status.in_(['completed', 'expired']),
-            TestSession.start_time < (datetime.utcnow() - timedelta(hours=1))
-        ).all()
-        
-        for old_session in old_test_sessions:
-            try:
-                db.session.delete(old_session)
-                cleanup_stats['sessions_deleted'] += 1
-            except Exception as e:
-                print(f"⚠️ Failed to delete old test session {old_session.session_id}: {e}")
-        
-        # Eski user history'yi temizle
-        old_history = UserHistory.query.filter(
-            UserHistory.created_at < (datetime.utcnow() - timedelta(days=1))
-        ).all()
-        
-        for old_record in old_history:
-            try:
-                db.session.delete(old_record)
-                cleanup_stats['history_records_deleted'] += 1
-            except Exception as e:
-                print(f"⚠️ Failed to delete old history record {old_record.id}: {e}")
-        
-        # Eski audio dosyalarını temizle
-        audio_dir = os.path.join(app.static_folder, 'audio')
-        if os.path.exists(audio_dir):
-            current_time = time.time()
-            for filename in os.listdir(audio_dir):
-                if filename.startswith('auto_interview_') and filename.endswith('.wav'):
-                    file_path = os.path.join(audio_dir, filename)
-                    try:
-                        file_age = current_time - os.path.getmtime(file_path)
-                        if file_age > 1800:  # 30 dakika
-                            file_size = os.path.getsize(file_path) / (1024 * 1024)  # MB
-                            os.unlink(file_path)
-                            cleanup_stats['audio_files_deleted'] += 1
-                            cleanup_stats['disk_space_freed_mb'] += file_size
-                    except Exception as e:
-                        print(f"⚠️ Failed to delete old audio file {filename}: {e}")
-        
-        # Değişiklikleri commit et
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Cleanup başarıyla tamamlandı',
-            'stats': cleanup_stats
-        })
-        
+        job_id = job_queue.submit('admin_cleanup', {}, username=session['username'])
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': f'Cleanup hatası: {str(e)}'}), 500
+    return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}), 202
 
 def extract_text_from_pdf(file_path):
     """PDF dosyasından metin çıkarır"""
@@ -3762,7 +4487,7 @@ def extract_text_from_pdf(file_path):
 @login_required
 def get_test_statistics():
     """Kullanıcının test istatistiklerini ve soru havuzu bilgilerini döndür"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -3837,15 +4562,28 @@ def get_test_statistics():
 @login_required
 def refresh_question_pool():
     """Soru havuzunu yenile - admin veya gelişmiş kullanıcılar için"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
     data = request.json
     force_refresh = data.get('force_refresh', False)
     
+    # async=true ise yenilemeyi iş kuyruğuna bırak, sonucu /jobs/<id> ile sorgula
+    if data.get('async'):
+        try:
+            job_id = job_queue.submit('refresh_question_pool', {
+                'username': user.username,
+                'interest': user.interest,
+                'force_refresh': force_refresh
+            }, username=user.username, api_key=get_user_api_key())
+        except Exception as e:
+            return jsonify({'error': f'Havuz yenileme hatası: {str(e)}'}), 500
+        return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}), 202
+    
     try:
         agent = TestAIAgent(user.interest, get_user_api_key())
+        release_db_connection()
         refresh_result = agent.refresh_question_pool(force_refresh=force_refresh)
         
         if refresh_result:
@@ -3866,12 +4604,35 @@ def refresh_question_pool():
     except Exception as e:
         return jsonify({'error': f'Havuz yenileme hatası: {str(e)}'}), 500
 
+# Yeni endpoint: Soru havuzu doldurma kuyruğunun durumu
+@app.route('/test_your_skill/pool_status', methods=['GET'])
+@login_required
+def get_question_pool_status():
+    """Havuz bucket envanteri ve arka plan doldurma kuyruğu"""
+    user = current_user()
+    if not user.interest:
+        return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
+    
+    try:
+        buckets = [
+            {'difficulty': difficulty, 'category': category, 'count': count}
+            for (_, difficulty, category), count in sorted(question_pool_store.get_bucket_counts(user.interest).items())
+        ]
+        return jsonify({
+            'success': True,
+            'interest_area': user.interest,
+            'buckets': buckets,
+            'replenisher': pool_replenisher.status()
+        })
+    except Exception as e:
+        return jsonify({'error': f'Havuz durumu hatası: {str(e)}'}), 500
+
 # Yeni endpoint: Adaptif test önerisi
 @app.route('/test_your_skill/recommend_adaptive', methods=['GET'])
 @login_required
 def recommend_adaptive_test():
     """Kullanıcıya adaptif test önerisi yap"""
-    user = User.query.filter_by(username=session['username']).first()
+    user = current_user()
     if not user.interest:
         return jsonify({'error': 'İlgi alanı seçmelisiniz.'}), 400
     
@@ -3953,6 +4714,122 @@ def recommend_adaptive_test():
         return jsonify({'error': f'Öneri alma hatası: {str(e)}'}), 500
 
 
+# İş kuyruğu handler'ları - worker thread'lerinde app context içinde çalışır
+def run_cv_analysis_job(payload, api_key):
+    user = User.query.filter_by(username=payload['username']).first()
+    if not user:
+        raise PermanentJobError('Kullanıcı bulunamadı.')
+    agent = InterviewAIAgent(user.interest, api_key)
+    cv_analysis = agent.analyze_cv(base64.b64decode(payload['cv_data']), payload['mime_type'], raise_errors=True)
+    user.cv_analysis = cv_analysis
+    db.session.commit()
+    return {
+        'message': 'CV başarıyla yüklendi ve analiz edildi.',
+        'analysis': cv_analysis
+    }
+
+def run_refresh_question_pool_job(payload, api_key):
+    agent = TestAIAgent(payload['interest'], api_key)
+    refreshed = agent.refresh_question_pool(force_refresh=payload.get('force_refresh', False))
+    return {
+        'success': refreshed,
+        'message': 'Soru havuzu başarıyla yenilendi.' if refreshed else 'Soru havuzu zaten güncel. Yenileme gerekmiyor.',
+        'stats': agent.get_question_statistics(user_id=payload['username'])
+    }
+
+def run_complete_auto_interview_job(payload, api_key):
+    interview_session = AutoInterviewSession.query.filter_by(
+        session_id=payload['session_id'],
+        username=payload['username']
+    ).first()
+    if not interview_session:
+        raise PermanentJobError('Mülakat oturumu bulunamadı.')
+    
+    questions = json.loads(interview_session.questions or '[]')
+    answers = json.loads(interview_session.answers or '[]')
+    
+    # Önceki denemede tamamlandıysa tekrar üretme
+    if interview_session.status != 'completed':
+        agent = InterviewAIAgent(interview_session.interest, api_key)
+        interview_session.final_evaluation = agent.generate_final_evaluation(
+            questions,
+            answers,
+            interview_session.conversation_context,
+            raise_errors=True
+        )
+        interview_session.status = 'completed'
+        interview_session.end_time = datetime.now()
+        db.session.commit()
+    
+    return {
+        'final_evaluation': interview_session.final_evaluation,
+        'total_questions': len(questions),
+        'total_answers': len(answers),
+        'session_duration': (interview_session.end_time - interview_session.start_time).total_seconds()
+    }
+
+def run_admin_cleanup_job(payload, api_key):
+    cleanup_stats = {
+        'sessions_deleted': 0,
+        'audio_files_deleted': 0,
+        'history_records_deleted': 0,
+        'disk_space_freed_mb': 0
+    }
+    
+    # Saklama süreleri admin temizliğinde kısaltılır; silme parça parça yapılır
+    report = retention.run(
+        max_ages={
+            'auto_interview_sessions': timedelta(hours=1),
+            'test_sessions': timedelta(hours=1),
+            'user_history': timedelta(days=1)
+        },
+        names=('auto_interview_sessions', 'test_sessions', 'user_history')
+    )
+    cleanup_stats['sessions_deleted'] = report['auto_interview_sessions']['rows'] + report['test_sessions']['rows']
+    cleanup_stats['history_records_deleted'] = report['user_history']['rows']
+    cleanup_stats['database_bytes_reclaimed'] = sum(stats['bytes'] for stats in report.values())
+    cleanup_stats['tables'] = report
+    
+    # Eski audio dosyalarını temizle
+    audio_dir = os.path.join(app.static_folder, 'audio')
+    if os.path.exists(audio_dir):
+        current_time = time.time()
+        for filename in os.listdir(audio_dir):
+            if filename.startswith('auto_interview_') and filename.endswith('.wav'):
+                file_path = os.path.join(audio_dir, filename)
+                try:
+                    file_age = current_time - os.path.getmtime(file_path)
+                    if file_age > 1800:  # 30 dakika
+                        file_size = os.path.getsize(file_path) / (1024 * 1024)  # MB
+                        os.unlink(file_path)
+                        cleanup_stats['audio_files_deleted'] += 1
+                        cleanup_stats['disk_space_freed_mb'] += file_size
+                except Exception as e:
+                    print(f"⚠️ Failed to delete old audio file {filename}: {e}")
+    
+    return {
+        'message': 'Cleanup başarıyla tamamlandı',
+        'stats': cleanup_stats
+    }
+
+job_queue.register('analyze_cv', run_cv_analysis_job)
+job_queue.register('refresh_question_pool', run_refresh_question_pool_job)
+job_queue.register('complete_auto_interview', run_complete_auto_interview_job)
+job_queue.register('admin_cleanup', run_admin_cleanup_job)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job_status(job_id):
+    """Arka plan işinin durumunu ve (tamamlandıysa) sonucunu döndürür"""
+    try:
+        job = job_queue.get(job_id, username=session['username'])
+        if not job:
+            return jsonify({'error': 'İş bulunamadı.'}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({'error': f'İş durumu alma hatası: {str(e)}'}), 500
+
+
 # Debug endpoint'leri
 if __name__ == '__main__':
     init_app()  # Database'i başlat ve session'ları yükle
@@ -11,63 +11,8 @@ python -c "
 from app import app, db
 with app.app_context():
     try:
-        # Check if admin columns exist
-        from sqlalchemy import text
-        with db.engine.connect() as conn:
-            # Check if is_admin column exists
-            result = conn.execute(text(\"\"\"
-                SELECT column_name FROM information_schema.columns 
-                WHERE table_name = 'user' AND column_name = 'is_admin'
-            \"\"\"))
-            is_admin_exists = result.fetchone() is not None
-            
-            # Check if created_at column exists
-            result = conn.execute(text(\"\"\"
-                SELECT column_name FROM information_schema.columns 
-                WHERE table_name = 'user' AND column_name = 'created_at'
-            \"\"\"))
-            created_at_exists = result.fetchone() is not None
-            
-            if not is_admin_exists or not created_at_exists:
-                print('Adding missing columns to user table...')
-                
-                # Add is_admin column if it doesn't exist
-                if not is_admin_exists:
-                    conn.execute(text('ALTER TABLE \"user\" ADD COLUMN is_admin BOOLEAN DEFAULT FALSE'))
-                    print('Added is_admin column')
-                
-                # Add created_at column if it doesn't exist
-                if not created_at_exists:
-                    conn.execute(text('ALTER TABLE \"user\" ADD COLUMN created_at TIMESTAMP DEFAULT NOW()'))
-                    print('Added created_at column')
-                
-                # Add admin post columns to forum_post table
-                result = conn.execute(text(\"\"\"
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name = 'forum_post' AND column_name = 'is_admin_post'
-                \"\"\"))
-                if not result.fetchone():
-                    conn.execute(text('ALTER TABLE forum_post ADD COLUMN is_admin_post BOOLEAN DEFAULT FALSE'))
-                    conn.execute(text('ALTER TABLE forum_post ADD COLUMN is_removed BOOLEAN DEFAULT FALSE'))
-                    conn.execute(text('ALTER TABLE forum_post ADD COLUMN removed_by VARCHAR(80)'))
-                    conn.execute(text('ALTER TABLE forum_post ADD COLUMN removed_at TIMESTAMP'))
-                    print('Added admin post columns to forum_post table')
-                
-                # Add admin notification columns to forum_notification table
-                result = conn.execute(text(\"\"\"
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name = 'forum_notification' AND column_name = 'is_admin_message'
-                \"\"\"))
-                if not result.fetchone():
-                    conn.execute(text('ALTER TABLE forum_notification ADD COLUMN is_admin_message BOOLEAN DEFAULT FALSE'))
-                    conn.execute(text('ALTER TABLE forum_notification ADD COLUMN admin_username VARCHAR(80)'))
-                    print('Added admin notification columns to forum_notification table')
-                
-                conn.commit()
-                print('Database schema updated successfully')
-            else:
-                print('All required columns already exist')
-        
+        # Tables and schema migrations (missing columns, indexes) are applied
+        # by init_app() when app is imported; see schema_migrations in app.py
         # Create tables if they don't exist
         db.create_all()
         print('Database initialized successfully')
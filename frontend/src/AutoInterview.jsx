@@ -11,6 +11,7 @@ import {
 import { motion } from 'framer-motion';
 import axios from 'axios';
 import API_ENDPOINTS, { getAudioUrl } from './config.js';
+import postEventStream from './sse.js';
 
 export default function AutoInterview() {
   const [sessionId, setSessionId] = useState(null);
@@ -267,18 +268,23 @@ export default function AutoInterview() {
       console.log('Completing interview with:', API_ENDPOINTS.AUTO_INTERVIEW_COMPLETE);
       console.log('Complete data:', { session_id: sessionId });
       
-      const res = await axios.post(API_ENDPOINTS.AUTO_INTERVIEW_COMPLETE, {
+      // Final değerlendirme SSE ile parça parça gelir; ilk parçada sonuç penceresi açılır
+      const data = await postEventStream(API_ENDPOINTS.AUTO_INTERVIEW_COMPLETE_STREAM, {
         session_id: sessionId
-      }, { 
-        withCredentials: true,
-        timeout: 30000
+      }, {
+        timeout: 30000,
+        onChunk: (text) => {
+          setFinalEvaluation(text);
+          setStep('completed');
+          setShowFinalDialog(true);
+        }
       });
       
-      setFinalEvaluation(res.data.final_evaluation);
+      setFinalEvaluation(data.final_evaluation);
       setSessionInfo({
-        total_questions: res.data.total_questions,
-        total_answers: res.data.total_answers,
-        session_duration: res.data.session_duration
+        total_questions: data.total_questions,
+        total_answers: data.total_answers,
+        session_duration: data.session_duration
       });
       setStep('completed');
       setShowFinalDialog(true);
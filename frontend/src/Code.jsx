@@ -12,6 +12,7 @@ import {
 import { motion } from 'framer-motion';
 import axios from 'axios';
 import API_ENDPOINTS from './config.js';
+import postEventStream from './sse.js';
 
 export default function Code() {
   const [question, setQuestion] = useState('');
@@ -635,16 +636,21 @@ export default function Code() {
     setLoading(true);
     setError('');
     try {
-      console.log('Generating solution with:', API_ENDPOINTS.CODE_GENERATE);
+      console.log('Generating solution with:', API_ENDPOINTS.CODE_GENERATE_STREAM);
       console.log('Solution data:', { question_length: question.length, language: selectedLanguage });
       
-      const res = await axios.post(API_ENDPOINTS.CODE_GENERATE, {
+      // Çözüm SSE ile parça parça gelir; üretilirken ham metin önizleme olarak gösterilir
+      const data = await postEventStream(API_ENDPOINTS.CODE_GENERATE_STREAM, {
         question: question,
         language: selectedLanguage
-      }, { 
-        withCredentials: true,
-        timeout: 25000
+      }, {
+        timeout: 25000,
+        onChunk: (text) => {
+          setGeneratedSolution({ generated_code: text });
+          setShowAiSolution(true);
+        }
       });
+      const res = { data };
       
       console.log('AI Response:', res.data); // Debug için
       
@@ -680,6 +686,8 @@ export default function Code() {
       }
     } catch (err) {
       console.error('Error generating solution:', err);
+      // Yarım kalan akış önizlemesini gösterme
+      setShowAiSolution(false);
       console.error('Error response:', err.response);
       if (err.response?.status === 401) {
         setError('Oturum süreniz dolmuş. Lütfen tekrar giriş yapın.');
@@ -115,7 +115,8 @@ const interestTypes = [
   const sortOptions = [
     { value: 'latest', label: 'En Yeni' },
     { value: 'popular', label: 'En Popüler' },
-    { value: 'most_commented', label: 'En Çok Yorum Alan' }
+    { value: 'most_commented', label: 'En Çok Yorum Alan' },
+    { value: 'relevance', label: 'En Alakalı (Arama)' }
   ];
 
   useEffect(() => {
@@ -9,6 +9,7 @@ import {
 import { motion } from 'framer-motion';
 import axios from 'axios';
 import API_ENDPOINTS, { getAudioUrl } from './config.js';
+import postEventStream from './sse.js';
 
 export default function Interview() {
   const [question, setQuestion] = useState('');
@@ -315,14 +316,18 @@ export default function Interview() {
     setLoading(true);
     setError('');
     try {
-      const res = await axios.post(API_ENDPOINTS.INTERVIEW_EVALUATE, {
+      // Değerlendirme SSE ile parça parça gelir; ilk parçada sonuç ekranına geçilir
+      const data = await postEventStream(API_ENDPOINTS.INTERVIEW_EVALUATE_STREAM, {
         question: question,
-        answer: answer.trim() // Backend'de 'answer' olarak bekliyor
-      }, { 
-        withCredentials: true,
-        timeout: 45000
+        user_answer: answer.trim()
+      }, {
+        timeout: 45000,
+        onChunk: (text) => {
+          setResult({ evaluation: text });
+          setStep('result');
+        }
       });
-      setResult(res.data);
+      setResult(data);
       setStep('result');
     } catch (err) {
       console.error('Cevap değerlendirme hatası:', err);
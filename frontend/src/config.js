@@ -40,6 +40,7 @@ export const API_ENDPOINTS = {
   // Interview endpoints
   INTERVIEW_SIMULATION: `${API_BASE_URL}/interview_simulation`,
   INTERVIEW_EVALUATE: `${API_BASE_URL}/interview_simulation/evaluate`,
+  INTERVIEW_EVALUATE_STREAM: `${API_BASE_URL}/interview_simulation/evaluate/stream`,
   INTERVIEW_SPEECH_QUESTION: `${API_BASE_URL}/interview_speech_question`,
   INTERVIEW_SPEECH_EVALUATION: `${API_BASE_URL}/interview_speech_evaluation`,
   INTERVIEW_CV_QUESTION: `${API_BASE_URL}/interview_cv_based_question`,
@@ -51,6 +52,7 @@ export const API_ENDPOINTS = {
   AUTO_INTERVIEW_START: `${API_BASE_URL}/auto_interview/start`,
   AUTO_INTERVIEW_SUBMIT: `${API_BASE_URL}/auto_interview/submit_answer`,
   AUTO_INTERVIEW_COMPLETE: `${API_BASE_URL}/auto_interview/complete`,
+  AUTO_INTERVIEW_COMPLETE_STREAM: `${API_BASE_URL}/auto_interview/complete/stream`,
   AUTO_INTERVIEW_STATUS: `${API_BASE_URL}/auto_interview/status`,
 
   // Code endpoints
@@ -59,6 +61,7 @@ export const API_ENDPOINTS = {
   CODE_RUN: `${API_BASE_URL}/code_room/run`,
   CODE_RUN_SIMPLE: `${API_BASE_URL}/code_room/run_simple`,
   CODE_GENERATE: `${API_BASE_URL}/code_room/generate_solution`,
+  CODE_GENERATE_STREAM: `${API_BASE_URL}/code_room/generate_solution/stream`,
   CODE_SUGGEST: `${API_BASE_URL}/code_room/suggest_resources`,
   CODE_FORMAT: `${API_BASE_URL}/code_room/format_code`,
 
@@ -0,0 +1,114 @@
+// Server-sent events yardımcısı
+// Backend'in /stream endpoint'leri POST kabul ettiği için EventSource yerine
+// fetch + ReadableStream kullanılır. Olaylar: chunk ({text}), done (sonuç), error ({error}).
+// Hatalar axios'a benzer şekilde (err.response.status / err.response.data) fırlatılır,
+// böylece mevcut catch blokları aynen çalışır.
+
+const streamError = (message, status, data) => {
+  const err = new Error(message);
+  err.response = { status, data: data || { error: message } };
+  return err;
+};
+
+const parseEvent = (raw) => {
+  let event = 'message';
+  const dataLines = [];
+  raw.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trimStart());
+    }
+  });
+  let data = null;
+  if (dataLines.length) {
+    try {
+      data = JSON.parse(dataLines.join('\n'));
+    } catch {
+      data = dataLines.join('\n');
+    }
+  }
+  return { event, data };
+};
+
+/**
+ * JSON body ile POST atar ve text/event-stream yanıtını okur.
+ * Her `chunk` olayında onChunk(birikmiş metin, yeni parça) çağrılır; `done`
+ * olayının verisi döndürülür. `timeout` ms boyunca hiç veri gelmezse istek iptal
+ * edilir (err.code === 'ECONNABORTED').
+ */
+export const postEventStream = async (url, body, { onChunk, timeout = 60000 } = {}) => {
+  const controller = new AbortController();
+  let timer = null;
+  let timedOut = false;
+  const resetTimer = () => {
+    clearTimeout(timer);
+    timer = setTimeout(() => {
+      timedOut = true;
+      controller.abort();
+    }, timeout);
+  };
+
+  resetTimer();
+  try {
+    const res = await fetch(url, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify(body),
+      signal: controller.signal
+    });
+
+    // Doğrulama hataları akış başlamadan normal JSON yanıtı olarak döner
+    if (!res.ok) {
+      let data = null;
+      try {
+        data = await res.json();
+      } catch {
+        data = null;
+      }
+      throw streamError(data?.error || `HTTP ${res.status}`, res.status, data);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      resetTimer();
+      buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n');
+
+      let separator;
+      while ((separator = buffer.indexOf('\n\n')) !== -1) {
+        const { event, data } = parseEvent(buffer.slice(0, separator));
+        buffer = buffer.slice(separator + 2);
+
+        if (event === 'chunk') {
+          const piece = data?.text || '';
+          text += piece;
+          if (onChunk) onChunk(text, piece);
+        } else if (event === 'done') {
+          reader.cancel().catch(() => {});
+          return data;
+        } else if (event === 'error') {
+          throw streamError(data?.error || 'Akış hatası', 500, data);
+        }
+      }
+    }
+    throw streamError('Yanıt tamamlanmadan bağlantı kapandı.', 500);
+  } catch (err) {
+    if (timedOut) {
+      const timeoutError = new Error('Bağlantı zaman aşımı');
+      timeoutError.code = 'ECONNABORTED';
+      throw timeoutError;
+    }
+    throw err;
+  } finally {
+    clearTimeout(timer);
+  }
+};
+
+export default postEventStream;
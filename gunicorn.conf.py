@@ -0,0 +1,37 @@
+# Gunicorn configuration
+#
+# GUNICORN_WORKER_CLASS selects the serving mode:
+#   sync    - one request per worker (previous behaviour)
+#   gevent  - cooperative workers; blocking Gemini/HTTP calls yield while
+#             waiting on the network, so one process can hold hundreds of
+#             in-flight LLM requests while forum/profile routes keep serving
+#   gthread - thread pool per worker, a middle ground without monkey patching
+#
+# Command line flags (--workers, --timeout, ...) override the values below.
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+
+if worker_class == 'gevent':
+    # Patch before the app (and ssl/socket users like httpx, requests,
+    # SQLAlchemy) is imported; required for --preload to be safe
+    from gevent import monkey
+    monkey.patch_all()
+
+    try:
+        # psycopg2 blocks the whole process on queries unless made green
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+# gevent: concurrent requests per worker. LLM routes hand their database
+# connection back (release_db_connection in app.py) before calling Gemini, so
+# in-flight AI requests do not hold the SQLAlchemy pool (pool_size 10 +
+# max_overflow 20 per worker); only requests actually running queries do.
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 500))
+# gthread: threads per worker
+threads = int(os.getenv('GUNICORN_THREADS', 8 if worker_class == 'gthread' else 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
@@ -0,0 +1,193 @@
+"""
+Index benchmark: seeds a large dataset and prints the query plan and timing of
+the hot route queries without and with the QUERY_INDEXES from app.py.
+
+    python scripts/benchmark_indexes.py                      # scratch SQLite file
+    python scripts/benchmark_indexes.py --database-url postgresql://...  # empty scratch DB!
+
+The target database is filled with generated rows; never point it at real data.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='scratch database (default: temporary SQLite file)')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query for timing')
+    return parser.parse_args()
+
+
+def seed(app_module, args):
+    db = app_module.db
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    interests = ['AI', 'Data Science', 'Web Development', 'Mobile', 'Cyber Security', 'DevOps', 'Game Dev', 'Cloud']
+    users = [f'user{i}' for i in range(args.users)]
+    posts_n, comments_n = args.posts, args.posts * 4
+
+    def ago(max_days):
+        return now - timedelta(seconds=rng.randint(0, max_days * 86400))
+
+    def insert(model, rows, chunk=5000):
+        for start in range(0, len(rows), chunk):
+            db.session.execute(model.__table__.insert(), rows[start:start + chunk])
+        db.session.commit()
+
+    print(f'Seeding {args.users} users, {posts_n} posts, {comments_n} comments ...')
+    insert(app_module.ForumPost, [{
+        'title': f'post {i}', 'content': 'x', 'author_username': rng.choice(users),
+        'interest': rng.choice(interests), 'post_type': 'discussion', 'views': 0, 'likes_count': rng.randint(0, 50),
+        'comments_count': 4, 'is_admin_post': i % 500 == 0, 'is_removed': i % 50 == 0,
+        'created_at': ago(365), 'updated_at': now
+    } for i in range(posts_n)])
+    insert(app_module.ForumComment, [{
+        'post_id': rng.randint(1, posts_n), 'author_username': rng.choice(users), 'content': 'c',
+        'likes_count': 0, 'created_at': ago(365), 'updated_at': now
+    } for _ in range(comments_n)])
+    insert(app_module.ForumLike, [{
+        'username': rng.choice(users), 'post_id': rng.randint(1, posts_n), 'created_at': ago(365)
+    } for _ in range(comments_n)])
+    insert(app_module.ForumNotification, [{
+        'username': rng.choice(users), 'notification_type': 'like', 'title': 't', 'message': 'm',
+        'related_post_id': rng.randint(1, posts_n), 'created_at': ago(90)
+    } for _ in range(posts_n * 2)])
+    insert(app_module.UserActivity, [{
+        'username': rng.choice(users), 'activity_type': rng.choice(['post_created', 'comment_added', 'code_solved']),
+        'points_earned': rng.randint(1, 20), 'created_at': ago(365)
+    } for _ in range(posts_n * 4)])
+    insert(app_module.TestPerformance, [{
+        'username': rng.choice(users), 'interest': rng.choice(interests), 'total_questions': 10,
+        'correct_answers': 5, 'success_rate': 50.0, 'skill_level': 'orta', 'time_taken': 600,
+        'difficulty': 'medium', 'created_at': ago(365)
+    } for _ in range(posts_n)])
+    insert(app_module.TestSession, [{
+        'session_id': f'test-{i}', 'username': rng.choice(users), 'questions': '[]', 'difficulty': 'medium',
+        'num_questions': 10, 'duration': 600, 'start_time': ago(60),
+        'status': rng.choice(['completed'] * 8 + ['expired', 'active'])
+    } for i in range(posts_n)])
+    insert(app_module.AutoInterviewSession, [{
+        'session_id': f'auto-{i}', 'username': rng.choice(users), 'interest': rng.choice(interests),
+        'status': rng.choice(['completed'] * 8 + ['active', 'paused']), 'start_time': ago(60), 'end_time': ago(60)
+    } for i in range(posts_n)])
+    insert(app_module.UserHistory, [{
+        'username': rng.choice(users), 'activity_type': 'test', 'detail': '{}', 'created_at': ago(30)
+    } for _ in range(posts_n * 2)])
+    return users, interests
+
+
+def route_queries(app_module, username, interest):
+    """Same filters/orderings as the routes (get_forum_posts, profile, notifications, sessions, cleanup)"""
+    m, db = app_module, app_module.db
+    # Cleanup runs hourly, so in steady state only the oldest slice is past the cutoff
+    now = datetime.utcnow()
+    return {
+        'forum feed (get_forum_posts)': m.ForumPost.query.filter(
+            db.or_(m.ForumPost.interest == interest, m.ForumPost.is_admin_post == True),
+            m.ForumPost.is_removed == False
+        ).order_by(m.ForumPost.created_at.desc()).limit(10),
+        'admin feed (get_forum_posts)': m.ForumPost.query.filter(m.ForumPost.is_removed == False)
+            .order_by(m.ForumPost.created_at.desc()).limit(10),
+        'comment tree (get_forum_post)': m.ForumComment.query.filter_by(post_id=1234)
+            .order_by(m.ForumComment.created_at.asc()),
+        'viewer likes (get_liked_post_ids)': db.session.query(m.ForumLike.post_id).filter(
+            m.ForumLike.username == username, m.ForumLike.post_id.in_(range(1, 200, 20))),
+        'notifications (get_notifications)': m.ForumNotification.query.filter_by(username=username)
+            .order_by(m.ForumNotification.created_at.desc()).limit(20),
+        'recent tests (profile)': m.TestPerformance.query.filter_by(username=username)
+            .order_by(m.TestPerformance.created_at.desc()).limit(5),
+        'activities (profile)': m.UserActivity.query.filter_by(username=username)
+            .order_by(m.UserActivity.created_at.desc()).limit(50),
+        'user posts count (profile)': m.ForumPost.query.filter_by(author_username=username),
+        'active test session': m.TestSession.query.filter_by(username=username, status='active'),
+        'active auto interview': m.AutoInterviewSession.query.filter_by(username=username, status='active'),
+        'cleanup auto interviews': m.AutoInterviewSession.query.filter(
+            m.AutoInterviewSession.status.in_(['completed', 'expired']),
+            m.AutoInterviewSession.end_time < now - timedelta(days=59)),
+        'cleanup user history': m.UserHistory.query.filter(
+            m.UserHistory.created_at < now - timedelta(days=29)),
+    }
+
+
+def explain(db, query):
+    from sqlalchemy import text
+    compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.execute(text(f'EXPLAIN {compiled}')).all()
+        return [row[0] for row in rows]
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+
+def reset_connections(db):
+    """Drop the session and every pooled connection so the next ones see the new schema"""
+    # Pooled SQLite connections keep their cached schema (and prepared plans) across DDL
+    db.session.remove()
+    db.engine.dispose()
+
+
+def measure(app_module, user, interest, repeat):
+    db = app_module.db
+    reset_connections(db)
+    # Build the queries on the fresh session, not on the one used before the DDL
+    queries = route_queries(app_module, user, interest)
+    results = {}
+    for name, query in queries.items():
+        plan = explain(db, query)
+        query.all()  # warm-up: page cache and statement cache, not timed
+        started = time.perf_counter()
+        for _ in range(repeat):
+            query.all()
+        results[name] = (plan, (time.perf_counter() - started) * 1000 / repeat)
+    db.session.remove()
+    return results
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix='index-bench-'), 'bench.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ.setdefault('FLASK_ENV', 'development')
+    sys.path.insert(0, ROOT)
+
+    import app as app_module
+    from sqlalchemy import text
+    from utils.migrations import create_indexes, drop_indexes
+
+    db = app_module.db
+    with app_module.app.app_context():
+        users, interests = seed(app_module, args)
+        user, interest = users[7], interests[0]
+
+        reset_connections(db)
+        with db.engine.begin() as conn:
+            drop_indexes(conn, db.metadata, *app_module.QUERY_INDEXES)
+            conn.execute(text('ANALYZE'))
+        before = measure(app_module, user, interest, args.repeat)
+
+        with db.engine.begin() as conn:
+            create_indexes(conn, db.metadata, *app_module.QUERY_INDEXES)
+            conn.execute(text('ANALYZE'))
+        after = measure(app_module, user, interest, args.repeat)
+
+    for name in before:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f'\n== {name}: {ms_before:.2f} ms -> {ms_after:.2f} ms')
+        print('   before: ' + ' | '.join(plan_before))
+        print('   after:  ' + ' | '.join(plan_after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Session backend benchmark: per-request overhead of the filesystem, database
+and cookie session stores (SESSION_BACKEND in app.py).
+
+Each backend runs in its own process against a scratch SQLite database, logs
+in once and then times requests that only read the session and requests that
+modify it.
+
+    python scripts/benchmark_sessions.py
+    python scripts/benchmark_sessions.py --requests 2000 --database-url postgresql://...  # empty scratch DB!
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = ('filesystem', 'database', 'cookie')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='scratch database (default: temporary SQLite file per backend)')
+    parser.add_argument('--requests', type=int, default=1000, help='timed requests per scenario')
+    parser.add_argument('--backend', choices=BACKENDS, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def timed(client, method, path, count, **kwargs):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, (path, response.status_code)
+    samples.sort()
+    return {'mean': statistics.fmean(samples), 'p95': samples[int(len(samples) * 0.95) - 1]}
+
+
+def run_backend(args):
+    """Child process: import the app with SESSION_BACKEND set and time requests"""
+    sys.path.insert(0, ROOT)
+    import app as app_module
+
+    client = app_module.app.test_client()
+    client.post('/register', json={'username': 'bench', 'password': 'secret1', 'interest': 'AI'})
+    assert client.post('/login', json={'username': 'bench', 'password': 'secret1'}).status_code == 200
+    # Reads the session only, no database work
+    read = timed(client, 'GET', '/session-status', args.requests)
+    # Modifies the session on every request
+    write = timed(client, 'POST', '/set_api_key', args.requests, json={'geminiApiKey': 'bench-key'})
+    print(json.dumps({'read': read, 'write': write}))
+
+
+def main():
+    args = parse_args()
+    if args.backend:
+        run_backend(args)
+        return
+
+    results = {}
+    for backend in BACKENDS:
+        env = dict(os.environ, SESSION_BACKEND=backend, FLASK_ENV='development')
+        workdir = tempfile.mkdtemp(prefix=f'session-bench-{backend}-')
+        env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--backend', backend, '--requests', str(args.requests)],
+            env=env, cwd=workdir, capture_output=True, text=True, check=True
+        ).stdout
+        results[backend] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'backend':<12} {'read mean':>10} {'read p95':>10} {'write mean':>11} {'write p95':>10}   (ms/request)")
+    for backend, result in results.items():
+        read, write = result['read'], result['write']
+        print(f"{backend:<12} {read['mean']:>10.3f} {read['p95']:>10.3f} {write['mean']:>11.3f} {write['p95']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
 #!/bin/bash
 
 # Start the application with gunicorn
-gunicorn --bind 0.0.0.0:$PORT --workers 4 --timeout 120 app:app 
\ No newline at end of file
+gunicorn -c gunicorn.conf.py --bind 0.0.0.0:$PORT --workers 4 --timeout 120 app:app 
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Regression test for the /forum/posts listing: the number of SQL statements per
+page must not grow with the number of posts (no per-post like / author lookups).
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='forum-queries-'), 'test.db')}"
+os.environ.setdefault('FLASK_ENV', 'development')
+os.environ['SESSION_BACKEND'] = 'cookie'
+sys.path.insert(0, ROOT)
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def client():
+    client = app_module.app.test_client()
+    client.post('/register', json={'username': 'viewer', 'password': 'secret1', 'interest': 'AI'})
+    assert client.post('/login', json={'username': 'viewer', 'password': 'secret1'}).status_code == 200
+
+    admin = app_module.app.test_client()
+    admin.post('/register', json={'username': 'admin', 'password': 'secret1', 'interest': 'AI'})
+    with app_module.app.app_context():
+        user = app_module.User.query.filter_by(username='admin').first()
+        user.is_admin = True
+        app_module.db.session.commit()
+    admin.post('/login', json={'username': 'admin', 'password': 'secret1'})
+    client.admin = admin
+    return client
+
+
+def seed_posts(client, total):
+    with app_module.app.app_context():
+        existing = app_module.ForumPost.query.count()
+    for i in range(existing, total):
+        # Yazarlar karışık (admin / normal), görüntüleyen her ikinci gönderiyi beğeniyor
+        author = client.admin if i % 3 == 0 else client
+        response = author.post('/forum/posts', json={'title': f'post {i}', 'content': 'x', 'tags': ['python']})
+        assert response.status_code == 201
+        if i % 2 == 0:
+            client.post(f"/forum/posts/{response.json['post_id']}/like")
+
+
+def count_listing_queries(client):
+    client.get('/forum/posts', query_string={'per_page': 50})  # cache'leri ısıt
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/forum/posts', query_string={'per_page': 50})
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(response.json['posts']), len(statements)
+
+
+def test_forum_posts_query_count_is_constant(client):
+    seed_posts(client, 3)
+    posts_small, queries_small = count_listing_queries(client)
+    seed_posts(client, 30)
+    posts_large, queries_large = count_listing_queries(client)
+
+    assert (posts_small, posts_large) == (3, 30)
+    assert queries_small == queries_large
@@ -0,0 +1,74 @@
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func
+
+logger = logging.getLogger(__name__)
+
+# Profilde sunulan pencere uzunlukları (gün)
+HISTOGRAM_WINDOWS = (7, 30, 90, 365)
+
+# Türkiye 2016'dan beri yaz saati uygulamıyor - tz verisi yoksa sabit UTC+3
+_TURKEY_FALLBACK = timezone(timedelta(hours=3), 'Europe/Istanbul')
+
+
+class ActivityHistogram:
+    """
+    Kullanıcının günlük aktivite sayıları, veritabanında yerel güne göre
+    gruplanarak (GROUP BY gün, aktivite türü) hesaplanır.
+
+    `created_at` UTC olarak saklanır; gün sınırları `timezone_name`
+    saat dilimine göre çizilir. PostgreSQL'de dönüşüm veritabanında
+    `timezone()` ile yapılır, diğer veritabanlarında (SQLite) güncel UTC
+    farkı kadar kaydırılır - yaz saati olmayan Türkiye için ikisi aynıdır.
+    Sorgu (username, created_at) index aralığını okur ve pencere boyunca
+    en fazla gün x aktivite türü kadar satır döner.
+    """
+
+    def __init__(self, db, activity_model, timezone_name='Europe/Istanbul'):
+        self.db = db
+        self.activity_model = activity_model
+        self.timezone_name = timezone_name
+        self.tz = _load_timezone(timezone_name)
+
+    def today(self):
+        return datetime.now(self.tz).date()
+
+    def daily_counts(self, username, days=7):
+        """{yerel gün: {aktivite türü: sayı}} - bugün dahil son `days` gün"""
+        model = self.activity_model
+        start_day = self.today() - timedelta(days=days - 1)
+        start = datetime.combine(start_day, time.min, tzinfo=self.tz)\
+            .astimezone(timezone.utc).replace(tzinfo=None)
+
+        local_day = self._local_day(model.created_at).label('day')
+        rows = self.db.session.query(local_day, model.activity_type, func.count(model.id))\
+            .filter(model.username == username, model.created_at >= start)\
+            .group_by(local_day, model.activity_type).all()
+
+        counts = {}
+        for day, activity_type, count in rows:
+            if isinstance(day, str):  # SQLite date() metin döndürür
+                day = date.fromisoformat(day)
+            elif isinstance(day, datetime):
+                day = day.date()
+            counts.setdefault(day, {})[activity_type] = count
+        return counts
+
+    def _local_day(self, column):
+        if self.db.engine.dialect.name == 'postgresql':
+            return func.date(func.timezone(self.timezone_name, func.timezone('UTC', column)))
+        offset = datetime.now(self.tz).utcoffset()
+        minutes = int(offset.total_seconds() // 60)
+        return func.date(column, f'{minutes:+d} minutes')
+
+
+def _load_timezone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        pass
+    if name != 'Europe/Istanbul':
+        logger.warning("Timezone data for %s not found, using Europe/Istanbul (UTC+3)", name)
+    return _TURKEY_FALLBACK
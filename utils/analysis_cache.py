@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+TOPIC = 'topic'
+RESOURCES = 'resources'
+
+
+def resource_key(topic):
+    """
+    Kaynak cache anahtarı - aynı konunun farklı yazımları tek kayda düşer.
+    Konu LLM'den geldiği için uzunluğu sınırsızdır; sütuna sığması için sha256 hash'i kullanılır.
+    """
+    return hashlib.sha256(' '.join(topic.lower().split()).encode()).hexdigest()
+
+
+class InMemoryAnalysisCache:
+    """
+    Süreç içi TTL + LRU cache.
+
+    Anahtarlar (kind, interest, key) üçlüsüdür; kind TOPIC için key soru
+    hash'i, RESOURCES için normalize edilmiş konu adıdır.
+    """
+
+    def __init__(self, max_entries=2000, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (kind, interest, key): (stored_at, value)
+
+    def get_many(self, kind, interest, keys):
+        """Bulunan anahtarlar için {key: value} döndür"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                cache_key = (kind, interest, key)
+                entry = self._entries.get(cache_key)
+                if entry is None:
+                    continue
+                if now - entry[0] >= self.ttl:
+                    del self._entries[cache_key]
+                    continue
+                self._entries.move_to_end(cache_key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, kind, interest, values):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in values.items():
+                cache_key = (kind, interest, key)
+                self._entries[cache_key] = (now, value)
+                self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def prune(self):
+        """Süresi dolan kayıtları sil, silinen sayısını döndür"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (stored_at, _) in self._entries.items() if now - stored_at >= self.ttl]
+            for k in expired:
+                del self._entries[k]
+        return len(expired)
+
+
+class AnalysisCacheStore:
+    """
+    Veritabanı destekli konu/kaynak cache'i.
+
+    Soru hash'i → konu bilgisi ve (interest, konu) → kaynak listesi
+    `entry_model` tablosunda tüm worker'lar arasında paylaşılır; popüler bir
+    soru tüm kullanıcılar için yalnızca bir kez analiz edilir. Okumalar önce
+    süreç içi LRU'ya bakar. Kayıtlar `ttl` saniye sonra geçersiz olur,
+    `prune()` tabloyu `max_entries` kayda kadar en az kullanılanlardan kırpar.
+    """
+
+    # last_used_at her okumada değil, bu aralıktan eskiyse güncellenir
+    TOUCH_INTERVAL = timedelta(hours=1)
+
+    def __init__(self, db, entry_model, ttl=7 * 24 * 3600, max_entries=50000, memory_entries=2000):
+        self.db = db
+        self.entry_model = entry_model
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = InMemoryAnalysisCache(max_entries=memory_entries, ttl=ttl)
+
+    def get_many(self, kind, interest, keys):
+        """Bulunan anahtarlar için {key: value} döndür"""
+        keys = list(dict.fromkeys(keys))
+        found = self._memory.get_many(kind, interest, keys)
+        missing = [k for k in keys if k not in found]
+        if not missing:
+            return found
+
+        model = self.entry_model
+        now = datetime.utcnow()
+        try:
+            rows = model.query.filter(
+                model.kind == kind,
+                model.interest == interest,
+                model.cache_key.in_(missing),
+                model.created_at > now - timedelta(seconds=self.ttl)
+            ).all()
+        except Exception as e:
+            logger.warning("Analysis cache read error: %s", e)
+            return found
+
+        loaded = {}
+        stale_ids = []
+        for row in rows:
+            try:
+                loaded[row.cache_key] = json.loads(row.payload)
+            except (TypeError, ValueError):
+                continue
+            if row.last_used_at is None or now - row.last_used_at > self.TOUCH_INTERVAL:
+                stale_ids.append(row.id)
+
+        if stale_ids:
+            try:
+                model.query.filter(model.id.in_(stale_ids))\
+                    .update({'last_used_at': now}, synchronize_session=False)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                logger.warning("Analysis cache touch error: %s", e)
+
+        self._memory.set_many(kind, interest, loaded)
+        found.update(loaded)
+        return found
+
+    def set_many(self, kind, interest, values):
+        if not values:
+            return
+        self._memory.set_many(kind, interest, values)
+
+        model = self.entry_model
+        now = datetime.utcnow()
+        try:
+            existing = {
+                row.cache_key: row for row in model.query.filter(
+                    model.kind == kind,
+                    model.interest == interest,
+                    model.cache_key.in_(list(values))
+                ).all()
+            }
+            for key, value in values.items():
+                payload = json.dumps(value, ensure_ascii=False)
+                row = existing.get(key)
+                if row is None:
+                    self.db.session.add(model(
+                        kind=kind, interest=interest, cache_key=key,
+                        payload=payload, created_at=now, last_used_at=now
+                    ))
+                else:
+                    row.payload = payload
+                    row.created_at = now
+                    row.last_used_at = now
+            self.db.session.commit()
+        except Exception as e:
+            # Başka bir worker aynı anahtarı eş zamanlı yazmış olabilir
+            self.db.session.rollback()
+            logger.warning("Analysis cache write error: %s", e)
+
+    def prune(self):
+        """Süresi dolan ve LRU sınırını aşan kayıtları sil, silinen sayısını döndür"""
+        model = self.entry_model
+        self._memory.prune()
+        try:
+            deleted = model.query.filter(
+                model.created_at < datetime.utcnow() - timedelta(seconds=self.ttl)
+            ).delete(synchronize_session=False)
+
+            overflow = model.query.count() - self.max_entries
+            if overflow > 0:
+                oldest = model.query.with_entities(model.id)\
+                    .order_by(model.last_used_at.asc()).limit(overflow).subquery()
+                deleted += model.query.filter(model.id.in_(self.db.select(oldest.c.id)))\
+                    .delete(synchronize_session=False)
+            self.db.session.commit()
+            return deleted
+        except Exception as e:
+            self.db.session.rollback()
+            logger.warning("Analysis cache prune error: %s", e)
+            return 0
+
+
+# Uygulama genelinde kullanılan cache - app.py veritabanı destekli store ile değiştirir
+_analysis_cache = InMemoryAnalysisCache()
+
+
+def configure_analysis_cache(cache):
+    global _analysis_cache
+    _analysis_cache = cache
+
+
+def get_analysis_cache():
+    return _analysis_cache
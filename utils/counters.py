@@ -0,0 +1,36 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def increment_counters(conn, table, key, deltas, values=None):
+    """
+    `key` ({sütun: değer}) satırındaki sayaç sütunlarını `deltas` kadar
+    atomik olarak artır; satır yoksa `values` ile oluşturulur.
+
+    PostgreSQL ve SQLite'ta tek `INSERT ... ON CONFLICT DO UPDATE`, diğer
+    veritabanlarında UPDATE + (gerekirse) INSERT kullanılır. Çağıranın
+    transaction'ında çalışır.
+    """
+    values = dict(values or {})
+    dialect = conn.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(table).values(**key, **deltas, **values)
+        updates = {name: table.c[name] + statement.excluded[name] for name in deltas}
+        updates.update({name: value for name, value in values.items() if _is_plain(value)})
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in key],
+            set_=updates
+        )
+        conn.execute(statement)
+        return
+
+    where = [table.c[name] == value for name, value in key.items()]
+    updates = {name: table.c[name] + delta for name, delta in deltas.items()}
+    updates.update({name: value for name, value in values.items() if _is_plain(value)})
+    if not conn.execute(table.update().where(*where).values(**updates)).rowcount:
+        conn.execute(table.insert().values(**key, **deltas, **values))
+
+
+def _is_plain(value):
+    # Alt sorgu gibi ifadeler sadece ilk eklemede kullanılır (ör. kullanıcının ilgi alanı)
+    return not hasattr(value, '__clause_element__') and not hasattr(value, 'compile')
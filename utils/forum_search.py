@@ -0,0 +1,190 @@
+import html
+import logging
+import re
+
+from sqlalchemy import Float, Integer, bindparam, inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Snippet vurgu işaretleri - metin HTML-escape edildikten sonra <mark> olur
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class ForumSearch:
+    """
+    Forum gönderileri için tam metin arama.
+
+    PostgreSQL'de `forum_post.search_vector` (başlık/etiket/içerik ağırlıklı,
+    Türkçe stemming'li generated tsvector sütunu) ve GIN index'i; SQLite'ta
+    `forum_post_fts` FTS5 tablosu ve senkronizasyon trigger'ları kullanılır.
+    İkisi de veritabanı içinde güncellenir - oluşturma, düzenleme ve silme
+    için uygulama tarafında ek kod gerekmez; kaldırılan gönderiler sorguda
+    `is_removed` ile elenir. Desteklenmeyen ortamda `apply` None döner ve
+    çağıran taraf ilike aramasına düşer.
+    """
+
+    def __init__(self, db, post_model, language='turkish', title_weight=1.0, tags_weight=0.4, content_weight=0.2):
+        self.db = db
+        self.post_model = post_model
+        self.language = language
+        self.title_weight = title_weight
+        self.tags_weight = tags_weight
+        self.content_weight = content_weight
+        self._supported = None
+
+    # ---- Kurulum (migration) ----
+
+    def install(self, conn):
+        dialect = conn.dialect.name
+        if dialect == 'postgresql':
+            self._install_postgresql(conn)
+        elif dialect == 'sqlite':
+            self._install_sqlite(conn)
+        else:
+            logger.info("Full-text search not available for %s, using ilike search", dialect)
+        self._supported = None
+
+    def _install_postgresql(self, conn):
+        config = f"'{self.language}'::regconfig"
+        conn.execute(text(f"""
+            ALTER TABLE forum_post ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector({config}, coalesce(title, '')), 'A') ||
+                setweight(to_tsvector({config}, coalesce(tags, '')), 'B') ||
+                setweight(to_tsvector({config}, coalesce(content, '')), 'C')
+            ) STORED
+        """))
+        conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_forum_post_search ON forum_post USING GIN (search_vector)'
+        ))
+
+    def _install_sqlite(self, conn):
+        try:
+            conn.execute(text("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS forum_post_fts USING fts5(
+                    title, content, tags,
+                    content='forum_post', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """))
+        except Exception as e:
+            logger.info("SQLite FTS5 not available, using ilike search: %s", e)
+            return
+        conn.execute(text("""
+            CREATE TRIGGER IF NOT EXISTS forum_post_fts_insert AFTER INSERT ON forum_post BEGIN
+                INSERT INTO forum_post_fts(rowid, title, content, tags)
+                VALUES (new.id, new.title, new.content, new.tags);
+            END
+        """))
+        conn.execute(text("""
+            CREATE TRIGGER IF NOT EXISTS forum_post_fts_delete AFTER DELETE ON forum_post BEGIN
+                INSERT INTO forum_post_fts(forum_post_fts, rowid, title, content, tags)
+                VALUES ('delete', old.id, old.title, old.content, old.tags);
+            END
+        """))
+        # Sadece aranan sütunlar değişince (görüntülenme/beğeni sayaçları index'e dokunmaz)
+        conn.execute(text("""
+            CREATE TRIGGER IF NOT EXISTS forum_post_fts_update AFTER UPDATE OF title, content, tags ON forum_post BEGIN
+                INSERT INTO forum_post_fts(forum_post_fts, rowid, title, content, tags)
+                VALUES ('delete', old.id, old.title, old.content, old.tags);
+                INSERT INTO forum_post_fts(rowid, title, content, tags)
+                VALUES (new.id, new.title, new.content, new.tags);
+            END
+        """))
+        conn.execute(text("INSERT INTO forum_post_fts(forum_post_fts) VALUES ('rebuild')"))
+
+    # ---- Arama ----
+
+    def is_supported(self):
+        if self._supported is None:
+            dialect = self.db.engine.dialect.name
+            if dialect == 'postgresql':
+                columns = inspect(self.db.engine).get_columns('forum_post')
+                self._supported = any(column['name'] == 'search_vector' for column in columns)
+            elif dialect == 'sqlite':
+                self._supported = inspect(self.db.engine).has_table('forum_post_fts')
+            else:
+                self._supported = False
+        return self._supported
+
+    def apply(self, query, search):
+        """
+        ForumPost sorgusunu arama eşleşmelerine daraltır.
+        (sorgu, skor sütunu) döndürür - skor büyük olan daha alakalı;
+        tam metin arama kullanılamıyorsa (None, None).
+        """
+        if not self.is_supported():
+            return None, None
+        if self.db.engine.dialect.name == 'postgresql':
+            hits = text(f"""
+                SELECT forum_post.id AS post_id,
+                       ts_rank(CAST(:weights AS float4[]), forum_post.search_vector, q) AS score
+                FROM forum_post, websearch_to_tsquery('{self.language}', :search) AS q
+                WHERE forum_post.search_vector @@ q
+            """).bindparams(
+                weights=f'{{0, {self.content_weight}, {self.tags_weight}, {self.title_weight}}}',
+                search=search
+            )
+        else:
+            match = _fts5_match(search)
+            if not match:
+                return None, None
+            # bm25 küçük olan daha alakalı; sütun sırası title, content, tags.
+            # LIMIT -1 alt sorgunun join'e açılmasını engeller - yoksa SQLite
+            # (ör. sayfalama count sorgusunda) her gönderi için MATCH çalıştırır
+            hits = text(f"""
+                SELECT rowid AS post_id,
+                       -bm25(forum_post_fts, {self.title_weight}, {self.content_weight}, {self.tags_weight}) AS score
+                FROM forum_post_fts
+                WHERE forum_post_fts MATCH :search
+                LIMIT -1
+            """).bindparams(search=match)
+        hits = hits.columns(post_id=Integer, score=Float).subquery('search_hits')
+        return query.join(hits, hits.c.post_id == self.post_model.id), hits.c.score
+
+    def snippets(self, post_ids, search):
+        """{post_id: vurgulanmış içerik parçası (HTML-escape edilmiş, <mark> ile)}"""
+        if not post_ids or not self.is_supported():
+            return {}
+        if self.db.engine.dialect.name == 'postgresql':
+            statement = text(f"""
+                SELECT id, ts_headline('{self.language}', content, websearch_to_tsquery('{self.language}', :search), :options)
+                FROM forum_post WHERE id IN :post_ids
+            """).bindparams(
+                bindparam('post_ids', expanding=True),
+                search=search,
+                options=f'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords=35, MinWords=15, '
+                        f'MaxFragments=2, FragmentDelimiter=" … "',
+                post_ids=list(post_ids)
+            )
+        else:
+            match = _fts5_match(search)
+            if not match:
+                return {}
+            statement = text("""
+                SELECT rowid, snippet(forum_post_fts, 1, char(2), char(3), '…', 32)
+                FROM forum_post_fts WHERE forum_post_fts MATCH :search AND rowid IN :post_ids
+            """).bindparams(bindparam('post_ids', expanding=True), search=match, post_ids=list(post_ids))
+        return {
+            post_id: _highlight(snippet)
+            for post_id, snippet in self.db.session.execute(statement)
+            if snippet
+        }
+
+
+def _fts5_match(search):
+    """
+    Kullanıcı girdisini güvenli bir FTS5 sorgusuna çevirir: her kelime
+    tırnaklanır (operatör olarak yorumlanmaz) ve önek araması yapılır -
+    Türkçe ekler için stemmer yerine ("kod" → "kodlama", "kodları").
+    Büyük/küçük harf dönüşümünü index ile aynı olsun diye tokenizer yapar.
+    """
+    tokens = _TOKEN_RE.findall(search)
+    return ' '.join(f'"{token}"*' if len(token) > 1 else f'"{token}"' for token in tokens)
+
+
+def _highlight(snippet):
+    return html.escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
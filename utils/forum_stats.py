@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class ForumStatsRollups:
+    """
+    İlgi alanı başına tek satırlık önceden hesaplanmış forum istatistikleri.
+
+    `compute(interests)` ({interest: dict}) tüm sayımları gruplu sorgularla
+    tek seferde üretir; sonuç `rollup_model` tablosuna yazılır ve endpoint'ler
+    tek satır okur. Worker thread `refresh_interval` saniyede bir yeniler -
+    diğer worker'lar yakın zamanda yenilediyse atlanır. Okunan satır
+    `max_staleness` saniyeden eskiyse (veya yoksa) istek içinde yeniden
+    hesaplanır, böylece veri hiçbir zaman bu süreden daha eski olmaz.
+    """
+
+    def __init__(self, app, db, rollup_model, compute, refresh_interval=60, max_staleness=300):
+        self.app = app
+        self.db = db
+        self.rollup_model = rollup_model
+        self.compute = compute
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+
+    def get(self, interest):
+        """(istatistikler, hesaplanma zamanı) - app/request context içinde çağrılmalı"""
+        self._ensure_started()
+        row = self.db.session.get(self.rollup_model, interest)
+        if row is not None and datetime.utcnow() - row.computed_at <= timedelta(seconds=self.max_staleness):
+            return json.loads(row.payload), row.computed_at
+        computed_at = datetime.utcnow()
+        data = self.refresh([interest]).get(interest, {})
+        return data, computed_at
+
+    def refresh(self, interests=None):
+        """Verilen (None: tüm) ilgi alanlarını yeniden hesapla ve yaz"""
+        computed_at = datetime.utcnow()
+        results = self.compute(interests)
+        model = self.rollup_model
+        existing = {row.interest: row for row in model.query.filter(model.interest.in_(list(results))).all()}
+        for interest, data in results.items():
+            row = existing.get(interest)
+            if row is None:
+                row = model(interest=interest)
+                self.db.session.add(row)
+            row.payload = json.dumps(data, ensure_ascii=False)
+            row.computed_at = computed_at
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            # Başka bir worker aynı ilgi alanının satırını az önce ekledi
+            self.db.session.rollback()
+        return results
+
+    def _is_fresh(self):
+        # En eski satır bile yeniyse başka bir worker az önce tümünü yenilemiştir
+        oldest = self.db.session.query(self.db.func.min(self.rollup_model.computed_at)).scalar()
+        return oldest is not None and datetime.utcnow() - oldest < timedelta(seconds=self.refresh_interval)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='forum-stats-rollup')
+            self._thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.refresh_interval):
+            try:
+                with self.app.app_context():
+                    if not self._is_fresh():
+                        refreshed = self.refresh()
+                        logger.info("Forum stats refreshed for %d interests", len(refreshed))
+            except Exception:
+                logger.exception("Forum stats refresh error")
@@ -0,0 +1,138 @@
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from google import genai
+from google.genai import types
+
+
+class GeminiModel:
+    """
+    Belirli bir API key'e bağlı model handle'ı.
+
+    `google.generativeai.GenerativeModel.generate_content` ile aynı çağrı
+    biçimini destekler, fakat global `genai.configure` yerine key'e ait
+    client'ı kullandığı için eş zamanlı isteklerde key'ler karışmaz.
+    """
+
+    def __init__(self, client, model_name):
+        self.client = client
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None):
+        return self.client.models.generate_content(
+            model=self.model_name,
+            contents=_to_contents(contents),
+            config=generation_config
+        )
+
+    def generate_content_stream(self, contents, generation_config=None):
+        """Yanıt metnini parça parça üret (ilk token'lar tam yanıtı beklemeden gelir)"""
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model_name,
+            contents=_to_contents(contents),
+            config=generation_config
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+def stream_events(chunks, finalize=str.strip):
+    """
+    Metin parçalarını ('chunk', metin) olarak aktarır, en sonda tam metni
+    `finalize` ile işleyip ('done', sonuç) üretir
+    """
+    parts = []
+    for text in chunks:
+        parts.append(text)
+        yield 'chunk', text
+    yield 'done', finalize(''.join(parts))
+
+
+def _to_contents(contents):
+    """Eski SDK'nın {'mime_type', 'data'} parçalarını yeni SDK Part'larına çevir"""
+    if not isinstance(contents, list):
+        return contents
+    converted = []
+    for part in contents:
+        if isinstance(part, dict) and 'mime_type' in part and 'data' in part:
+            data = part['data']
+            if isinstance(data, str):
+                data = base64.b64decode(data)
+            part = types.Part.from_bytes(data=data, mime_type=part['mime_type'])
+        converted.append(part)
+    return converted
+
+
+class GeminiClientRegistry:
+    """
+    API key bazında paylaşılan Gemini client'ları.
+
+    Her key için tek bir `genai.Client` (ve onun HTTP bağlantı havuzu) ile
+    model handle'ları süreç boyunca yeniden kullanılır. En fazla
+    `max_clients` key tutulur; en uzun süredir kullanılmayan ya da
+    `idle_ttl` saniyedir boşta olan key'ler düşürülür.
+    """
+
+    def __init__(self, max_clients=256, idle_ttl=3600):
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # api_key: {'client', 'models', 'last_used'}
+
+    def _entry(self, api_key):
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(api_key)
+            if entry is None:
+                # Key yoksa client ortam değişkenlerinden (GOOGLE_API_KEY) okur
+                client = genai.Client(api_key=api_key) if api_key else genai.Client()
+                entry = {'client': client, 'models': {}, 'last_used': now}
+                self._entries[api_key] = entry
+            entry['last_used'] = now
+            self._entries.move_to_end(api_key)
+            self._evict(now)
+            return entry
+
+    def _evict(self, now):
+        # Kullanımda olabilecek client'lar kapatılmaz, sadece referans bırakılır
+        while len(self._entries) > self.max_clients:
+            self._entries.popitem(last=False)
+        while self._entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            if now - oldest['last_used'] < self.idle_ttl:
+                break
+            del self._entries[oldest_key]
+
+    def get_client(self, api_key=None):
+        return self._entry(api_key)['client']
+
+    def get_model(self, api_key=None, model_name='gemini-2.5-flash-lite'):
+        entry = self._entry(api_key)
+        with self._lock:
+            model = entry['models'].get(model_name)
+            if model is None:
+                model = GeminiModel(entry['client'], model_name)
+                entry['models'][model_name] = model
+            return model
+
+
+_registry = GeminiClientRegistry(
+    max_clients=int(os.getenv('GEMINI_CLIENT_CACHE_SIZE', 256)),
+    idle_ttl=int(os.getenv('GEMINI_CLIENT_IDLE_TTL', 3600))
+)
+
+
+def get_gemini_client(api_key=None):
+    return _registry.get_client(api_key)
+
+
+def get_gemini_model(api_key=None, model_name='gemini-2.5-flash-lite'):
+    return _registry.get_model(api_key, model_name)
+
+
+def get_gemini_registry():
+    return _registry
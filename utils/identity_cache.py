@@ -0,0 +1,75 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+
+class IdentityCache:
+    """
+    Oturum kullanıcısı için kısa süreli, süreç içi cache.
+
+    Kullanıcı satırının sütun değerleri `ttl` saniye saklanır; `get` cache'ten
+    gelen kaydı `merge(load=False)` ile isteğin session'ına sorgusuz bağlar,
+    böylece route içindeki değişiklikler (ilgi alanı, şifre) normal şekilde
+    kaydedilir. Uygulama içindeki her UPDATE/DELETE (şifre, ilgi alanı, admin
+    yetkisi) `watch` ile kaydedilen event'lerle kaydı hemen ve commit sonrası
+    tekrar geçersiz kılar; diğer worker'lar ve veritabanına dışarıdan yapılan
+    değişiklikler en fazla `ttl` saniye gecikir.
+    """
+
+    def __init__(self, db, user_model, ttl=30, max_entries=1000):
+        self.db = db
+        self.user_model = user_model
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # username: (son geçerlilik zamanı, sütun değerleri)
+
+    def get(self, username):
+        """Kullanıcıyı mevcut session'a bağlı olarak döndür (yoksa None)"""
+        if self.ttl > 0:
+            with self._lock:
+                entry = self._entries.get(username)
+            if entry and entry[0] > time.monotonic():
+                user = self.user_model(**entry[1])
+                make_transient_to_detached(user)
+                return self.db.session.merge(user, load=False)
+
+        user = self.user_model.query.filter_by(username=username).first()
+        if user is not None and self.ttl > 0:
+            values = {attr.key: getattr(user, attr.key) for attr in self.user_model.__mapper__.column_attrs}
+            with self._lock:
+                if username not in self._entries and len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[username] = (time.monotonic() + self.ttl, values)
+        return user
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def watch(self):
+        """Kullanıcı güncelleme/silme event'lerinde cache kaydını düşür"""
+        def invalidate_user(mapper, connection, user):
+            self.invalidate(user.username)
+            # Commit'ten önce başka bir istek eski satırı cache'lemiş olabilir
+            session = object_session(user)
+            if session is not None:
+                session.info.setdefault('identity_cache_invalidated', set()).add(user.username)
+
+        def invalidate_committed(session):
+            for username in session.info.pop('identity_cache_invalidated', ()):
+                self.invalidate(username)
+
+        def forget_rolled_back(session, previous_transaction):
+            session.info.pop('identity_cache_invalidated', None)
+
+        event.listen(self.user_model, 'after_update', invalidate_user)
+        event.listen(self.user_model, 'after_delete', invalidate_user)
+        event.listen(Session, 'after_commit', invalidate_committed)
+        event.listen(Session, 'after_soft_rollback', forget_rolled_back)
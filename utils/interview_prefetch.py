@@ -0,0 +1,83 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionPrefetcher:
+    """
+    Otomatik mülakatta sonraki soruyu (metin + ses) arka planda hazırlar.
+
+    Bir soru kullanıcıya gönderildiği anda bir sonraki soru için üretim
+    başlatılır; kullanıcı cevabını kaydederken metin ve TTS hazır olur.
+    Kayıtlar (session_id, soru index'i) ile tutulur ve süreç içidir - cevap
+    başka bir worker'a düşerse soru normal yoldan üretilir.
+    """
+
+    def __init__(self, max_workers=4, ttl=900):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='interview-prefetch')
+        self._lock = threading.Lock()
+        self._entries = {}  # session_id: (question_index, started_at, future)
+
+    def start(self, session_id, question_index, fn):
+        """fn() -> generate_dynamic_speech_question sonucu; session için önceki kaydı değiştirir"""
+        future = self._executor.submit(fn)
+        with self._lock:
+            previous = self._entries.get(session_id)
+            self._entries[session_id] = (question_index, time.monotonic(), future)
+        if previous:
+            _discard_future(previous[2])
+        self._prune()
+
+    def take(self, session_id, question_index, timeout):
+        """Hazır (veya `timeout` içinde hazır olan) soruyu döndür, yoksa None"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return None
+        index, _, future = entry
+        if index != question_index:
+            _discard_future(future)
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logger.warning("Interview prefetch unavailable: %r", e)
+            _discard_future(future)
+            return None
+
+    def discard(self, session_id):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry:
+            _discard_future(entry[2])
+
+    def _prune(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [sid for sid, (_, started_at, _) in self._entries.items() if now - started_at > self.ttl]
+            futures = [self._entries.pop(sid)[2] for sid in expired]
+        for future in futures:
+            _discard_future(future)
+
+
+def _discard_future(future):
+    """Kullanılmayan sonucun geçici ses dosyasını sil"""
+    def cleanup(f):
+        try:
+            result = f.result()
+        except Exception:
+            return
+        audio_file = result.get('audio_file') if isinstance(result, dict) else None
+        if audio_file and os.path.exists(audio_file):
+            try:
+                os.unlink(audio_file)
+            except OSError:
+                pass
+
+    if not future.cancel():
+        future.add_done_callback(cleanup)
@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from utils.secret_box import SecretBox
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+
+class PermanentJobError(ValueError):
+    """Tekrar denemeyle düzelmeyecek hata (ör. kayıt bulunamadı) - iş hemen failed olur"""
+
+
+class JobQueue:
+    """
+    Uzun süren AI işleri için veritabanı destekli iş kuyruğu.
+
+    İşler `job_model` tablosunda tutulur, böylece harici bir servis olmadan
+    tüm gunicorn worker'ları aynı kuyruğu paylaşır. Her process'te ilk
+    kullanımda `workers` adet thread başlatılır; işler koşullu UPDATE ile
+    atomik olarak sahiplenilir. Hata alan iş `backoff_base * 2^(deneme-1)`
+    saniye sonra tekrar denenir, `max_attempts` sonunda failed olur.
+    `stale_after` saniyeden uzun süredir running kalan işler (ölen worker)
+    aynı backoff ile kuyruğa geri alınır; deneme hakkı bitmişse failed olur.
+    Handler'ın `PermanentJobError` hatası tekrar denenmez (her deneme ücretli
+    bir Gemini çağrısı olabilir).
+
+    Kullanıcının API key'i tabloya açık yazılmaz: SECRET_KEY'den türetilen
+    anahtarla şifrelenir ve iş bitince silinir.
+    """
+
+    def __init__(self, app, db, job_model, workers=2, max_attempts=3, backoff_base=10,
+                 poll_interval=2, stale_after=900):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._handlers = {}
+        self._cond = threading.Condition()
+        self._pid = None
+        self._threads = []
+        self._last_stale_check = 0
+        self._box = None
+
+    def register(self, job_type, handler):
+        """handler(payload, api_key) -> JSON'a çevrilebilir sonuç"""
+        self._handlers[job_type] = handler
+
+    # ---- API ----
+
+    def submit(self, job_type, payload, username=None, api_key=None, max_attempts=None):
+        """İşi kuyruğa al ve job id'sini döndür"""
+        if job_type not in self._handlers:
+            raise ValueError(f'Bilinmeyen iş tipi: {job_type}')
+        now = datetime.utcnow()
+        job = self.job_model(
+            id=uuid.uuid4().hex,
+            job_type=job_type,
+            username=username,
+            status=JOB_QUEUED,
+            payload=json.dumps(payload, ensure_ascii=False),
+            api_key=self._seal(api_key),
+            attempts=0,
+            max_attempts=max_attempts or self.max_attempts,
+            run_at=now,
+            created_at=now
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+        self._ensure_started()
+        with self._cond:
+            self._cond.notify()
+        return job.id
+
+    def get(self, job_id, username=None):
+        """İş durumunu döndür; username verilirse sadece o kullanıcının işi"""
+        self._ensure_started()
+        job = self.db.session.get(self.job_model, job_id)
+        if job is None or (username is not None and job.username != username):
+            return None
+        return {
+            'job_id': job.id,
+            'type': job.job_type,
+            'status': job.status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'result': json.loads(job.result) if job.result else None,
+            'error': job.error,
+            'created_at': _isoformat(job.created_at),
+            'started_at': _isoformat(job.started_at),
+            'finished_at': _isoformat(job.finished_at),
+            'next_run_at': _isoformat(job.run_at) if job.status == JOB_QUEUED else None
+        }
+
+    def purge(self, older_than=timedelta(days=7)):
+        """Biten eski işleri sil, silinen sayısını döndür"""
+        model = self.job_model
+        deleted = model.query.filter(
+            model.status.in_([JOB_SUCCEEDED, JOB_FAILED]),
+            model.finished_at < datetime.utcnow() - older_than
+        ).delete(synchronize_session=False)
+        self.db.session.commit()
+        return deleted
+
+    # ---- Worker ----
+
+    def _ensure_started(self):
+        with self._cond:
+            pid = os.getpid()
+            if self._pid == pid and all(t.is_alive() for t in self._threads):
+                return
+            if self._pid != pid:
+                self._threads = []
+            self._pid = pid
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, daemon=True,
+                    name=f'job-worker-{len(self._threads)}'
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_id(self):
+        return f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+
+    def _run(self):
+        while True:
+            job_id = None
+            try:
+                with self.app.app_context():
+                    self._requeue_stale()
+                    job_id = self._claim()
+                    if job_id:
+                        self._execute(job_id)
+            except Exception:
+                logger.exception("Job worker error")
+            if not job_id:
+                with self._cond:
+                    self._cond.wait(timeout=self.poll_interval)
+
+    def _claim(self):
+        model = self.job_model
+        now = datetime.utcnow()
+        candidates = model.query.filter(model.status == JOB_QUEUED, model.run_at <= now)\
+            .order_by(model.run_at).with_entities(model.id).limit(5).all()
+        for (job_id,) in candidates:
+            # Başka bir worker aynı işi almışsa rowcount 0 olur
+            claimed = model.query.filter(model.id == job_id, model.status == JOB_QUEUED).update({
+                'status': JOB_RUNNING,
+                'started_at': now,
+                'locked_by': self._worker_id(),
+                'attempts': model.attempts + 1
+            }, synchronize_session=False)
+            self.db.session.commit()
+            if claimed:
+                return job_id
+        return None
+
+    def _execute(self, job_id):
+        job = self.db.session.get(self.job_model, job_id)
+        handler = self._handlers.get(job.job_type)
+        logger.info("Job started: %s %s (attempt %s/%s)", job.job_type, job.id, job.attempts, job.max_attempts)
+        try:
+            if handler is None:
+                raise PermanentJobError(f'Bilinmeyen iş tipi: {job.job_type}')
+            result = handler(json.loads(job.payload), self._unseal(job.api_key))
+        except Exception as e:
+            self.db.session.rollback()
+            job = self.db.session.get(self.job_model, job_id)
+            job.error = str(e)
+            if job.attempts < job.max_attempts and not isinstance(e, PermanentJobError):
+                delay = self.backoff_base * 2 ** (job.attempts - 1)
+                job.status = JOB_QUEUED
+                job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+                logger.warning("Job %s failed, retrying in %ss: %s", job.id, delay, e)
+            else:
+                self._finish(job, JOB_FAILED)
+                logger.error("Job %s failed permanently: %s", job.id, e)
+            self.db.session.commit()
+            return
+
+        job = self.db.session.get(self.job_model, job_id)
+        job.result = json.dumps(result, ensure_ascii=False)
+        job.error = None
+        self._finish(job, JOB_SUCCEEDED)
+        self.db.session.commit()
+        logger.info("Job completed: %s %s", job.job_type, job.id)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        # Tamamlanan işte kullanıcı verisi ve API key saklanmaz
+        job.payload = '{}'
+        job.api_key = None
+
+    def _secret_box(self):
+        if self._box is None:
+            self._box = SecretBox(self.app.secret_key, 'background-job-api-key')
+        return self._box
+
+    def _seal(self, api_key):
+        return self._secret_box().encrypt(api_key) if api_key else None
+
+    def _unseal(self, token):
+        from cryptography.fernet import InvalidToken
+
+        if not token:
+            return None
+        try:
+            return self._secret_box().decrypt(token)
+        except (InvalidToken, UnicodeError) as e:
+            # SECRET_KEY değişmiş ya da eski (şifresiz) kayıt - tekrar denemek anlamsız
+            raise PermanentJobError('İşin API key\'i çözülemedi, işi yeniden başlatın.') from e
+
+    def _requeue_stale(self):
+        now = time.monotonic()
+        if now - self._last_stale_check < 60:
+            return
+        self._last_stale_check = now
+        model = self.job_model
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        stale = model.query.filter(model.status == JOB_RUNNING, model.started_at < stale_before)\
+            .with_entities(model.id, model.attempts, model.max_attempts).all()
+        requeued = failed = 0
+        for job_id, attempts, max_attempts in stale:
+            # Deneme hakkı bitmiş iş (ör. worker'ı her seferinde öldüren iş) tekrar kuyruğa alınmaz
+            if attempts >= max_attempts:
+                values = {
+                    'status': JOB_FAILED,
+                    'error': 'İş zaman aşımına uğradı (worker yanıt vermedi)',
+                    'finished_at': datetime.utcnow(),
+                    'payload': '{}',
+                    'api_key': None
+                }
+            else:
+                delay = self.backoff_base * 2 ** (attempts - 1)
+                values = {'status': JOB_QUEUED, 'run_at': datetime.utcnow() + timedelta(seconds=delay)}
+            # Başka bir worker aynı işi işlediyse rowcount 0 olur
+            updated = model.query.filter(
+                model.id == job_id, model.status == JOB_RUNNING, model.started_at < stale_before
+            ).update(values, synchronize_session=False)
+            if updated and values['status'] == JOB_FAILED:
+                failed += 1
+            elif updated:
+                requeued += 1
+        self.db.session.commit()
+        if requeued:
+            logger.warning("Requeued %d stale jobs", requeued)
+        if failed:
+            logger.error("Failed %d stale jobs after max attempts", failed)
+
+def _isoformat(value):
+    return value.isoformat() if value else None
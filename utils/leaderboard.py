@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, select
+
+from utils.counters import increment_counters
+
+
+class Leaderboard:
+    """
+    Kullanıcı başına tutulan puan / çözüm sayaçları üzerinden liderlik tablosu.
+
+    Sayaçlar `increment` ile, değişikliği yapan işlemin kendi
+    transaction'ında atomik UPSERT ile güncellenir (bkz. increment_counters).
+    Sıralama (çözüm sayısı, puan, kullanıcı adı) index'inden okunur: ilk N satır index taraması, kullanıcının sırası ise kendisinden
+    önde olanların index üzerinde sayılmasıdır - aktivite geçmişi taranmaz.
+    """
+
+    def __init__(self, db, score_model, user_model):
+        self.db = db
+        self.score_model = score_model
+        self.user_model = user_model
+
+    # ---- Bakım ----
+
+    def increment(self, conn, username, points=0, solutions=0):
+        """Kullanıcının sayaçlarını artır/azalt (satır yoksa oluşturulur)"""
+        if not username or (not points and not solutions):
+            return
+        increment_counters(
+            conn, self.score_model.__table__,
+            key={'username': username},
+            deltas={'total_points': points, 'solution_count': solutions},
+            values={'interest': self._user_interest(username), 'updated_at': datetime.utcnow()}
+        )
+
+    def set_interest(self, conn, username, interest):
+        table = self.score_model.__table__
+        conn.execute(table.update().where(table.c.username == username).values(interest=interest))
+
+    def _user_interest(self, username):
+        user = self.user_model.__table__
+        return select(user.c.interest).where(user.c.username == username).scalar_subquery()
+
+    # ---- Okuma ----
+
+    def top(self, limit=3, interest=None):
+        """En az bir çözümü olan ilk `limit` kullanıcı"""
+        model = self.score_model
+        query = model.query.filter(model.solution_count > 0)
+        if interest:
+            query = query.filter(model.interest == interest)
+        rows = query.order_by(
+            model.solution_count.desc(), model.total_points.desc(), model.username.asc()
+        ).limit(limit).all()
+        return [self._entry(row, rank) for rank, row in enumerate(rows, 1)]
+
+    def rank(self, username, interest=None):
+        """Kullanıcının kaydı ve sırası; çözümü yoksa rank None"""
+        model = self.score_model
+        row = self.db.session.get(model, username)
+        if row is None:
+            return {'rank': None, 'username': username, 'solution_count': 0, 'total_points': 0}
+        if not row.solution_count or (interest and row.interest != interest):
+            return self._entry(row, None)
+        ahead = self.db.session.query(func.count()).select_from(model).filter(
+            model.solution_count > 0,
+            or_(
+                model.solution_count > row.solution_count,
+                and_(model.solution_count == row.solution_count, model.total_points > row.total_points),
+                and_(model.solution_count == row.solution_count, model.total_points == row.total_points,
+                     model.username < row.username)
+            )
+        )
+        if interest:
+            ahead = ahead.filter(model.interest == interest)
+        return self._entry(row, ahead.scalar() + 1)
+
+    def _entry(self, row, rank):
+        return {
+            'rank': rank,
+            'username': row.username,
+            'solution_count': row.solution_count,
+            'total_points': row.total_points
+        }
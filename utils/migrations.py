@@ -0,0 +1,112 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationRunner:
+    """
+    Sıralı, versiyonlu şema migration'ları.
+
+    Uygulanan versiyonlar `schema_migrations` tablosunda tutulur; her
+    migration kendi transaction'ında çalışır ve bir kez uygulanır.
+    PostgreSQL'de advisory lock ile aynı anda açılan worker'lardan yalnızca
+    biri migration yapar, diğerleri bekleyip uygulanmış versiyonları atlar.
+    Migration fonksiyonları `conn` (SQLAlchemy Connection) alır.
+    """
+
+    LOCK_ID = 7244801  # pg_advisory_xact_lock anahtarı
+
+    def __init__(self, db):
+        self.db = db
+        self._migrations = []  # (version, description, fn)
+
+    def migration(self, version, description):
+        """Migration kaydeden decorator; versiyonlar sıralı çalıştırılır"""
+        def decorator(fn):
+            if any(v == version for v, _, _ in self._migrations):
+                raise ValueError(f'Migration versiyonu tekrar edildi: {version}')
+            self._migrations.append((version, description, fn))
+            self._migrations.sort(key=lambda m: m[0])
+            return fn
+        return decorator
+
+    def applied_versions(self):
+        with self.db.engine.connect() as conn:
+            self._ensure_table(conn)
+            conn.commit()
+            return {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+    def upgrade(self):
+        """Bekleyen migration'ları uygula, uygulanan versiyonları döndür (app context içinde)"""
+        applied = []
+        engine = self.db.engine
+        with engine.connect() as conn:
+            self._ensure_table(conn)
+            conn.commit()
+
+        for version, description, fn in self._migrations:
+            with engine.begin() as conn:
+                if conn.dialect.name == 'postgresql':
+                    conn.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': self.LOCK_ID})
+                done = conn.execute(
+                    text('SELECT 1 FROM schema_migrations WHERE version = :version'),
+                    {'version': version}
+                ).first()
+                if done:
+                    continue
+                logger.info("Applying migration %s: %s", version, description)
+                fn(conn)
+                conn.execute(
+                    text('INSERT INTO schema_migrations (version, description, applied_at) '
+                         'VALUES (:version, :description, :applied_at)'),
+                    {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+                )
+                applied.append(version)
+        return applied
+
+    def _ensure_table(self, conn):
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'version VARCHAR(50) PRIMARY KEY, '
+            'description VARCHAR(200) NOT NULL, '
+            'applied_at TIMESTAMP NOT NULL)'
+        ))
+
+
+def add_missing_columns(conn, table_name, columns):
+    """columns: {sütun adı: 'TİP [DEFAULT ...]'} - tabloda olmayanları ekler"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return []
+    existing = {column['name'] for column in inspector.get_columns(table_name)}
+    added = []
+    quoted_table = conn.dialect.identifier_preparer.quote(table_name)
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(text(f'ALTER TABLE {quoted_table} ADD COLUMN {name} {ddl}'))
+            added.append(name)
+    return added
+
+
+def create_indexes(conn, metadata, *index_names):
+    """Modellerde tanımlı index'leri (yoksa) oluştur"""
+    wanted = set(index_names)
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(conn, checkfirst=True)
+                wanted.discard(index.name)
+    if wanted:
+        raise ValueError(f'Modellerde tanımlı olmayan index: {", ".join(sorted(wanted))}')
+
+
+def drop_indexes(conn, metadata, *index_names):
+    """Modellerde tanımlı index'leri (varsa) kaldır"""
+    wanted = set(index_names)
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.drop(conn, checkfirst=True)
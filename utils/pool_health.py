@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+
+class PoolHealthMonitor:
+    """
+    Veritabanı bağlantı havuzunun sağlık durumu, istek yolunun dışında takip edilir.
+
+    Worker thread `probe_interval` saniyede bir havuzdan aldığı bağlantıyla
+    `SELECT 1` çalıştırıp gecikmeyi ölçer. Uygulama sorgularında oluşan
+    bağlantı hataları (engine `handle_error` event'i) pasif olarak sayılır ve
+    hemen yeni bir kontrol tetikler. Art arda `failure_threshold` hata olunca
+    durum `down` olur. Endpoint'ler `status()` / `is_available()` ile bu
+    cache'lenmiş durumu okur - istek başına ek round trip olmaz.
+    """
+
+    def __init__(self, app, db, probe_interval=15, failure_threshold=3, latency_window=20):
+        self.app = app
+        self.db = db
+        self.probe_interval = probe_interval
+        self.failure_threshold = failure_threshold
+        self._cond = threading.Condition()
+        self._latencies = deque(maxlen=latency_window)  # ms
+        self._consecutive_failures = 0
+        self._last_ok_at = None
+        self._last_error = None
+        self._last_error_at = None
+        self._listening = False
+        self._probing = threading.local()
+        self._pid = None
+        self._thread = None
+
+    # ---- Okuma ----
+
+    def is_available(self):
+        """Havuz kullanılabilir görünüyor mu (ilk kontrol yapılmadıysa True)"""
+        self._ensure_started()
+        with self._cond:
+            return self._consecutive_failures < self.failure_threshold
+
+    def status(self):
+        self._ensure_started()
+        with self._cond:
+            latencies = sorted(self._latencies)
+            if self._consecutive_failures >= self.failure_threshold:
+                state = 'down'
+            elif self._consecutive_failures:
+                state = 'degraded'
+            elif self._last_ok_at is None:
+                state = 'unknown'
+            else:
+                state = 'ok'
+            return {
+                'state': state,
+                'healthy': state in ('ok', 'unknown'),
+                'consecutive_failures': self._consecutive_failures,
+                'last_ok_at': self._last_ok_at.isoformat() if self._last_ok_at else None,
+                'last_error': self._last_error,
+                'last_error_at': self._last_error_at.isoformat() if self._last_error_at else None,
+                'latency_ms': {
+                    'last': round(self._latencies[-1], 2) if latencies else None,
+                    'avg': round(sum(latencies) / len(latencies), 2) if latencies else None,
+                    'max': round(latencies[-1], 2) if latencies else None,
+                },
+                'pool': self._pool_info(),
+            }
+
+    def _pool_info(self):
+        pool = self.db.engine.pool
+        return {
+            name: getattr(pool, name)() if hasattr(pool, name) else 'N/A'
+            for name in ('size', 'checkedin', 'checkedout', 'overflow')
+        }
+
+    # ---- Kontrol ----
+
+    def probe(self):
+        """Havuzdan bir bağlantıyla SELECT 1 çalıştır ve sonucu kaydet (app context içinde)"""
+        started = time.perf_counter()
+        self._probing.active = True
+        try:
+            with self.db.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception as e:
+            self._record_failure(e)
+            return False
+        finally:
+            self._probing.active = False
+        with self._cond:
+            self._latencies.append((time.perf_counter() - started) * 1000)
+            self._consecutive_failures = 0
+            self._last_ok_at = datetime.utcnow()
+        return True
+
+    def _record_failure(self, error):
+        with self._cond:
+            self._consecutive_failures += 1
+            self._last_error = str(error).splitlines()[0][:200] if str(error) else type(error).__name__
+            self._last_error_at = datetime.utcnow()
+            self._cond.notify()
+
+    def _on_error(self, context):
+        # Sadece bağlantı kaynaklı hatalar; SQL/constraint hataları havuz sağlığını etkilemez
+        if getattr(self._probing, 'active', False):
+            return  # probe kendi hatasını kaydeder
+        if context.is_disconnect or context.connection is None:
+            self._record_failure(context.original_exception)
+
+    def _ensure_started(self):
+        with self._cond:
+            if not self._listening:
+                event.listen(self.db.engine, 'handle_error', self._on_error)
+                self._listening = True
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='pool-health')
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.probe()
+            except Exception:
+                logger.exception("Pool health probe error")
+            with self._cond:
+                # Pasif bir hata gelirse beklemeden tekrar kontrol et
+                self._cond.wait(self.probe_interval)
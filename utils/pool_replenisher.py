@@ -0,0 +1,275 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+POOL_DIFFICULTIES = ('beginner', 'intermediate', 'advanced')
+
+
+class ApiKeyRateLimiter:
+    """API key bazında token bucket - dakikada en fazla `requests_per_minute` çağrı"""
+
+    def __init__(self, requests_per_minute):
+        self.capacity = max(1, requests_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self._lock = threading.Lock()
+        self._buckets = {}  # api_key: (tokens, last_refill)
+
+    def try_acquire(self, api_key):
+        """Token varsa harca ve 0 döndür, yoksa beklenmesi gereken saniyeyi döndür"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(api_key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+            if tokens >= 1:
+                self._buckets[api_key] = (tokens - 1, now)
+                return 0
+            self._buckets[api_key] = (tokens, now)
+            return (1 - tokens) / self.refill_rate
+
+
+class PoolReplenisher:
+    """
+    Soru havuzunu arka planda dolduran worker.
+
+    Her (interest, difficulty) bucket'ı `low_water_mark` altına düştüğünde
+    `batch_size` soruluk bir üretim işi kuyruğa alınır. Kategori bucket'ları
+    için eşik ve doldurma hedefi aynıdır: `low_water_mark // 2`; interest başına
+    aynı anda en fazla `max_category_jobs` kategori işi bulunur. Üretim
+    kategorisiz fallback sorulara düşerse o interest'in kategori doldurması
+    `scan_interval` boyunca durdurulur. Aynı bucket için kuyrukta en fazla bir
+    iş bulunur; işler API key bazında hız sınırlamasına tabidir, sınıra takılan
+    iş kuyrukta ertelenir.
+
+    Worker thread ilk iş geldiğinde (ve fork sonrası her process'te) başlatılır,
+    böylece gunicorn --preload ile de her worker kendi thread'ine sahip olur.
+    """
+
+    def __init__(self, app, store, agent_factory, low_water_mark=20, batch_size=10,
+                 requests_per_minute=6, scan_interval=600, check_interval=60, server_api_key=None,
+                 max_category_jobs=3):
+        self.app = app
+        self.store = store
+        self.agent_factory = agent_factory
+        self.low_water_mark = low_water_mark
+        self.category_low_water_mark = max(1, low_water_mark // 2)
+        self.max_category_jobs = max_category_jobs
+        self.batch_size = batch_size
+        self.scan_interval = scan_interval
+        self.check_interval = check_interval
+        self.server_api_key = server_api_key
+        self.limiter = ApiKeyRateLimiter(requests_per_minute)
+
+        self._cond = threading.Condition()
+        self._heap = []      # (ready_at, seq, job)
+        self._pending = set()  # kuyruktaki veya işlenen bucket anahtarları
+        self._seq = itertools.count()
+        self._last_checked = {}  # interest: monotonic zaman
+        self._category_paused_until = {}  # interest: monotonic zaman (fallback sonrası)
+        self._pid = None
+        self._thread = None
+        self._stats = {'jobs_completed': 0, 'jobs_failed': 0, 'questions_added': 0, 'last_error': None}
+
+    # ---- Kuyruk ----
+
+    def request_replenish(self, interest, difficulty, api_key, category=None):
+        """Bucket için üretim işi kuyruğa al; zaten kuyruktaysa False döndür"""
+        if not api_key or not interest:
+            return False
+        if difficulty not in POOL_DIFFICULTIES:
+            difficulty = None  # mixed: tüm zorluk seviyeleri kontrol edilir
+        if difficulty is None:
+            queued = [self.request_replenish(interest, d, api_key, category) for d in POOL_DIFFICULTIES]
+            return any(queued)
+
+        bucket = (interest, difficulty, category)
+        self._ensure_started()
+        with self._cond:
+            if bucket in self._pending:
+                return False
+            self._pending.add(bucket)
+            job = {'bucket': bucket, 'api_key': api_key}
+            heapq.heappush(self._heap, (time.monotonic(), next(self._seq), job))
+            self._cond.notify()
+        return True
+
+    def check_inventory(self, interest, api_key, force=False):
+        """Interest'in tüm bucket'larını tara, low-water mark altındakileri kuyruğa al"""
+        if not api_key or not interest:
+            return 0
+        # İstek yolunda her seferinde GROUP BY atmamak için interest başına kısa aralık
+        now = time.monotonic()
+        with self._cond:
+            last = self._last_checked.get(interest)
+            if not force and last is not None and now - last < self.check_interval:
+                return 0
+            self._last_checked[interest] = now
+        counts = self.store.get_bucket_counts(interest)
+        queued = 0
+        low_categories = []
+        for difficulty in POOL_DIFFICULTIES:
+            difficulty_total = sum(n for (_, d, _), n in counts.items() if d == difficulty)
+            if difficulty_total < self.low_water_mark:
+                queued += self.request_replenish(interest, difficulty, api_key)
+                continue
+            low_categories.extend(
+                (n, difficulty, category) for (_, d, category), n in counts.items()
+                if d == difficulty and category and n < self.category_low_water_mark
+            )
+        
+        # En boş kategoriler önce; interest başına kuyruktaki kategori işi sınırlı
+        with self._cond:
+            if self._category_paused_until.get(interest, 0) > now:
+                return queued
+            slots = self.max_category_jobs - sum(
+                1 for (i, _, c) in self._pending if i == interest and c is not None
+            )
+        for _, difficulty, category in sorted(low_categories, key=lambda item: item[0]):
+            if slots <= 0:
+                break
+            if self.request_replenish(interest, difficulty, api_key, category):
+                queued += 1
+                slots -= 1
+        return queued
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._heap)
+
+    def status(self):
+        with self._cond:
+            pending = [
+                {'interest': i, 'difficulty': d, 'category': c}
+                for i, d, c in sorted(self._pending, key=str)
+            ]
+            stats = dict(self._stats)
+            depth = len(self._heap)
+        return {
+            'queue_depth': depth,
+            'pending_buckets': pending,
+            'low_water_mark': self.low_water_mark,
+            'category_low_water_mark': self.category_low_water_mark,
+            'max_category_jobs': self.max_category_jobs,
+            'batch_size': self.batch_size,
+            'worker_alive': bool(self._thread and self._thread.is_alive() and self._pid == os.getpid()),
+            **stats
+        }
+
+    # ---- Worker ----
+
+    def _ensure_started(self):
+        with self._cond:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            # Fork sonrası parent'tan kopyalanan kuyruk bu process'e ait değil
+            if self._pid != os.getpid():
+                self._heap = []
+                self._pending = set()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='question-pool-replenisher')
+            self._thread.start()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait(timeout=self.scan_interval)
+                    if not self._heap:
+                        return None
+                    continue
+                ready_at = self._heap[0][0]
+                now = time.monotonic()
+                if ready_at <= now:
+                    return heapq.heappop(self._heap)[2]
+                self._cond.wait(timeout=ready_at - now)
+
+    def _defer(self, job, delay):
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                # Kuyruk boş kaldı - sunucu key'i varsa periyodik envanter taraması yap
+                self._scan_all()
+                continue
+
+            wait = self.limiter.try_acquire(job['api_key'])
+            if wait > 0:
+                self._defer(job, wait)
+                continue
+
+            still_low = False
+            try:
+                still_low = self._process(job)
+            except Exception as e:
+                logger.exception("Question pool replenish error")
+                with self._cond:
+                    self._stats['jobs_failed'] += 1
+                    self._stats['last_error'] = str(e)
+            finally:
+                with self._cond:
+                    self._pending.discard(job['bucket'])
+
+            # Bucket hâlâ eşiğin altındaysa bir sonraki partiyi kuyruğa al (hız limiti geçerli)
+            if still_low:
+                interest, difficulty, category = job['bucket']
+                self.request_replenish(interest, difficulty, job['api_key'], category)
+
+    def _target(self, category):
+        return self.category_low_water_mark if category else self.low_water_mark
+
+    def _process(self, job):
+        """Bir parti üret; bucket hâlâ eşiğin altındaysa True döndür"""
+        interest, difficulty, category = job['bucket']
+        target = self._target(category)
+        with self.app.app_context():
+            before = self.store.count(interest, difficulty, category)
+            if before >= target:
+                return False
+            agent = self.agent_factory(interest, job['api_key'])
+            questions = agent._generate_questions_internal(self.batch_size, difficulty, category) or []
+            if category and not any(q.get('category') == category for q in questions):
+                # Fallback üretimi kategorisiz soru döndürür - bucket dolmaz, tekrar deneme
+                with self._cond:
+                    self._category_paused_until[interest] = time.monotonic() + self.scan_interval
+                    self._stats['jobs_failed'] += 1
+                    self._stats['last_error'] = f'Kategori üretimi fallback\'e düştü: {category}'
+                logger.warning("Question pool category refill paused for %s: generation fell back", interest)
+                return False
+            added = self.store.add_questions(interest, questions)
+            remaining = self.store.count(interest, difficulty, category)
+        with self._cond:
+            self._stats['jobs_completed'] += 1
+            self._stats['questions_added'] += added
+        logger.info("Question pool replenished: %s/%s/%s +%d", interest, difficulty, category or '*', added)
+        # Bucket büyümediyse (tekrarlar, başka bucket'a düşen sorular) sonsuz döngüye girme
+        return remaining > before and remaining < target
+
+    def _scan_all(self):
+        if not self.server_api_key:
+            return
+        try:
+            with self.app.app_context():
+                interests = {i for (i, _, _) in self.store.get_bucket_counts()}
+                for interest in interests:
+                    self.check_inventory(interest, self.server_api_key, force=True)
+        except Exception:
+            logger.exception("Question pool inventory scan error")
+
+
+_pool_replenisher = None
+
+
+def configure_pool_replenisher(replenisher):
+    global _pool_replenisher
+    _pool_replenisher = replenisher
+
+
+def get_pool_replenisher():
+    return _pool_replenisher
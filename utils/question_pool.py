@@ -0,0 +1,264 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+def question_hash(question_text):
+    """Soru metninden benzersiz hash oluştur"""
+    return hashlib.md5(question_text.encode()).hexdigest()
+
+
+class InMemoryQuestionPool:
+    """Süreç içi soru havuzu - veritabanı yapılandırılmadığında kullanılır"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pool = {}     # interest: [question, ...]
+        self._history = {}  # user_id: [{question_hash, timestamp, session_id}, ...]
+
+    def get_questions(self, interest, difficulty=None, category=None):
+        """Havuzdaki soruları (kopya olarak) döndür"""
+        with self._lock:
+            questions = list(self._pool.get(interest, []))
+        return [dict(q) for q in _filter_bucket(questions, difficulty, category)]
+
+    def add_questions(self, interest, questions):
+        """Soruları havuza ekle (duplicate kontrolü ile), eklenen sayısını döndür"""
+        added = 0
+        with self._lock:
+            bucket = self._pool.setdefault(interest, [])
+            existing = {question_hash(q['question']) for q in bucket}
+            for q in questions:
+                if not q.get('question'):
+                    continue
+                q_hash = question_hash(q['question'])
+                if q_hash in existing:
+                    continue
+                existing.add(q_hash)
+                bucket.append(dict(q))
+                added += 1
+        return added
+
+    def count(self, interest, difficulty=None, category=None):
+        with self._lock:
+            questions = list(self._pool.get(interest, []))
+        return len(_filter_bucket(questions, difficulty, category))
+
+    def clear(self, interest):
+        with self._lock:
+            self._pool.pop(interest, None)
+
+    def get_bucket_counts(self, interest=None):
+        """(interest, difficulty, category) bazında soru sayıları"""
+        counts = {}
+        with self._lock:
+            items = list(self._pool.items())
+        for pool_interest, questions in items:
+            if interest and pool_interest != interest:
+                continue
+            for q in questions:
+                key = (pool_interest, q.get('difficulty', 'intermediate'), q.get('category', 'Genel'))
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def get_recent_hashes(self, user_id, days_limit=30):
+        """Kullanıcının son günlerde gördüğü soru hash'leri"""
+        cutoff = datetime.now() - timedelta(days=days_limit)
+        with self._lock:
+            records = list(self._history.get(user_id, []))
+        return {r['question_hash'] for r in records if r['timestamp'] > cutoff}
+
+    def record_usage(self, user_id, question_hashes, session_id):
+        """Soru kullanımını kullanıcı geçmişine ekle"""
+        now = datetime.now()
+        cutoff = now - timedelta(days=90)
+        with self._lock:
+            records = [r for r in self._history.get(user_id, []) if r['timestamp'] > cutoff]
+            for q_hash in question_hashes:
+                records.append({'question_hash': q_hash, 'timestamp': now, 'session_id': session_id})
+            self._history[user_id] = records
+
+    def get_user_history(self, user_id, limit=None):
+        """Kullanıcı geçmişi - en yeni kayıt önce"""
+        with self._lock:
+            records = list(self._history.get(user_id, []))
+        records.sort(key=lambda r: r['timestamp'], reverse=True)
+        return records[:limit] if limit else records
+
+
+class QuestionPoolStore:
+    """
+    Veritabanı destekli, süreçler arası paylaşılan soru havuzu.
+
+    Sorular interest/difficulty/category anahtarıyla `entry_model` tablosunda,
+    kullanıcı geçmişi `usage_model` tablosunda tutulur. Okumalar interest
+    bazında süreç içi bir cache'ten yapılır; yazmalar cache'i geçersiz kılar,
+    diğer worker'lar en geç `cache_ttl` saniye içinde yeni durumu görür.
+    """
+
+    def __init__(self, db, entry_model, usage_model, cache_ttl=300):
+        self.db = db
+        self.entry_model = entry_model
+        self.usage_model = usage_model
+        self.cache_ttl = cache_ttl
+        self._lock = threading.RLock()
+        self._cache = {}  # interest: (loaded_at, [question, ...])
+
+    def _load(self, interest):
+        with self._lock:
+            cached = self._cache.get(interest)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+        rows = self.entry_model.query.filter_by(interest=interest)\
+            .with_entities(self.entry_model.question_data).all()
+        questions = []
+        for row in rows:
+            try:
+                questions.append(json.loads(row.question_data))
+            except (TypeError, ValueError):
+                continue
+
+        with self._lock:
+            self._cache[interest] = (time.monotonic(), questions)
+        return questions
+
+    def invalidate(self, interest=None):
+        with self._lock:
+            if interest is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(interest, None)
+
+    def get_questions(self, interest, difficulty=None, category=None):
+        """Havuzdaki soruları (kopya olarak) döndür"""
+        return [dict(q) for q in _filter_bucket(self._load(interest), difficulty, category)]
+
+    def add_questions(self, interest, questions):
+        """Soruları havuza ekle (duplicate kontrolü ile), eklenen sayısını döndür"""
+        candidates = {}
+        for q in questions:
+            if q.get('question'):
+                candidates.setdefault(question_hash(q['question']), q)
+        if not candidates:
+            return 0
+
+        existing = {
+            row.question_hash for row in self.entry_model.query.filter(
+                self.entry_model.interest == interest,
+                self.entry_model.question_hash.in_(list(candidates))
+            ).with_entities(self.entry_model.question_hash).all()
+        }
+
+        added = 0
+        try:
+            for q_hash, q in candidates.items():
+                if q_hash in existing:
+                    continue
+                self.db.session.add(self.entry_model(
+                    interest=interest,
+                    difficulty=q.get('difficulty', 'intermediate'),
+                    category=q.get('category', 'Genel'),
+                    question_hash=q_hash,
+                    question_data=json.dumps(q, ensure_ascii=False)
+                ))
+                added += 1
+            self.db.session.commit()
+        except Exception as e:
+            # Başka bir worker aynı soruyu eş zamanlı eklemiş olabilir
+            self.db.session.rollback()
+            logger.warning("Question pool insert error: %s", e)
+            added = 0
+        finally:
+            self.invalidate(interest)
+        return added
+
+    def count(self, interest, difficulty=None, category=None):
+        query = self.entry_model.query.filter_by(interest=interest)
+        if difficulty:
+            query = query.filter_by(difficulty=difficulty)
+        if category:
+            query = query.filter_by(category=category)
+        return query.count()
+
+    def clear(self, interest):
+        try:
+            self.entry_model.query.filter_by(interest=interest).delete(synchronize_session=False)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        finally:
+            self.invalidate(interest)
+
+    def get_bucket_counts(self, interest=None):
+        """(interest, difficulty, category) bazında soru sayıları - tek GROUP BY sorgusu"""
+        model = self.entry_model
+        query = self.db.session.query(
+            model.interest, model.difficulty, model.category, self.db.func.count(model.id)
+        )
+        if interest:
+            query = query.filter(model.interest == interest)
+        rows = query.group_by(model.interest, model.difficulty, model.category).all()
+        return {(i, d, c): n for i, d, c, n in rows}
+
+    def get_recent_hashes(self, user_id, days_limit=30):
+        """Kullanıcının son günlerde gördüğü soru hash'leri"""
+        cutoff = datetime.utcnow() - timedelta(days=days_limit)
+        rows = self.usage_model.query.filter(
+            self.usage_model.username == user_id,
+            self.usage_model.used_at > cutoff
+        ).with_entities(self.usage_model.question_hash).all()
+        return {row.question_hash for row in rows}
+
+    def record_usage(self, user_id, question_hashes, session_id):
+        """Soru kullanımını kullanıcı geçmişine ekle"""
+        if not question_hashes:
+            return
+        now = datetime.utcnow()
+        try:
+            self.db.session.add_all([
+                self.usage_model(username=user_id, question_hash=q_hash, session_id=session_id, used_at=now)
+                for q_hash in question_hashes
+            ])
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            logger.warning("Question usage record error: %s", e)
+
+    def get_user_history(self, user_id, limit=None):
+        """Kullanıcı geçmişi - en yeni kayıt önce"""
+        query = self.usage_model.query.filter_by(username=user_id)\
+            .order_by(self.usage_model.used_at.desc())
+        if limit:
+            query = query.limit(limit)
+        return [
+            {'question_hash': r.question_hash, 'timestamp': r.used_at, 'session_id': r.session_id}
+            for r in query.all()
+        ]
+
+
+def _filter_bucket(questions, difficulty=None, category=None):
+    if difficulty and difficulty != 'mixed':
+        questions = [q for q in questions if q.get('difficulty', 'intermediate') == difficulty]
+    if category:
+        questions = [q for q in questions if q.get('category', 'Genel') == category]
+    return questions
+
+
+# Uygulama genelinde kullanılan havuz - app.py veritabanı destekli store ile değiştirir
+_question_pool = InMemoryQuestionPool()
+
+
+def configure_question_pool(store):
+    global _question_pool
+    _question_pool = store
+
+
+def get_question_pool():
+    return _question_pool
@@ -0,0 +1,92 @@
+import time
+from datetime import datetime
+
+from sqlalchemy import LargeBinary, String, Text, func, literal, select
+
+
+class RetentionPolicy:
+    """
+    Bir tablo için saklama kuralı: `column` değeri `max_age`'den eski olan ve
+    (varsa) `where(table)` koşulunu sağlayan satırlar silinir.
+    """
+
+    def __init__(self, name, model, column, max_age, where=None):
+        self.name = name
+        self.model = model
+        self.column = column
+        self.max_age = max_age
+        self.where = where
+
+    def conditions(self, cutoff):
+        table = self.model.__table__
+        conditions = [table.c[self.column] < cutoff]
+        if self.where is not None:
+            conditions.append(self.where(table))
+        return conditions
+
+
+class RetentionEngine:
+    """
+    Saklama süresi dolan satırları ORM nesnesi yüklemeden, parça parça siler.
+
+    Her parça kendi kısa transaction'ında en fazla `batch_size` satırın
+    birincil anahtarını seçer ve `DELETE ... WHERE id IN (...)` ile siler;
+    kilitler parça süresince tutulur. Parçalar arasında `pause` saniye
+    beklenir. Rapor tablo başına silinen satır sayısını ve metin/binary
+    sütunlarının toplam boyutuyla kabaca geri kazanılan byte'ı içerir.
+    """
+
+    def __init__(self, db, policies, batch_size=1000, pause=0.05):
+        self.db = db
+        self.policies = {policy.name: policy for policy in policies}
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def run(self, max_ages=None, names=None):
+        """
+        Politikaları uygula. `max_ages` ({isim: timedelta}) saklama sürelerini
+        bu çalıştırma için değiştirir. {isim: {'rows', 'bytes', 'batches', 'seconds'}} döner.
+        """
+        max_ages = max_ages or {}
+        report = {}
+        for name, policy in self.policies.items():
+            if names is not None and name not in names:
+                continue
+            cutoff = datetime.utcnow() - max_ages.get(name, policy.max_age)
+            report[name] = self.purge(policy, cutoff)
+        return report
+
+    def purge(self, policy, cutoff):
+        table = policy.model.__table__
+        primary_key = table.primary_key.columns.values()[0]
+        conditions = policy.conditions(cutoff)
+        row_size = _row_size(table)
+        stats = {'rows': 0, 'bytes': 0, 'batches': 0, 'seconds': 0.0}
+        started = time.perf_counter()
+        while True:
+            with self.db.engine.begin() as conn:
+                batch = conn.execute(
+                    select(primary_key, row_size).where(*conditions).limit(self.batch_size)
+                ).all()
+                if batch:
+                    conn.execute(table.delete().where(primary_key.in_([row[0] for row in batch])))
+            stats['rows'] += len(batch)
+            stats['bytes'] += sum(int(row[1] or 0) for row in batch)
+            if batch:
+                stats['batches'] += 1
+            if len(batch) < self.batch_size:
+                break
+            time.sleep(self.pause)
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        return stats
+
+
+def _row_size(table):
+    # Metin/binary sütunların uzunluğu + diğer sütunlar için 8 byte (yaklaşık)
+    size = literal(0)
+    for column in table.columns:
+        if isinstance(column.type, (String, Text, LargeBinary)):
+            size = size + func.coalesce(func.length(column), 0)
+        else:
+            size = size + 8
+    return size.label('row_size')
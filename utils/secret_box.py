@@ -0,0 +1,30 @@
+import base64
+
+
+class SecretBox:
+    """
+    SECRET_KEY'den türetilen anahtarla simetrik şifreleme (Fernet: AES + HMAC).
+
+    Anahtar HKDF-SHA256 ile `purpose` başına ayrı türetilir; böylece örneğin
+    session çerezi için üretilen bir değer iş kuyruğunda çözülemez.
+    `decrypt` geçersiz, değiştirilmiş veya `ttl` saniyeden eski değerlerde
+    `cryptography.fernet.InvalidToken` yükseltir.
+    """
+
+    def __init__(self, secret_key, purpose):
+        from cryptography.fernet import Fernet
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+        if not secret_key:
+            raise ValueError('SecretBox için SECRET_KEY gerekli')
+        if isinstance(secret_key, str):
+            secret_key = secret_key.encode()
+        key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=purpose.encode()).derive(secret_key)
+        self._fernet = Fernet(base64.urlsafe_b64encode(key))
+
+    def encrypt(self, text):
+        return self._fernet.encrypt(text.encode()).decode('ascii')
+
+    def decrypt(self, token, ttl=None):
+        return self._fernet.decrypt(token.encode('ascii'), ttl=ttl).decode()
@@ -0,0 +1,214 @@
+import logging
+import os
+import secrets
+import threading
+from datetime import datetime, timedelta
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from itsdangerous import BadSignature
+from sqlalchemy import select
+from werkzeug.datastructures import CallbackDict
+
+from utils.secret_box import SecretBox
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKENDS = ('filesystem', 'database', 'cookie')
+
+
+class DatabaseSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class DatabaseSessionInterface(SessionInterface):
+    """
+    Session verisini paylaşılan bir veritabanı tablosunda tutar - tüm
+    worker'lar ve sunucular aynı oturumu görür.
+
+    Çerezde yalnızca rastgele session id bulunur; satır birincil anahtar
+    (session_id) ile okunur. Veri Flask'ın çerez session'ıyla aynı JSON
+    formatında saklanır. Okuma/yazma uygulamanın `db.session`'ından ayrı
+    kısa transaction'larla yapılır (route'un commit edilmemiş değişikliklerine
+    dokunulmaz). Değişmeyen session her istekte yazılmaz; süre uzatma en fazla
+    `touch_interval` saniyede bir yapılır. Süresi dolan satırlar worker
+    thread'de `cleanup_interval` saniyede bir, `cleanup_batch` satırlık
+    parçalar halinde (expires_at index'i ile) silinir.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, app, db, model, cleanup_interval=300, cleanup_batch=1000, touch_interval=60):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.cleanup_interval = cleanup_interval
+        self.cleanup_batch = cleanup_batch
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+
+    def open_session(self, app, request):
+        self._ensure_started()
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            table = self.model.__table__
+            with self.db.engine.connect() as conn:
+                row = conn.execute(
+                    select(table.c.data, table.c.expires_at).where(table.c.session_id == sid)
+                ).first()
+            if row is not None and row.expires_at > datetime.utcnow():
+                try:
+                    return DatabaseSession(self.serializer.loads(row.data), sid=sid, expires_at=row.expires_at)
+                except Exception as e:
+                    logger.warning("Unreadable session data, starting a new session: %s", e)
+        return DatabaseSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        table = self.model.__table__
+
+        if not session:
+            if session.modified and not session.new:
+                with self.db.engine.begin() as conn:
+                    conn.execute(table.delete().where(table.c.session_id == session.sid))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = datetime.utcnow()
+        expires_at = now + app.permanent_session_lifetime
+        if not session.modified:
+            # Sadece süre uzatma - her istekte değil
+            if not self.should_set_cookie(app, session) or (
+                session.expires_at is not None
+                and expires_at - session.expires_at < timedelta(seconds=self.touch_interval)
+            ):
+                return
+
+        values = {'data': self.serializer.dumps(dict(session)), 'expires_at': expires_at}
+        with self.db.engine.begin() as conn:
+            updated = 0
+            if not session.new:
+                updated = conn.execute(
+                    table.update().where(table.c.session_id == session.sid).values(**values)
+                ).rowcount
+            if not updated:
+                conn.execute(table.insert().values(session_id=session.sid, **values))
+
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def delete_expired(self):
+        """Süresi dolmuş session'ları parça parça sil, silinen satır sayısını döndür"""
+        table = self.model.__table__
+        deleted = 0
+        while True:
+            with self.db.engine.begin() as conn:
+                expired = select(table.c.session_id)\
+                    .where(table.c.expires_at <= datetime.utcnow())\
+                    .limit(self.cleanup_batch).scalar_subquery()
+                count = conn.execute(table.delete().where(table.c.session_id.in_(expired))).rowcount
+            deleted += count
+            if count < self.cleanup_batch:
+                return deleted
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='session-cleanup')
+            self._thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.cleanup_interval):
+            try:
+                deleted = self.delete_expired()
+                if deleted:
+                    logger.info("Deleted %d expired sessions", deleted)
+            except Exception:
+                logger.exception("Session cleanup error")
+
+
+class EncryptedSessionSerializer:
+    """
+    Çerez içeriğini SECRET_KEY'den türetilen anahtarla şifreler (SecretBox).
+    Süre kontrolü Fernet'in zaman damgasıyla yapılır. Çözülemeyen/süresi
+    geçmiş çerez BadSignature verir, Flask boş session açar.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, secret_key):
+        self.box = SecretBox(secret_key, 'session-cookie')
+
+    def dumps(self, value):
+        return self.box.encrypt(self.serializer.dumps(value))
+
+    def loads(self, value, max_age=None):
+        from cryptography.fernet import InvalidToken
+
+        try:
+            data = self.box.decrypt(value, ttl=max_age)
+        except (InvalidToken, UnicodeError) as e:
+            raise BadSignature('Geçersiz session çerezi') from e
+        return self.serializer.loads(data)
+
+
+class EncryptedCookieSessionInterface(SecureCookieSessionInterface):
+    """
+    Flask'ın çerez session'ı, fakat içerik yalnızca imzalanmaz şifrelenir de -
+    session'daki Gemini API key'i tarayıcıda / ağda okunabilir halde taşınmaz.
+    """
+
+    def get_signing_serializer(self, app):
+        if not app.secret_key:
+            return None
+        return EncryptedSessionSerializer(app.secret_key)
+
+
+def configure_session_backend(app, db, model, backend='filesystem', **options):
+    """
+    Session backend'ini seç:
+    - filesystem: flask-session dosya deposu (tek sunucu)
+    - database: `model` tablosu, sunucular arası paylaşılır
+    - cookie: şifreli çerez session'ı (anahtar SECRET_KEY'den), sunucuda depolama yok
+    """
+    if backend not in SESSION_BACKENDS:
+        logger.warning("Unknown SESSION_BACKEND '%s', using filesystem", backend)
+        backend = 'filesystem'
+    if backend == 'cookie':
+        try:
+            import cryptography  # noqa: F401
+        except ImportError:
+            # Şifrelenmemiş çerez session'ı API key'i açık taşır - sunulmaz
+            logger.warning("SESSION_BACKEND=cookie requires the 'cryptography' package, using filesystem")
+            backend = 'filesystem'
+    if backend == 'database':
+        app.session_interface = DatabaseSessionInterface(app, db, model, **options)
+    elif backend == 'cookie':
+        app.session_interface = EncryptedCookieSessionInterface()
+    else:
+        from flask_session import Session
+        Session(app)
+    logger.info("Session backend: %s", backend)
+    return backend
@@ -0,0 +1,134 @@
+import json
+import logging
+import re
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+# Değeri loglanmayacak alan adları (dict anahtarları ve extra alanları)
+_SECRET_KEY_RE = re.compile(r'pass(word)?|hash|secret|token|api_?key|authorization|cookie', re.IGNORECASE)
+
+# Mesaj metni içinde yakalanan gizli değerler
+_SECRET_PATTERNS = (
+    # Google / Gemini API key
+    (re.compile(r'AIza[0-9A-Za-z_\-]{20,}'), '[REDACTED]'),
+    # werkzeug şifre hash'leri
+    (re.compile(r'\b(pbkdf2|scrypt):[^\s\'",}]+'), '[REDACTED]'),
+    # Bağlantı adreslerindeki kullanıcı:şifre
+    (re.compile(r'(://[^:/@\s]+:)[^@\s]+@'), r'\1[REDACTED]@'),
+    # key=değer / 'key': 'değer' biçimindeki gizli alanlar
+    (re.compile(r"""((?:password|password_hash|gemini_api_key|api_key|secret_key|token)['"]?\s*[:=]\s*['"]?)[^'",\s}]+""",
+                re.IGNORECASE), r'\1[REDACTED]'),
+)
+
+REDACTED = '[REDACTED]'
+
+# LogRecord'un standart alanları - geri kalanlar `extra` ile gelen yapısal alanlardır
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_REQUEST_ID_RE = re.compile(r'^[\w.\-]{1,64}$')
+
+
+def redact(value):
+    """Gizli alanları / değerleri maskele (dict, list, tuple ve str içinde)"""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and _SECRET_KEY_RE.search(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    if isinstance(value, str):
+        for pattern, replacement in _SECRET_PATTERNS:
+            value = pattern.sub(replacement, value)
+        return value
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    """Handler'a takılır: yalnızca gerçekten yazılacak kayıtlar maskelenir"""
+
+    def filter(self, record):
+        # Önce formatla: şablondaki "%s" gibi yer tutucular maskelemeden etkilenmesin
+        record.msg = redact(record.getMessage())
+        record.args = None
+        for key in set(vars(record)) - _RECORD_FIELDS:
+            value = getattr(record, key)
+            setattr(record, key, REDACTED if _SECRET_KEY_RE.search(key) else redact(value))
+        return True
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = get_request_id()
+        return True
+
+
+class RedactingFormatter(logging.Formatter):
+    """Traceback ve stack metni de maskelenir (filtre yalnızca mesajı ve alanları görür)"""
+
+    def formatException(self, ei):
+        return redact(super().formatException(ei))
+
+    def formatStack(self, stack_info):
+        return redact(super().formatStack(stack_info))
+
+
+class JsonFormatter(RedactingFormatter):
+    """Tek satır JSON: zaman, seviye, logger, mesaj, request_id ve extra alanları"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for key in set(vars(record)) - _RECORD_FIELDS:
+            entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def get_request_id():
+    if has_request_context():
+        return g.get('request_id', '-')
+    return '-'
+
+
+def configure_logging(level='INFO', fmt='text'):
+    """
+    Kök logger'ı tek bir handler ile yapılandır. Seviye altındaki kayıtlar
+    `logger.debug("... %s", değer)` çağrısında formatlanmadan elenir; maskeleme
+    ve request_id yalnızca yazılan kayıtlarda çalışır.
+    """
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(RedactingFilter())
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(RedactingFormatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+
+def init_request_ids(app):
+    """Her isteğe request id ata (gelen X-Request-ID geçerliyse o kullanılır) ve yanıta ekle"""
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id_header(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        return response
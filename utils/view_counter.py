@@ -0,0 +1,101 @@
+import atexit
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Forum görüntülenme sayacı için write-behind tampon.
+
+    Okuma isteği satır kilitleyen bir UPDATE yapmak yerine sayacı süreç içi
+    tamponda artırır; tampon `flush_interval` saniyede bir (veya `max_pending`
+    gönderiye ulaşınca) tek seferde `views = views + n` ile veritabanına
+    yazılır. Worker thread ilk kullanımda (ve fork sonrası her process'te)
+    başlatılır.
+    """
+
+    def __init__(self, app, db, model, flush_interval=10, max_pending=1000):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending = {}  # post_id: yazılmamış görüntülenme sayısı
+        self._pid = None
+        self._thread = None
+        atexit.register(self._flush_on_exit)
+
+    def increment(self, post_id, amount=1):
+        """Görüntülenmeyi tampona ekle, gönderinin bekleyen sayısını döndür"""
+        self._ensure_started()
+        with self._cond:
+            count = self._pending.get(post_id, 0) + amount
+            self._pending[post_id] = count
+            if len(self._pending) >= self.max_pending:
+                self._cond.notify()
+        return count
+
+    def pending(self, post_id):
+        with self._cond:
+            return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Bekleyen sayıları yaz, güncellenen gönderi sayısını döndür (app context içinde çağrılmalı)"""
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        # Aynı artışa sahip gönderiler tek UPDATE ile yazılır
+        by_amount = {}
+        for post_id, amount in pending.items():
+            by_amount.setdefault(amount, []).append(post_id)
+
+        model = self.model
+        try:
+            for amount, post_ids in by_amount.items():
+                model.query.filter(model.id.in_(post_ids)).update({
+                    model.views: model.views + amount,
+                    # Görüntülenme gönderinin düzenlenme zamanını değiştirmez
+                    model.updated_at: model.updated_at
+                }, synchronize_session=False)
+            self.db.session.commit()
+            return len(pending)
+        except Exception as e:
+            self.db.session.rollback()
+            logger.warning("View counter flush error: %s", e)
+            # Sayıları kaybetme - bir sonraki turda tekrar dene
+            with self._cond:
+                for post_id, amount in pending.items():
+                    self._pending[post_id] = self._pending.get(post_id, 0) + amount
+            return 0
+
+    def _ensure_started(self):
+        with self._cond:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._pending = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='forum-view-counter')
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=self.flush_interval)
+            with self.app.app_context():
+                self.flush()
+
+    def _flush_on_exit(self):
+        if self._pid != os.getpid():
+            return
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception as e:
+            logger.warning("View counter flush error: %s", e)